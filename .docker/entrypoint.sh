@@ -2,6 +2,7 @@
 
 echo "Aplicando migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 echo "Populando banco de dados"
 python manage.py seed
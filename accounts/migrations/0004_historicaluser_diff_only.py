@@ -0,0 +1,98 @@
+# Generated by Django 5.2 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0003_historicaluser"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="historicaluser",
+            name="last_login",
+        ),
+        migrations.AddField(
+            model_name="historicaluser",
+            name="history_diff",
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="date_joined",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="date joined"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="document",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Número do CPF ou CNPJ",
+                max_length=20,
+                null=True,
+                verbose_name="CPF/CNPJ",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="email",
+            field=models.EmailField(
+                blank=True, db_index=True, max_length=254, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="first_name",
+            field=models.CharField(
+                blank=True, max_length=150, null=True, verbose_name="first name"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="is_active",
+            field=models.BooleanField(
+                blank=True,
+                help_text="Designates whether this user should be treated as active. Unselect this instead of deleting accounts.",
+                null=True,
+                verbose_name="active",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="is_staff",
+            field=models.BooleanField(
+                blank=True,
+                help_text="Designates whether the user can log into this admin site.",
+                null=True,
+                verbose_name="staff status",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="is_superuser",
+            field=models.BooleanField(
+                blank=True,
+                help_text="Designates that this user has all permissions without explicitly assigning them.",
+                null=True,
+                verbose_name="superuser status",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="last_name",
+            field=models.CharField(
+                blank=True, max_length=150, null=True, verbose_name="last name"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicaluser",
+            name="password",
+            field=models.CharField(
+                blank=True, max_length=128, null=True, verbose_name="password"
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from simple_history.models import HistoricalRecords
+
+from core.history import BufferedHistoricalRecords
 
 from .managers import CustomUserManager
 
@@ -18,7 +19,8 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
-    history = HistoricalRecords()
+    # Alterações gravam só os campos alterados; logins não geram histórico
+    history = BufferedHistoricalRecords(diff_only=True, excluded_fields=["last_login"])
 
     objects = CustomUserManager()
 
@@ -0,0 +1,4 @@
+from .account_summary_cache import get_cached_summary  # noqa: F401
+from .account_summary_cache import invalidate_account_summary  # noqa: F401
+from .account_summary_cache import set_cached_summary  # noqa: F401
+from .account_summary_cache import summary_cache_stats  # noqa: F401
@@ -0,0 +1,47 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.timezone import now
+
+_stats = Counter()
+
+
+def _cache():
+    """Cache compartilhado entre processos (ver `CACHES` nas configurações)."""
+    return caches["account_summary"]
+
+
+def _cache_key(user_id, day=None):
+    """
+    A chave inclui a data do dia: os juros mudam diariamente, então a virada
+    do dia invalida o resumo anterior sem nenhuma ação explícita.
+    """
+    day = day or now().date()
+    return f"accounts:summary:{user_id}:{day.isoformat()}"
+
+
+def get_cached_summary(user_id):
+    """Retorna o resumo em cache do usuário ou `None`, contabilizando o acesso."""
+    summary = _cache().get(_cache_key(user_id))
+    _stats["hits" if summary is not None else "misses"] += 1
+    return summary
+
+
+def set_cached_summary(user_id, summary):
+    _cache().set(_cache_key(user_id), summary, settings.ACCOUNT_SUMMARY_CACHE_TTL)
+
+
+def invalidate_account_summary(user_id):
+    """Remove o resumo do dia em cache do usuário."""
+    _cache().delete(_cache_key(user_id))
+    _stats["invalidations"] += 1
+
+
+def summary_cache_stats() -> dict:
+    """Contadores de acerto, falha e invalidação do cache de resumos."""
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "invalidations": _stats["invalidations"],
+    }
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.test import TestCase
 
 User = get_user_model()
@@ -73,3 +74,18 @@ class CustomUserModelTest(TestCase):
             User.objects.create_user(
                 email="unique2@example.com", password="123", document="cpf-001"
             )
+
+    def test_last_login_does_not_create_history(self):
+        user = User.objects.create_user(
+            email="login@example.com", password="12345678", document="12345678901"
+        )
+
+        update_last_login(None, user)
+        user.first_name = "Nome"
+        user.save()
+
+        self.assertEqual(
+            list(user.history.values_list("history_type", "history_diff")),
+            [("~", {"first_name": "Nome"}), ("+", None)],
+        )
+        self.assertFalse(hasattr(user.history.model, "last_login"))
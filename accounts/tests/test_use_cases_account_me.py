@@ -1,15 +1,23 @@
+from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
 
 from accounts.models import User
+from accounts.services import summary_cache_stats
 from accounts.usescases.get_account_use_case import GetAccountMeUseCase
 from loans.models import Loan
 from payments.models import Payment
+from payments.usecases import ProcessPaymentUseCase
 
 
 class GetAccountMeUseCaseTest(TestCase):
     def setUp(self):
+        caches["account_summary"].clear()
         self.user = User.objects.create_user(
             email="client@example.com", password="12345678", document="11111111111"
         )
@@ -92,3 +100,80 @@ class GetAccountMeUseCaseTest(TestCase):
 
         self.assertEqual(result["loans"]["principal_amount_total"], Decimal("333.33"))
         self.assertEqual(result["loans"]["amount_paid_total"], Decimal("123.46"))
+
+    def test_summary_is_served_from_cache(self):
+        first = self.usecase.handle(self.user)
+        stats = summary_cache_stats()
+
+        # Apenas a leitura do cache compartilhado (tabela no banco)
+        with self.assertNumQueries(1):
+            second = self.usecase.handle(self.user)
+
+        self.assertEqual(first, second)
+        self.assertEqual(summary_cache_stats()["hits"], stats["hits"] + 1)
+
+    def test_payment_commit_invalidates_cached_summary(self):
+        loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Cache",
+            client="Cliente Cache",
+        )
+        self.usecase.handle(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessPaymentUseCase().handle(
+                loan=loan, user=self.user, amount=Decimal("100.00")
+            )
+
+        result = self.usecase.handle(self.user)
+        self.assertEqual(result["loans"]["amount_paid_total"], Decimal("100.00"))
+
+    def test_cached_summary_expires_at_day_rollover(self):
+        self.usecase.handle(self.user)
+        Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Amanhã",
+            client="Cliente Amanhã",
+        )
+
+        tomorrow = now() + timedelta(days=1)
+        with patch(
+            "accounts.services.account_summary_cache.now", return_value=tomorrow
+        ):
+            result = self.usecase.handle(self.user)
+
+        self.assertEqual(result["loans"]["total_loans"], 1)
+
+    @override_settings(
+        CACHES={
+            **settings.CACHES,
+            "account_summary": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            },
+        }
+    )
+    def test_summary_runs_fixed_number_of_queries(self):
+        for index in range(20):
+            loan = Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                monthly_interest_rate=Decimal("0.02"),
+                ip_address="127.0.0.1",
+                bank=f"Banco {index}",
+                client=f"Cliente {index}",
+                is_fully_paid=index % 4 == 0,
+            )
+            Payment.objects.create(loan=loan, amount=Decimal("10.00"))
+
+        with self.assertNumQueries(2):
+            result = self.usecase.handle(self.user)
+
+        self.assertEqual(result["loans"]["total_loans"], 20)
+        self.assertEqual(result["loans"]["fully_paid_loans"], 5)
+        self.assertEqual(result["loans"]["amount_paid_total"], Decimal("200.00"))
@@ -1,6 +1,7 @@
 import datetime
 from decimal import Decimal
 
+from django.core.cache import caches
 from django.test import TestCase
 from django.urls import reverse
 from django.utils.timezone import make_aware
@@ -14,6 +15,7 @@ from payments.models import Payment
 
 class MeEndpointTestCase(TestCase):
     def setUp(self):
+        caches["account_summary"].clear()
         self.client = APIClient()
 
         self.user = User.objects.create_user(
@@ -71,7 +73,30 @@ class MeEndpointTestCase(TestCase):
             ),
         )
 
+    def test_summary_values_are_serialized_as_strings(self):
+        response = self.client.get(reverse("me"))
+
+        self.assertEqual(response.data["loans"]["principal_amount_total"], "3000.00")
+        self.assertEqual(response.data["user"]["email"], "user@test.com")
+
     def test_unauthenticated_user_cannot_access(self):
         self.client.logout()
         response = self.client.get(reverse("me"))
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_creating_loan_invalidates_cached_summary(self):
+        self.client.get(reverse("me"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("loans-list"),
+                {
+                    "principal_amount": "500.00",
+                    "monthly_interest_rate": "0.02",
+                    "bank": "Banco Novo",
+                    "client": "Cliente Novo",
+                },
+            )
+
+        response = self.client.get(reverse("me"))
+        self.assertEqual(response.data["loans"]["total_loans"], 3)
@@ -1,10 +1,11 @@
 from decimal import ROUND_HALF_UP, Decimal
 
-from django.db.models import Sum
+from django.db.models import Count, Q, Sum
 
 from accounts.models import User
+from accounts.services import get_cached_summary, set_cached_summary
+from loans import engine
 from loans.models import Loan
-from payments.models import Payment
 
 
 class GetAccountMeUseCase:
@@ -12,17 +13,31 @@ class GetAccountMeUseCase:
     Caso de uso responsável por retornar o resumo financeiro de um usuário
     autenticado.
 
+    O resumo é servido do cache por usuário quando disponível; pagamentos e
+    alterações de empréstimos o invalidam, assim como a virada do dia.
+
     Etapas do processo:
         1. Buscar os empréstimos do usuário
         2. Calcular totais e quantidades de status dos empréstimos
-        3. Calcular total de pagamentos
-        4. Calcular dívida total (saldo + já pago)
-        5. Calcular o percentual pago
-        6. Arredondar os valores para duas casas decimais
-        7. Retornar os dados consolidados
+        3. Calcular total do principal
+        4. Calcular total de pagamentos
+        5. Calcular dívida total (saldo + já pago) em lote, em uma única
+            leitura das colunas necessárias
+        6. Calcular o percentual pago
+        7. Arredondar os valores e retornar os dados consolidados
     """
 
     def handle(self, user: User) -> dict:
+        """
+        Retorna o resumo do cache ou o consolida e armazena.
+        """
+        summary = get_cached_summary(user.pk)
+        if summary is None:
+            summary = self._build_summary(user)
+            set_cached_summary(user.pk, summary)
+        return summary
+
+    def _build_summary(self, user: User) -> dict:
         """
         Executa o fluxo de consolidação dos dados financeiros do usuário.
         """
@@ -30,22 +45,23 @@ class GetAccountMeUseCase:
         # 1
         loans = Loan.objects.filter(user=user)
 
-        # 2
-        total_loans = loans.count()
-        fully_paid = loans.filter(is_fully_paid=True).count()
-
-        # 3
-        principal_total = loans.aggregate(total=Sum("principal_amount"))[
-            "total"
-        ] or Decimal("0.00")
-
-        # 4
-        payments_total = Payment.objects.filter(loan__user=user).aggregate(
-            total=Sum("amount")
-        )["total"] or Decimal("0.00")
+        # 2, 3 e 4 em uma única agregação condicional
+        totals = loans.aggregate(
+            total_loans=Count("pk"),
+            fully_paid=Count("pk", filter=Q(is_fully_paid=True)),
+            principal_total=Sum("principal_amount"),
+            payments_total=Sum("total_paid_amount"),
+        )
+        total_loans = totals["total_loans"]
+        fully_paid = totals["fully_paid"]
+        principal_total = totals["principal_total"] or Decimal("0.00")
+        payments_total = totals["payments_total"] or Decimal("0.00")
 
         # 5
-        debt_total = sum((loan.outstanding_balance + loan.total_paid) for loan in loans)
+        portfolio = engine.calculate_queryset(loans)
+        debt_total = sum(portfolio["outstanding_balance"]) + sum(
+            portfolio["total_paid"]
+        )
 
         # 6
         percent_paid = (
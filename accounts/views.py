@@ -33,6 +33,4 @@ class MeView(views.APIView):
     )
     def get(self, request):
         data = GetAccountMeUseCase().handle(request.user)
-        serializer = MeSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        return Response(serializer.data)
+        return Response(MeSerializer(data).data)
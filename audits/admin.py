@@ -1,10 +1,50 @@
+import uuid
+
 from django.contrib import admin
 
+from accounts.models import User
+
 from .models import LoanAuditLog
 
 
 @admin.register(LoanAuditLog)
 class LoanLogAdmin(admin.ModelAdmin):
+    """
+    A busca é exata (id do empréstimo ou e-mail do autor), para usar os
+    índices em vez de `LIKE` sobre a junção; consultas por período ficam na
+    API `/api/audit-logs/`, paginada pelo índice de `timestamp`.
+    """
+
     list_display = ("loan", "action", "performed_by", "timestamp")
+    list_select_related = ("loan", "performed_by")
+    # Exibe a caixa de busca; a consulta é montada em `get_search_results`
     search_fields = ("loan__id", "performed_by__email")
-    list_filter = ("action", "timestamp")
+    search_help_text = "Id do empréstimo ou e-mail exato do autor"
+    list_filter = ("action",)
+    ordering = ("-timestamp", "-id")
+    raw_id_fields = ("loan", "performed_by")
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Filtra por `loan_id` quando o termo é um UUID e, caso contrário, pelo
+        autor com esse e-mail (`performed_by_id`), sem `iexact`/`UPPER`, que
+        não usam os índices.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        try:
+            return queryset.filter(loan_id=uuid.UUID(term)), False
+        except ValueError:
+            pass
+
+        user_id = (
+            User.objects.filter(email=User.objects.normalize_email(term))
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if user_id is None:
+            return queryset.none(), False
+        return queryset.filter(performed_by_id=user_id), False
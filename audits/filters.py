@@ -0,0 +1,19 @@
+import django_filters
+
+from .enums import LoanActionEnum
+from .models import LoanAuditLog
+
+
+class LoanAuditLogFilter(django_filters.FilterSet):
+    action = django_filters.MultipleChoiceFilter(choices=LoanActionEnum.choices)
+    since = django_filters.IsoDateTimeFilter(field_name="timestamp", lookup_expr="gte")
+    until = django_filters.IsoDateTimeFilter(field_name="timestamp", lookup_expr="lt")
+
+    class Meta:
+        model = LoanAuditLog
+        fields = ["action", "performed_by"]
+
+
+class AuditLogFilter(LoanAuditLogFilter):
+    class Meta(LoanAuditLogFilter.Meta):
+        fields = ["loan", "action", "performed_by"]
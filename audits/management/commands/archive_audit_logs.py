@@ -0,0 +1,85 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from audits.services import (archivable_months, drop_month, ensure_partitions,
+                             export_month, write_manifest)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta os logs de auditoria anteriores à janela de retenção para "
+        "NDJSON compactado (um arquivo por mês, com manifesto) e os remove "
+        "da tabela"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help="Meses mantidos na tabela, além do corrente",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=settings.AUDIT_LOG_ARCHIVE_DIR,
+            help="Diretório dos arquivos e do manifest.json",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Registros lidos/apagados por consulta",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Partições futuras garantidas (PostgreSQL)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas lista os meses que seriam arquivados",
+        )
+
+    def handle(self, *args, **options):
+        """
+        1. Garante as partições dos próximos meses (PostgreSQL).
+        2. Para cada mês anterior à retenção, do mais antigo: exporta, grava
+            o manifesto e só então remove os registros do mês. Uma execução
+            interrompida refaz o mês inteiro na próxima vez.
+        """
+        if options["retention_months"] < 0:
+            raise CommandError("--retention-months não pode ser negativo")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size deve ser maior que zero")
+
+        # 1
+        for name in ensure_partitions(options["months_ahead"]):
+            self.stdout.write(f"Partição criada: {name}")
+
+        # 2
+        months = archivable_months(options["retention_months"])
+        if not months:
+            self.stdout.write("Nenhum mês a arquivar.")
+            return
+        if options["dry_run"]:
+            for month in months:
+                self.stdout.write(f"{month:%Y-%m}")
+            return
+
+        output_dir = options["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        for month in months:
+            entry = export_month(month, output_dir, options["batch_size"])
+            write_manifest(output_dir, entry)
+            drop_month(month, options["batch_size"])
+            self.stdout.write(
+                f"{entry['month']}: {entry['rows']} log(s) -> {entry['file']}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(months)} mês(es) arquivado(s) em {output_dir}")
+        )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audits.services import get_audit_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Regrava os logs de auditoria descartados em AUDIT_LOG_SPILL_FILE "
+        "por falha do banco"
+    )
+
+    def handle(self, *args, **options):
+        replayed = get_audit_writer().replay_spill()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{replayed} log(s) de auditoria regravado(s) "
+                f"({settings.AUDIT_LOG_SPILL_FILE})"
+            )
+        )
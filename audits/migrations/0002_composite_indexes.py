@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audits", "0001_initial"),
+        ("loans", "0006_composite_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loanauditlog",
+            index=models.Index(
+                fields=["loan", "timestamp"], name="auditlog_loan_timestamp_idx"
+            ),
+        ),
+    ]
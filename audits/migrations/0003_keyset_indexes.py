@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audits", "0002_composite_indexes"),
+        ("loans", "0007_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="loanauditlog",
+            name="auditlog_loan_timestamp_idx",
+        ),
+        migrations.AddIndex(
+            model_name="loanauditlog",
+            index=models.Index(
+                fields=["loan", "timestamp", "id"], name="auditlog_loan_timestamp_idx"
+            ),
+        ),
+    ]
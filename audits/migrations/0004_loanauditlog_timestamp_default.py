@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audits", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loanauditlog",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2 on 2026-10-18 19:20
+
+from datetime import datetime
+
+from django.db import migrations
+from django.utils.timezone import localtime, make_aware, now
+
+TABLE = "audits_loanauditlog"
+
+
+def _month(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return make_aware(datetime(year, month, 1))
+
+
+def partition_table(apps, schema_editor):
+    """
+    Converte a tabela em particionada por intervalo de `timestamp` no
+    PostgreSQL, com uma partição por mês entre o registro mais antigo e três
+    meses à frente, além de uma partição padrão. A chave primária passa a ser
+    (`id`, `timestamp`), exigência do particionamento; índices e chaves
+    estrangeiras são recriados com os mesmos nomes. Nos demais bancos não há
+    alteração.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'p')",
+        [TABLE, TABLE],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f'SELECT min("timestamp") FROM "{TABLE}"')
+    oldest = cursor.fetchone()[0] or now()
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_legacy"')
+    cursor.execute(
+        f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_legacy" INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY ("id", "timestamp")')
+
+    current, last = localtime(oldest), localtime(now())
+    month = _month(current.year, current.month)
+    end = _month(last.year, last.month + 4)
+    while month < end:
+        following = _month(month.year, month.month + 1)
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" '
+            "FOR VALUES FROM (%s) TO (%s)",
+            [month, following],
+        )
+        month = following
+    cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_legacy"')
+    cursor.execute(f'DROP TABLE "{TABLE}_legacy"')
+
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audits", "0004_loanauditlog_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audits", "0005_partition_loanauditlog"),
+        ("loans", "0007_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loanauditlog",
+            index=models.Index(
+                fields=["timestamp", "id"], name="auditlog_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loanauditlog",
+            index=models.Index(
+                fields=["action", "timestamp", "id"], name="auditlog_action_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loanauditlog",
+            index=models.Index(
+                fields=["performed_by", "timestamp", "id"],
+                name="auditlog_performer_ts_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="loanauditlog",
+            name="loan",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="logs",
+                to="loans.loan",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="loanauditlog",
+            name="performed_by",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
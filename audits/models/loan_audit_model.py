@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from django.utils import timezone
 
 from accounts.models import User
 from audits.enums.loan_audit_enum import LoanActionEnum
@@ -9,12 +10,34 @@ from loans.models import Loan
 
 class LoanAuditLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    loan = models.ForeignKey(Loan, on_delete=models.PROTECT, related_name="logs")
+    # Indexado por `auditlog_loan_timestamp_idx`, que tem `loan` como prefixo
+    loan = models.ForeignKey(
+        Loan, on_delete=models.PROTECT, db_index=False, related_name="logs"
+    )
     action = models.CharField(max_length=20, choices=LoanActionEnum.choices)
-    performed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # Indexado por `auditlog_performer_ts_idx`, que tem `performed_by` como prefixo
+    performed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, db_index=False
+    )
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Todas terminam em (`timestamp`, `id`), a chave da paginação
+        indexes = [
+            models.Index(
+                fields=["loan", "timestamp", "id"], name="auditlog_loan_timestamp_idx"
+            ),
+            models.Index(fields=["timestamp", "id"], name="auditlog_timestamp_idx"),
+            models.Index(
+                fields=["action", "timestamp", "id"], name="auditlog_action_ts_idx"
+            ),
+            models.Index(
+                fields=["performed_by", "timestamp", "id"],
+                name="auditlog_performer_ts_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"[{self.action}] {self.loan.id} by {self.performed_by}"
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from audits.models import LoanAuditLog
+
+
+class LoanAuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LoanAuditLog
+        fields = [
+            "id",
+            "loan",
+            "action",
+            "performed_by",
+            "ip_address",
+            "metadata",
+            "timestamp",
+        ]
+        read_only_fields = fields
@@ -1 +1,7 @@
+from .audit_writer import AuditLogWriter, get_audit_writer  # noqa: F401
+from .export import iter_ndjson  # noqa: F401
+from .loan_audit_logger import build_loan_action  # noqa: F401
+from .loan_audit_logger import bulk_log_loan_actions  # noqa: F401
 from .loan_audit_logger import log_loan_action  # noqa: F401
+from .partitions import (archivable_months, drop_month,  # noqa: F401
+                         ensure_partitions, export_month, write_manifest)
@@ -0,0 +1,175 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from functools import cache
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+
+from audits.models.loan_audit_model import LoanAuditLog
+from core.transactions import CommitBuffer
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+SPILL_FIELDS = (
+    "id",
+    "loan_id",
+    "action",
+    "performed_by_id",
+    "ip_address",
+    "metadata",
+    "timestamp",
+)
+
+
+class AuditLogWriter:
+    """
+    Grava logs de auditoria em lote, fora da transação que os gerou.
+
+    Dentro de um bloco atômico, os registros são acumulados e gravados com
+    um único `bulk_create` em `transaction.on_commit`: a transação (e os
+    bloqueios que ela mantém) não espera pelos INSERTs, e um rollback
+    descarta os registros junto com as alterações que eles descrevem (ver
+    `core.transactions.CommitBuffer`). Fora de transação, a gravação é
+    imediata.
+
+    Com `background=True`, o lote confirmado vai para uma fila limitada
+    consumida por uma thread; com a fila cheia, o lote é gravado por quem o
+    gerou. Lotes que o banco recusar são anexados, em NDJSON, a
+    `spill_file`, para reprocessamento com `replay_spill`.
+    """
+
+    def __init__(
+        self,
+        background=False,
+        queue_size=1000,
+        spill_file=None,
+        batch_size=BULK_BATCH_SIZE,
+    ):
+        self.background = background
+        self.spill_file = spill_file
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size) if background else None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._buffer = CommitBuffer(self.write)
+
+    def add(self, logs, using=DEFAULT_DB_ALIAS):
+        """Agenda a gravação de registros montados por `build_loan_action`."""
+        self._buffer.add(logs, using=using)
+
+    def write(self, logs):
+        """Grava um lote já confirmado, na thread de fundo se habilitada."""
+        if not logs:
+            return
+        if self.background:
+            self._start_worker()
+            try:
+                self._queue.put_nowait(logs)
+                return
+            except queue.Full:
+                logger.warning("Fila de auditoria cheia; gravando %d log(s)", len(logs))
+        self._persist(logs)
+
+    def _persist(self, logs):
+        """
+        Grava o lote confirmado. Roda depois do commit (em `on_commit` ou na
+        thread de fundo), então nenhuma falha é propagada: o lote vai para
+        `spill_file` e, se nem isso for possível, é registrado no log.
+        """
+        try:
+            LoanAuditLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("Falha ao gravar %d log(s) de auditoria", len(logs))
+            try:
+                self.spill(logs)
+            except Exception:
+                logger.exception(
+                    "%d log(s) de auditoria descartado(s): falha ao gravar em %s",
+                    len(logs),
+                    self.spill_file,
+                )
+
+    def _start_worker(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="audit-log-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            logs = self._queue.get()
+            try:
+                self._persist(logs)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def drain(self):
+        """Aguarda a thread de fundo gravar os lotes enfileirados."""
+        if self._queue is not None and self._thread is not None:
+            self._queue.join()
+
+    def spill(self, logs):
+        """Anexa os registros a `spill_file` (NDJSON), com fsync."""
+        if not self.spill_file:
+            logger.error("%d log(s) de auditoria descartado(s)", len(logs))
+            return
+
+        lines = []
+        for log in logs:
+            record = {name: getattr(log, name) for name in SPILL_FIELDS}
+            record["id"] = str(record["id"])
+            record["loan_id"] = str(record["loan_id"])
+            record["timestamp"] = record["timestamp"].isoformat()
+            lines.append(json.dumps(record) + "\n")
+
+        with self._lock, open(self.spill_file, "a", encoding="utf-8") as spill:
+            spill.writelines(lines)
+            spill.flush()
+            os.fsync(spill.fileno())
+
+    def replay_spill(self):
+        """
+        Regrava os registros de `spill_file` e retorna quantos foram lidos.
+
+        O arquivo é renomeado antes da leitura, para que novos descartes vão
+        para um arquivo novo; como os registros guardam o id original, uma
+        nova tentativa após falha não duplica logs.
+        """
+        if not self.spill_file:
+            return 0
+
+        replaying = f"{self.spill_file}.replaying"
+        with self._lock:
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.spill_file):
+                    return 0
+                os.replace(self.spill_file, replaying)
+
+        with open(replaying, encoding="utf-8") as spill:
+            logs = [LoanAuditLog(**json.loads(line)) for line in spill if line.strip()]
+        LoanAuditLog.objects.bulk_create(
+            logs, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        os.remove(replaying)
+        return len(logs)
+
+
+@cache
+def get_audit_writer() -> AuditLogWriter:
+    """Instância do processo, configurada pelas settings `AUDIT_LOG_*`."""
+    return AuditLogWriter(
+        background=settings.AUDIT_LOG_BACKGROUND,
+        queue_size=settings.AUDIT_LOG_QUEUE_SIZE,
+        spill_file=settings.AUDIT_LOG_SPILL_FILE,
+    )
@@ -0,0 +1,27 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = (
+    "id",
+    "loan_id",
+    "action",
+    "performed_by_id",
+    "ip_address",
+    "metadata",
+    "timestamp",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Gera os logs de `queryset` como linhas NDJSON (bytes), lendo o banco em
+    blocos de `chunk_size` com `iterator()`: a memória usada não depende da
+    quantidade de registros.
+    """
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for values in rows:
+        record = dict(zip(EXPORT_FIELDS, values))
+        record["timestamp"] = record["timestamp"].isoformat()
+        yield (json.dumps(record, cls=DjangoJSONEncoder) + "\n").encode("utf-8")
@@ -1,11 +1,34 @@
 from audits.models.loan_audit_model import LoanAuditLog
+from audits.services.audit_writer import get_audit_writer
 
 
-def log_loan_action(*, loan, action, user=None, ip_address=None, metadata=None):
-    LoanAuditLog.objects.create(
+def build_loan_action(*, loan, action, user=None, ip_address=None, metadata=None):
+    """Monta o registro de auditoria sem salvá-lo (para gravação em lote)."""
+    return LoanAuditLog(
         loan=loan,
         action=action,
         performed_by=user,
         ip_address=ip_address,
         metadata=metadata or {},
     )
+
+
+def log_loan_action(*, loan, action, user=None, ip_address=None, metadata=None):
+    """
+    Registra uma ação sobre o empréstimo. Dentro de uma transação, o registro
+    é gravado em lote após o commit (ver `AuditLogWriter`).
+    """
+    log = build_loan_action(
+        loan=loan,
+        action=action,
+        user=user,
+        ip_address=ip_address,
+        metadata=metadata,
+    )
+    get_audit_writer().add([log])
+    return log
+
+
+def bulk_log_loan_actions(logs):
+    """Agenda a gravação de registros montados por `build_loan_action`."""
+    get_audit_writer().add(logs)
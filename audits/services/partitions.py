@@ -0,0 +1,242 @@
+"""
+Particionamento mensal e arquivamento de `LoanAuditLog`.
+
+No PostgreSQL a tabela é particionada nativamente por intervalo de
+`timestamp` (ver migração `0005_partition_loanauditlog`): cada mês tem uma
+partição `audits_loanauditlog_pAAAAMM` e uma partição padrão recebe o que
+estiver fora delas. Nos demais bancos os meses são partições lógicas,
+delimitadas pelo índice em `timestamp`.
+
+Meses mais antigos que a retenção são exportados em NDJSON compactado com
+gzip, um arquivo por mês, descritos em `manifest.json` (linhas, sha256,
+primeiro e último registro) e então removidos: a partição é desanexada e
+apagada no PostgreSQL, ou as linhas do mês são apagadas em lotes.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils.timezone import localtime, make_aware, now
+
+from audits.models.loan_audit_model import LoanAuditLog
+from audits.services.export import iter_ndjson
+
+TABLE = LoanAuditLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+MANIFEST = "manifest.json"
+
+
+def month_start(value: datetime) -> datetime:
+    """Início do mês de `value`, no fuso horário corrente."""
+    value = localtime(value)
+    return make_aware(datetime(value.year, value.month, 1))
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned() -> bool:
+    """Se a tabela de auditoria é particionada nativamente (PostgreSQL)."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(months_ahead=3, start=None) -> list:
+    """
+    Cria as partições mensais de `start` (padrão: mês corrente) até
+    `months_ahead` meses à frente e retorna os nomes criados. Sem efeito se
+    a tabela não for particionada.
+
+    Registros de um mês ainda sem partição ficam na partição padrão, e o
+    PostgreSQL recusa criar uma partição cujo intervalo tenha linhas nela;
+    esses registros são movidos para a nova partição (ver
+    `_create_partition`).
+    """
+    if not is_partitioned():
+        return []
+
+    month = month_start(start or now())
+    created = []
+    with connection.cursor() as cursor:
+        for _ in range(months_ahead + 1):
+            name = partition_name(month)
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is None:
+                _create_partition(cursor, name, month)
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def _create_partition(cursor, name, month):
+    """
+    1. Bloqueia escritas na partição padrão até o fim da transação, para
+        que nenhum registro do mês chegue a ela durante a criação.
+    2. Sem registros do mês na partição padrão, cria a partição diretamente.
+    3. Caso contrário, cria uma tabela avulsa, move para ela os registros do
+        mês e a anexa como partição (o PostgreSQL confere que a partição
+        padrão não tem mais linhas do intervalo e cria os índices).
+    """
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic():
+        # 1
+        cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" '
+            'WHERE "timestamp" >= %s AND "timestamp" < %s)',
+            bounds,
+        )
+        if not cursor.fetchone()[0]:
+            # 2
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+                "FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+            return
+
+        # 3
+        cursor.execute(
+            f'CREATE TABLE "{name}" '
+            f'(LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            bounds,
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" '
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+
+
+def archivable_months(retention_months: int) -> list:
+    """Meses com registros anteriores à janela de retenção, do mais antigo."""
+    cutoff = add_months(month_start(now()), -retention_months)
+    return [
+        month_start(month)
+        for month in LoanAuditLog.objects.filter(timestamp__lt=cutoff).datetimes(
+            "timestamp", "month"
+        )
+    ]
+
+
+def _month_logs(month):
+    return LoanAuditLog.objects.filter(
+        timestamp__gte=month, timestamp__lt=add_months(month, 1)
+    )
+
+
+def export_month(month, output_dir, batch_size=2000) -> dict:
+    """
+    Grava os registros do mês em `<output_dir>/loan-audit-logs-AAAA-MM.ndjson.gz`,
+    em ordem de (`timestamp`, `id`) e com memória constante, e retorna a
+    entrada do manifesto. O arquivo só assume o nome final depois de
+    completo. Se o mês já tiver sido arquivado (registros gravados depois,
+    ou execução interrompida antes da remoção), um novo arquivo
+    `AAAA-MM.N` é criado, sem sobrescrever o anterior.
+    """
+    file_name = f"loan-audit-logs-{month:%Y-%m}.ndjson.gz"
+    part = 1
+    while os.path.exists(os.path.join(output_dir, file_name)):
+        part += 1
+        file_name = f"loan-audit-logs-{month:%Y-%m}.{part}.ndjson.gz"
+    path = os.path.join(output_dir, file_name)
+    partial = f"{path}.partial"
+
+    logs = _month_logs(month).order_by("timestamp", "id")
+    rows = 0
+    with (
+        open(partial, "wb") as raw,
+        gzip.GzipFile(
+            filename=file_name[:-3], mode="wb", fileobj=raw, mtime=0
+        ) as archive,
+    ):
+        for line in iter_ndjson(logs, chunk_size=batch_size):
+            archive.write(line)
+            rows += 1
+        archive.flush()
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as archived:
+        for chunk in iter(lambda: archived.read(1 << 20), b""):
+            digest.update(chunk)
+
+    bounds = logs.aggregate(first=Min("timestamp"), last=Max("timestamp"))
+    return {
+        "month": f"{month:%Y-%m}",
+        "file": file_name,
+        "rows": rows,
+        "sha256": digest.hexdigest(),
+        "first_timestamp": bounds["first"] and bounds["first"].isoformat(),
+        "last_timestamp": bounds["last"] and bounds["last"].isoformat(),
+        "archived_at": now().isoformat(),
+    }
+
+
+def drop_month(month, batch_size=2000) -> None:
+    """
+    Remove os registros do mês: desanexa e apaga a partição no PostgreSQL
+    (e limpa o que estiver na partição padrão), ou apaga em lotes.
+    """
+    if is_partitioned():
+        name = partition_name(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+
+    while True:
+        ids = list(_month_logs(month).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        LoanAuditLog.objects.filter(id__in=ids).delete()
+
+
+def read_manifest(output_dir) -> dict:
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"table": TABLE, "archives": []}
+    with open(path, encoding="utf-8") as manifest:
+        return json.load(manifest)
+
+
+def write_manifest(output_dir, entry) -> dict:
+    """Inclui (ou substitui) a entrada do arquivo no manifesto, atomicamente."""
+    manifest = read_manifest(output_dir)
+    archives = [item for item in manifest["archives"] if item["file"] != entry["file"]]
+    manifest["archives"] = sorted(
+        [*archives, entry], key=lambda item: (item["month"], item["archived_at"])
+    )
+
+    path = os.path.join(output_dir, MANIFEST)
+    with open(f"{path}.partial", "w", encoding="utf-8") as partial:
+        json.dump(manifest, partial, indent=2)
+        partial.flush()
+        os.fsync(partial.fileno())
+    os.replace(f"{path}.partial", path)
+    return manifest
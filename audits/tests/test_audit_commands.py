@@ -0,0 +1,165 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from audits.enums import LoanActionEnum
+from audits.models import LoanAuditLog
+from audits.services.partitions import (DEFAULT_PARTITION, add_months,
+                                        ensure_partitions, month_start,
+                                        partition_name)
+from loans.models import Loan
+
+
+class ArchiveAuditLogsCommandTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="archive@test.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Arquivo",
+            client="Cliente Arquivo",
+        )
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+        current = month_start(now())
+        self.old_month = add_months(current, -14)
+        self.older_month = add_months(current, -15)
+        for day in range(3):
+            self.log(self.old_month.replace(day=day + 1))
+        for day in range(2):
+            self.log(self.older_month.replace(day=day + 10))
+        self.recent = self.log(now())
+
+    def log(self, timestamp):
+        return LoanAuditLog.objects.create(
+            loan=self.loan,
+            action=LoanActionEnum.PAYMENT,
+            metadata={"amount": "10.00"},
+            timestamp=timestamp,
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command(
+            "archive_audit_logs",
+            "--retention-months=12",
+            f"--output-dir={self.output_dir}",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def manifest(self):
+        with open(os.path.join(self.output_dir, "manifest.json")) as manifest:
+            return json.load(manifest)
+
+    def test_archives_old_months_to_gzip_ndjson_with_manifest(self):
+        output = self.archive("--batch-size=2")
+
+        self.assertIn("2 mês(es) arquivado(s)", output)
+        self.assertEqual(list(LoanAuditLog.objects.all()), [self.recent])
+
+        archives = self.manifest()["archives"]
+        self.assertEqual(
+            [(item["month"], item["rows"]) for item in archives],
+            [(f"{self.older_month:%Y-%m}", 2), (f"{self.old_month:%Y-%m}", 3)],
+        )
+        for item in archives:
+            path = os.path.join(self.output_dir, item["file"])
+            with open(path, "rb") as archived:
+                self.assertEqual(
+                    hashlib.sha256(archived.read()).hexdigest(), item["sha256"]
+                )
+            with gzip.open(path, "rt", encoding="utf-8") as archived:
+                records = [json.loads(line) for line in archived]
+            self.assertEqual(len(records), item["rows"])
+            self.assertEqual(records[0]["timestamp"], item["first_timestamp"])
+            self.assertEqual(records[0]["loan_id"], str(self.loan.pk))
+            self.assertEqual(records[0]["metadata"], {"amount": "10.00"})
+
+    def test_late_rows_of_archived_month_go_to_a_new_file(self):
+        self.archive()
+        self.log(self.old_month.replace(day=20))
+
+        self.archive()
+
+        files = [
+            item["file"]
+            for item in self.manifest()["archives"]
+            if item["month"] == f"{self.old_month:%Y-%m}"
+        ]
+        self.assertEqual(
+            files,
+            [
+                f"loan-audit-logs-{self.old_month:%Y-%m}.ndjson.gz",
+                f"loan-audit-logs-{self.old_month:%Y-%m}.2.ndjson.gz",
+            ],
+        )
+        self.assertEqual(LoanAuditLog.objects.count(), 1)
+
+    def test_dry_run_keeps_rows(self):
+        output = self.archive("--dry-run")
+
+        self.assertIn(f"{self.older_month:%Y-%m}", output)
+        self.assertEqual(LoanAuditLog.objects.count(), 6)
+        self.assertFalse(os.listdir(self.output_dir))
+
+    def test_nothing_to_archive_within_retention(self):
+        output = self.archive("--retention-months=24")
+
+        self.assertIn("Nenhum mês a arquivar", output)
+        self.assertEqual(LoanAuditLog.objects.count(), 6)
+
+
+@skipUnless(connection.vendor == "postgresql", "particionamento nativo do PostgreSQL")
+class EnsurePartitionsTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="partition@test.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Partição",
+            client="Cliente Partição",
+        )
+
+    def count(self, table, log):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{table}" WHERE id = %s', [log.id])
+            return cursor.fetchone()[0]
+
+    def test_rows_in_default_partition_move_to_the_new_partition(self):
+        month = add_months(month_start(now()), 36)
+        log = LoanAuditLog.objects.create(
+            loan=self.loan,
+            action=LoanActionEnum.PAYMENT,
+            timestamp=month.replace(day=5),
+        )
+        self.assertEqual(self.count(DEFAULT_PARTITION, log), 1)
+
+        created = ensure_partitions(months_ahead=1, start=month)
+
+        self.assertEqual(
+            created, [partition_name(month), partition_name(add_months(month, 1))]
+        )
+        self.assertEqual(self.count(DEFAULT_PARTITION, log), 0)
+        self.assertEqual(self.count(partition_name(month), log), 1)
+        self.assertTrue(LoanAuditLog.objects.filter(pk=log.pk).exists())
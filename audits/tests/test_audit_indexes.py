@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from accounts.models import User
+from audits.enums import LoanActionEnum
+from audits.services import log_loan_action
+from core.testing import QueryPlanMixin
+from loans.models import Loan
+
+
+class LoanAuditLogIndexTest(QueryPlanMixin, TestCase):
+    def test_logs_of_a_loan_by_timestamp_use_composite_index(self):
+        user = User.objects.create_user(
+            email="index@example.com", password="12345678", document="12345678900"
+        )
+        loan = Loan.objects.create(
+            user=user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Índice",
+            client="Cliente Índice",
+        )
+        log_loan_action(loan=loan, action=LoanActionEnum.CREATED, user=user)
+
+        sql = self.capture_select(
+            "audits_loanauditlog",
+            lambda: list(loan.logs.order_by("-timestamp")),
+        )
+
+        self.assertUsesIndex(sql, "auditlog_loan_timestamp_idx")
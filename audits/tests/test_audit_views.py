@@ -0,0 +1,291 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from audits.admin import LoanLogAdmin
+from audits.enums import LoanActionEnum
+from audits.models import LoanAuditLog
+from audits.services import build_loan_action, bulk_log_loan_actions
+from core.testing import QueryPlanMixin
+from loans.models import Loan
+
+
+class LoanAuditLogViewSetTest(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="logs@test.com", password="12345678", document="12345678900"
+        )
+        self.other_user = User.objects.create_user(
+            email="other@test.com", password="12345678", document="98765432100"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Log",
+            client="Cliente Log",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_log_loan_actions(
+                [
+                    build_loan_action(
+                        loan=self.loan,
+                        action=LoanActionEnum.PAYMENT,
+                        user=self.user,
+                        metadata={"amount": str(number)},
+                    )
+                    for number in range(7)
+                ]
+            )
+        LoanAuditLog.objects.filter(loan=self.loan).update(timestamp=now())
+        self.url = reverse("loan-logs-list", kwargs={"loan_pk": self.loan.pk})
+
+    def test_lists_logs_of_loan_by_timestamp_and_id(self):
+        expected = [
+            str(pk)
+            for pk in self.loan.logs.order_by("-timestamp", "-pk").values_list(
+                "pk", flat=True
+            )
+        ]
+
+        ids = []
+        response = self.client.get(self.url, {"page_size": 3})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(ids, expected)
+
+    def test_logs_of_another_users_loan_are_not_found(self):
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(
+            reverse("loan-logs-list", kwargs={"loan_pk": "invalido"})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_next_page_query_uses_composite_index(self):
+        first = self.client.get(self.url, {"page_size": 3})
+
+        sql = self.capture_select(
+            "audits_loanauditlog",
+            lambda: self.client.get(first.data["next"]),
+            contains='"audits_loanauditlog"."timestamp" <',
+        )
+
+        self.assertUsesIndex(sql, "auditlog_loan_timestamp_idx")
+
+    def test_filters_by_action_and_time_range(self):
+        closed = LoanAuditLog.objects.create(
+            loan=self.loan,
+            action=LoanActionEnum.CLOSED,
+            timestamp=now() - timedelta(days=2),
+        )
+        LoanAuditLog.objects.create(
+            loan=self.loan,
+            action=LoanActionEnum.CREATED,
+            timestamp=now() - timedelta(days=5),
+        )
+
+        response = self.client.get(self.url, {"action": LoanActionEnum.CLOSED})
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(closed.pk)]
+        )
+
+        response = self.client.get(
+            self.url,
+            {
+                "since": (now() - timedelta(days=3)).isoformat(),
+                "until": (now() - timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(closed.pk)]
+        )
+
+    def test_export_streams_ndjson_of_the_loan(self):
+        response = self.client.get(reverse("loan-logs-export", args=[self.loan.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(records), 7)
+        self.assertEqual({record["loan_id"] for record in records}, {str(self.loan.pk)})
+
+
+class AuditLogViewSetTest(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email="staff@test.com",
+            password="12345678",
+            document="11122233344",
+            is_staff=True,
+        )
+        self.user = User.objects.create_user(
+            email="owner@test.com", password="12345678", document="55566677788"
+        )
+        self.loans = [
+            Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                ip_address="127.0.0.1",
+                bank="Banco Log",
+                client=f"Cliente {number}",
+            )
+            for number in range(2)
+        ]
+        base = now() - timedelta(hours=10)
+        for number in range(6):
+            LoanAuditLog.objects.create(
+                loan=self.loans[number % 2],
+                action=LoanActionEnum.PAYMENT if number else LoanActionEnum.CREATED,
+                performed_by=self.user if number % 3 else self.staff,
+                timestamp=base + timedelta(hours=number),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def ids(self, response):
+        return [item["id"] for item in response.data["results"]]
+
+    def test_only_staff_can_list_all_logs(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("audit-logs-list"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(reverse("audit-logs-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.ids(response),
+            [
+                str(pk)
+                for pk in LoanAuditLog.objects.order_by(
+                    "-timestamp", "-pk"
+                ).values_list("pk", flat=True)
+            ],
+        )
+
+    def test_filters_by_loan_and_performer(self):
+        response = self.client.get(
+            reverse("audit-logs-list"),
+            {"loan": self.loans[0].pk, "performed_by": self.user.pk},
+        )
+
+        expected = LoanAuditLog.objects.filter(
+            loan=self.loans[0], performed_by=self.user
+        )
+        self.assertEqual(set(self.ids(response)), {str(log.pk) for log in expected})
+
+    def test_export_streams_filtered_logs_oldest_first(self):
+        response = self.client.get(
+            reverse("audit-logs-export"), {"action": LoanActionEnum.PAYMENT}
+        )
+
+        records = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(
+            [record["timestamp"] for record in records],
+            sorted(record["timestamp"] for record in records),
+        )
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("audit-logs-export"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def assertListUsesIndex(self, params, index_name):
+        sql = self.capture_select(
+            "audits_loanauditlog",
+            lambda: self.client.get(reverse("audit-logs-list"), params),
+        )
+        self.assertUsesIndex(sql, index_name)
+
+    def test_filtered_listings_use_composite_indexes(self):
+        self.assertListUsesIndex({}, "auditlog_timestamp_idx")
+        self.assertListUsesIndex(
+            {"action": LoanActionEnum.PAYMENT}, "auditlog_action_ts_idx"
+        )
+        self.assertListUsesIndex(
+            {"performed_by": self.user.pk}, "auditlog_performer_ts_idx"
+        )
+        self.assertListUsesIndex(
+            {"loan": self.loans[0].pk}, "auditlog_loan_timestamp_idx"
+        )
+
+
+class LoanLogAdminSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="search@test.com", password="12345678", document="12345678900"
+        )
+        self.loans = [
+            Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                ip_address="127.0.0.1",
+                bank="Banco Busca",
+                client=f"Cliente {index}",
+            )
+            for index in range(2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_log_loan_actions(
+                [
+                    build_loan_action(
+                        loan=self.loans[0],
+                        action=LoanActionEnum.CREATED,
+                        user=self.user,
+                    ),
+                    build_loan_action(
+                        loan=self.loans[1], action=LoanActionEnum.CREATED
+                    ),
+                ]
+            )
+        self.admin = LoanLogAdmin(LoanAuditLog, site)
+        self.request = RequestFactory().get("/admin/audits/loanauditlog/")
+
+    def search(self, term):
+        queryset, may_have_duplicates = self.admin.get_search_results(
+            self.request, LoanAuditLog.objects.all(), term
+        )
+        self.assertFalse(may_have_duplicates)
+        return queryset
+
+    def test_search_by_loan_id_filters_the_column(self):
+        queryset = self.search(f" {self.loans[1].id} ")
+
+        self.assertIn('"loan_id" =', str(queryset.query))
+        self.assertNotIn("LIKE", str(queryset.query))
+        self.assertEqual(queryset.get().loan_id, self.loans[1].id)
+
+    def test_search_by_email_filters_by_user_id(self):
+        queryset = self.search("search@test.com")
+
+        self.assertIn('"performed_by_id" =', str(queryset.query))
+        self.assertNotIn("UPPER", str(queryset.query))
+        self.assertEqual(queryset.get().loan_id, self.loans[0].id)
+
+    def test_unknown_email_matches_nothing(self):
+        self.assertFalse(self.search("ninguem@test.com").exists())
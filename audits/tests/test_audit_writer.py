@@ -0,0 +1,175 @@
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from audits.enums import LoanActionEnum
+from audits.models import LoanAuditLog
+from audits.services import AuditLogWriter, build_loan_action, get_audit_writer
+from loans.models import Loan
+
+
+def create_loan(email="writer@test.com"):
+    user = User.objects.create_user(
+        email=email, password="12345678", document="12345678900"
+    )
+    return Loan.objects.create(
+        user=user,
+        principal_amount=Decimal("1000.00"),
+        ip_address="127.0.0.1",
+        bank="Banco Auditoria",
+        client="Cliente Auditoria",
+    )
+
+
+class AuditLogWriterTest(TestCase):
+    def setUp(self):
+        self.loan = create_loan()
+        handle, self.spill_file = tempfile.mkstemp(suffix=".ndjson")
+        os.close(handle)
+        os.remove(self.spill_file)
+        self.addCleanup(
+            lambda: os.path.exists(self.spill_file) and os.remove(self.spill_file)
+        )
+        self.writer = AuditLogWriter(spill_file=self.spill_file)
+
+    def log(self, action=LoanActionEnum.PAYMENT):
+        return build_loan_action(loan=self.loan, action=action)
+
+    def test_logs_are_written_with_one_insert_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                self.writer.add([self.log()])
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(LoanAuditLog.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            callbacks[0]()
+
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(LoanAuditLog.objects.count(), 3)
+
+    def test_rolled_back_savepoint_discards_its_logs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add([self.log(LoanActionEnum.CREATED)])
+            try:
+                with transaction.atomic():
+                    self.writer.add([self.log(LoanActionEnum.PAYMENT)])
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            self.writer.add([self.log(LoanActionEnum.CLOSED)])
+
+        self.assertEqual(
+            set(LoanAuditLog.objects.values_list("action", flat=True)),
+            {LoanActionEnum.CREATED, LoanActionEnum.CLOSED},
+        )
+
+    def test_flushed_buffer_is_not_reused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add([self.log()])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add([self.log()])
+
+        self.assertEqual(LoanAuditLog.objects.count(), 2)
+
+    def test_failed_write_spills_to_disk_and_replays_once(self):
+        log = self.log()
+        with (
+            mock.patch.object(
+                LoanAuditLog.objects, "bulk_create", side_effect=DatabaseError
+            ),
+            self.assertLogs("audits.services.audit_writer", level="ERROR"),
+        ):
+            self.writer.write([log])
+
+        self.assertFalse(LoanAuditLog.objects.exists())
+        with open(self.spill_file, encoding="utf-8") as spill:
+            self.assertEqual(len(spill.readlines()), 1)
+
+        self.assertEqual(self.writer.replay_spill(), 1)
+        self.assertEqual(self.writer.replay_spill(), 0)
+        replayed = LoanAuditLog.objects.get()
+        self.assertEqual(replayed.pk, log.pk)
+        self.assertEqual(replayed.timestamp, log.timestamp)
+        self.assertFalse(os.path.exists(self.spill_file))
+
+    def test_unexpected_write_error_spills_instead_of_raising(self):
+        with (
+            mock.patch.object(
+                LoanAuditLog.objects, "bulk_create", side_effect=ValueError("falha")
+            ),
+            self.assertLogs("audits.services.audit_writer", level="ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.writer.add([self.log()])
+
+        with open(self.spill_file, encoding="utf-8") as spill:
+            self.assertEqual(len(spill.readlines()), 1)
+
+    def test_spill_failure_is_logged_not_raised(self):
+        with (
+            mock.patch.object(
+                LoanAuditLog.objects, "bulk_create", side_effect=DatabaseError
+            ),
+            mock.patch.object(self.writer, "spill", side_effect=OSError("disco")),
+            self.assertLogs("audits.services.audit_writer", level="ERROR") as logs,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.writer.add([self.log()])
+
+        self.assertIn("descartado", logs.output[-1])
+        self.assertFalse(LoanAuditLog.objects.exists())
+
+    def test_full_queue_writes_in_caller(self):
+        writer = AuditLogWriter(background=True, queue_size=1)
+        queued, overflow = self.log(), self.log()
+
+        with (
+            mock.patch.object(writer, "_start_worker"),
+            self.assertLogs("audits.services.audit_writer", level="WARNING"),
+        ):
+            writer.write([queued])
+            writer.write([overflow])
+
+        self.assertEqual(
+            list(LoanAuditLog.objects.values_list("pk", flat=True)), [overflow.pk]
+        )
+
+    def test_replay_command_uses_configured_spill_file(self):
+        self.writer.spill([self.log()])
+        get_audit_writer.cache_clear()
+        self.addCleanup(get_audit_writer.cache_clear)
+
+        out = StringIO()
+        with override_settings(AUDIT_LOG_SPILL_FILE=self.spill_file):
+            call_command("replay_audit_spill", stdout=out)
+
+        self.assertIn("1 log(s)", out.getvalue())
+        self.assertEqual(LoanAuditLog.objects.count(), 1)
+
+
+class BackgroundAuditLogWriterTest(TransactionTestCase):
+    def test_background_thread_writes_committed_logs(self):
+        loan = create_loan()
+        writer = AuditLogWriter(background=True)
+
+        with transaction.atomic():
+            writer.add(
+                [
+                    build_loan_action(loan=loan, action=LoanActionEnum.PAYMENT)
+                    for _ in range(5)
+                ]
+            )
+        writer.drain()
+
+        self.assertEqual(LoanAuditLog.objects.filter(loan=loan).count(), 5)
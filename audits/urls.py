@@ -0,0 +1,11 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import AuditLogViewSet, LoanAuditLogViewSet
+
+router = DefaultRouter()
+router.register(
+    r"loans/(?P<loan_pk>[^/.]+)/logs", LoanAuditLogViewSet, basename="loan-logs"
+)
+router.register(r"audit-logs", AuditLogViewSet, basename="audit-logs")
+
+urlpatterns = router.urls
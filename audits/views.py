@@ -0,0 +1,76 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import OpenApiTypes, extend_schema
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+
+from loans.models import Loan
+
+from .filters import AuditLogFilter, LoanAuditLogFilter
+from .models import LoanAuditLog
+from .serializers import LoanAuditLogSerializer
+from .services import iter_ndjson
+
+
+class AuditLogExportMixin:
+    """Exportação NDJSON dos logs filtrados, em streaming."""
+
+    @extend_schema(responses={(200, "application/x-ndjson"): OpenApiTypes.STR})
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        """
+        Todos os logs que atendem aos filtros, do mais antigo ao mais recente,
+        um JSON por linha. A resposta é gerada à medida que o banco é lido,
+        sem paginação e com memória constante.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by("timestamp", "id")
+        response = StreamingHttpResponse(
+            iter_ndjson(queryset), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="audit-logs.ndjson"'
+        return response
+
+
+class LoanAuditLogViewSet(
+    AuditLogExportMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """
+    Histórico de auditoria de um empréstimo do usuário autenticado, do mais
+    recente ao mais antigo, paginado por (`timestamp`, `id`).
+    """
+
+    serializer_class = LoanAuditLogSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = LoanAuditLogFilter
+    ordering = ["-timestamp"]
+
+    def get_queryset(self):
+        try:
+            loan = get_object_or_404(
+                Loan.objects.only("pk"),
+                pk=self.kwargs["loan_pk"],
+                user=self.request.user,
+            )
+        except ValidationError:
+            raise Http404 from None
+        return LoanAuditLog.objects.filter(loan=loan)
+
+
+class AuditLogViewSet(
+    AuditLogExportMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """
+    Logs de auditoria de todos os empréstimos, restritos à equipe, do mais
+    recente ao mais antigo, paginados por (`timestamp`, `id`).
+    """
+
+    queryset = LoanAuditLog.objects.all()
+    serializer_class = LoanAuditLogSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuditLogFilter
+    ordering = ["-timestamp"]
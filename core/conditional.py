@@ -0,0 +1,60 @@
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts) -> str:
+    """ETag forte a partir das partes informadas."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag) -> bool:
+    """Compara o ETag com `If-None-Match` (comparação fraca, RFC 9110)."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+
+    candidates = parse_etags(header)
+    if "*" in candidates:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in candidates}
+
+
+class ConditionalGetMixin:
+    """
+    Responde 304 em list/retrieve quando `If-None-Match` confere com o ETag,
+    sem executar a consulta principal nem serializar.
+
+    As views implementam `get_list_etag` e `get_retrieve_etag`; retornar
+    `None` desativa a validação para a requisição.
+    """
+
+    def get_list_etag(self, request):
+        return None
+
+    def get_retrieve_etag(self, request):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, self.get_list_etag, super().list, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            request, self.get_retrieve_etag, super().retrieve, **kwargs
+        )
+
+    def _conditional(self, request, get_etag, handler, **kwargs):
+        etag = get_etag(request)
+        if etag is None:
+            return handler(request, **kwargs)
+
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        response = handler(request, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
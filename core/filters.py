@@ -0,0 +1,21 @@
+from rest_framework.filters import OrderingFilter
+
+
+class AliasedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter que aceita nomes públicos mapeados para anotações do
+    queryset através de `ordering_aliases` na view.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        aliases = getattr(view, "ordering_aliases", {})
+        translated = []
+        for term in ordering:
+            descending = term.startswith("-")
+            field = aliases.get(term.lstrip("-"), term.lstrip("-"))
+            translated.append(f"-{field}" if descending else field)
+        return translated
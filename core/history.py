@@ -0,0 +1,381 @@
+"""
+Histórico (`django-simple-history`) com gravação adiada para o commit.
+
+`BufferedHistoricalRecords` substitui `HistoricalRecords` nos modelos. Por
+padrão grava como o original: um INSERT por `save()`, dentro da transação.
+Em `deferred_history()` (ou com `HISTORY_DEFERRED_WRITES`), os registros
+históricos criados dentro de um bloco atômico são montados na hora, com a
+data e o usuário do momento da alteração, e gravados com um `bulk_create`
+por modelo no commit: a transação deixa de esperar por esses INSERTs e um
+rollback os descarta.
+
+Com `diff_only=True`, alterações (`~`) gravam apenas os campos que mudaram,
+em `history_diff` (JSON), com as demais colunas nulas; criação e exclusão
+continuam gravando o estado completo. Saves sem mudança em campos
+rastreados não geram registro, o que, com `excluded_fields`, evita
+históricos de colunas voláteis (ex.: `last_login`). `record.instance`,
+`history.as_of()` e `diff_against()` reconstroem o estado aplicando as
+diferenças sobre o último registro completo (ver `rebuild_state`); as
+colunas de um registro de diferença, lidas diretamente, são nulas.
+
+Inserções em lote devem usar `bulk_create_with_history` de
+`simple_history.utils` (estado completo). Atualizações em lote usam
+`bulk_update` e `bulk_history_changes` para os objetos cujo histórico
+importa: este grava diferenças, como um `save()`, em vez do estado completo
+gravado por `bulk_update_with_history`.
+"""
+
+import copy
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, models, router
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.models import HistoricalChanges, HistoricalRecords
+from simple_history.signals import (post_create_historical_record,
+                                    pre_create_historical_record)
+
+from core.transactions import CommitBuffer
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred_history(enabled=True):
+    """Adia (ou, com `enabled=False`, força) a gravação imediata do histórico."""
+    previous = getattr(_state, "deferred", None)
+    _state.deferred = enabled
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+def history_deferred() -> bool:
+    deferred = getattr(_state, "deferred", None)
+    if deferred is None:
+        return settings.HISTORY_DEFERRED_WRITES
+    return deferred
+
+
+def _encode(value):
+    """Valor de campo em tipo nativo do JSON; `rebuild_state` o converte de volta."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def rebuild_state(record) -> dict:
+    """
+    Estado (`attname` -> valor) dos campos rastreados no momento de `record`.
+
+    Registros completos são lidos diretamente. Para uma diferença, busca o
+    último registro completo do objeto até `record` e aplica, em ordem, as
+    diferenças seguintes.
+    """
+    model = record.instance_type
+    tracked = [field.attname for field in type(record).tracked_fields]
+    if record.history_diff is None:
+        return {attname: getattr(record, attname) for attname in tracked}
+
+    pk_attname = model._meta.pk.attname
+    records = (
+        type(record)
+        ._default_manager.filter(**{pk_attname: getattr(record, pk_attname)})
+        .filter(
+            Q(history_date__lt=record.history_date)
+            | Q(history_date=record.history_date, history_id__lte=record.history_id)
+        )
+        .order_by("-history_date", "-history_id")
+    )
+
+    state, diffs = {}, []
+    for previous in records.iterator():
+        if previous.history_diff is None:
+            state = {attname: getattr(previous, attname) for attname in tracked}
+            break
+        diffs.append(previous.history_diff)
+
+    for diff in reversed(diffs):
+        for attname, value in diff.items():
+            state[attname] = model._meta.get_field(attname).to_python(value)
+    return state
+
+
+def _with_rebuilt_state(record):
+    """Cópia de `record` com as colunas preenchidas por `rebuild_state`."""
+    if record.history_diff is None:
+        return record
+    rebuilt = copy.copy(record)
+    for attname, value in rebuild_state(record).items():
+        setattr(rebuilt, attname, value)
+    return rebuilt
+
+
+def _by_model(entries):
+    by_model = {}
+    for entry in entries:
+        by_model.setdefault(type(entry["history_instance"]), []).append(entry)
+    return by_model
+
+
+def _flush(entries):
+    """Grava os registros acumulados com um `bulk_create` por modelo."""
+    for model, model_entries in _by_model(entries).items():
+        model.objects.using(model_entries[0]["using"]).bulk_create(
+            [entry["history_instance"] for entry in model_entries],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        for entry in model_entries:
+            post_create_historical_record.send(
+                sender=model,
+                instance=entry["instance"],
+                history_instance=entry["history_instance"],
+                history_date=entry["history_instance"].history_date,
+                history_user=entry["history_instance"].history_user,
+                history_change_reason=entry["history_instance"].history_change_reason,
+                using=entry["using"],
+            )
+
+
+def _flush_committed(entries):
+    """
+    Grava os registros adiados, já após o commit. A alteração que eles
+    descrevem está confirmada, então uma falha é apenas registrada em log,
+    modelo a modelo, e não chega a quem fez a alteração (ex.: um pagamento
+    gravado não pode responder com erro).
+    """
+    for model, model_entries in _by_model(entries).items():
+        try:
+            _flush(model_entries)
+        except Exception:
+            logger.exception(
+                "Falha ao gravar %d registro(s) de %s após o commit: %s",
+                len(model_entries),
+                model._meta.label,
+                [entry["instance"].pk for entry in model_entries],
+            )
+
+
+_buffer = CommitBuffer(_flush_committed)
+
+
+def bulk_history_changes(instances, default_user=None):
+    """
+    Registra alterações (`~`) de instâncias gravadas por `bulk_update`, que
+    não dispara `post_save`. Os registros são montados como em um `save()`
+    (em `diff_only`, apenas os campos alterados desde o carregamento;
+    instâncias sem mudança em campos rastreados são ignoradas) e gravados
+    com um `bulk_create` por modelo, adiado para o commit em
+    `deferred_history()`.
+    """
+    entries = []
+    for instance in instances:
+        records = instance._meta.buffered_history
+        if default_user is not None and not hasattr(instance, "_history_user"):
+            instance._history_user = default_user
+        history_instance = records.build_historical_record(instance, "~")
+        if history_instance is not None:
+            entries.append(
+                {
+                    "instance": instance,
+                    "history_instance": history_instance,
+                    "using": router.db_for_write(type(history_instance)),
+                }
+            )
+
+    if not entries:
+        return
+    alias = entries[0]["using"]
+    if history_deferred() and connections[alias].in_atomic_block:
+        _buffer.add(entries, using=alias)
+    else:
+        _flush(entries)
+
+
+class BufferedHistoricalRecords(HistoricalRecords):
+    def __init__(self, *args, diff_only=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.diff_only = diff_only
+
+    def finalize(self, sender, **kwargs):
+        super().finalize(sender, **kwargs)
+        if sender is not self.cls:
+            return
+        # Usado por `bulk_history_changes`
+        sender._meta.buffered_history = self
+        if self.diff_only:
+            models.signals.post_init.connect(self.post_init, sender=sender, weak=False)
+
+    def copy_fields(self, model):
+        """
+        Em `diff_only`, só a chave primária é obrigatória no histórico e as
+        colunas não têm default, para ficarem nulas nos registros de diferença.
+        """
+        fields = super().copy_fields(model)
+        if self.diff_only:
+            for name, field in fields.items():
+                if name != model._meta.pk.name:
+                    field.null = True
+                    field.blank = True
+                    field.default = models.NOT_PROVIDED
+        return fields
+
+    def get_extra_fields(self, model, fields):
+        extra_fields = super().get_extra_fields(model, fields)
+        if not self.diff_only:
+            return extra_fields
+
+        get_full_instance = extra_fields["instance"].fget
+
+        def get_instance(record):
+            instance = get_full_instance(record)
+            if record.history_diff is not None:
+                for attname, value in rebuild_state(record).items():
+                    setattr(instance, attname, value)
+            return instance
+
+        def get_field_changes_for_diff(record, old_history, fields, *args):
+            """`diff_against` compara os estados reconstruídos dos registros."""
+            return HistoricalChanges._get_field_changes_for_diff(
+                _with_rebuilt_state(record),
+                _with_rebuilt_state(old_history),
+                fields,
+                *args,
+            )
+
+        extra_fields["history_diff"] = models.JSONField(null=True, editable=False)
+        extra_fields["instance"] = property(get_instance)
+        extra_fields["_get_field_changes_for_diff"] = get_field_changes_for_diff
+        return extra_fields
+
+    def post_init(self, instance, **kwargs):
+        instance._history_state = self._loaded_values(instance)
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        instance._history_update_fields = kwargs.get("update_fields")
+        super().post_save(instance, created, using=using, **kwargs)
+
+    def _loaded_values(self, instance):
+        """Valores dos campos rastreados carregados na instância (sem consultas)."""
+        return {
+            field.attname: instance.__dict__[field.attname]
+            for field in self.fields_included(instance)
+            if field.attname in instance.__dict__
+        }
+
+    def _changes(self, instance):
+        """
+        Campos rastreados cujo valor difere do último carregado ou gravado na
+        instância, limitados a `update_fields` quando o save os informou.
+        """
+        state = getattr(instance, "_history_state", {})
+        update_fields = getattr(instance, "_history_update_fields", None)
+        changes = {}
+        for attname, value in self._loaded_values(instance).items():
+            field = instance._meta.get_field(attname)
+            if field.primary_key:
+                continue
+            if update_fields is not None and not {field.name, attname} & set(
+                update_fields
+            ):
+                continue
+            if attname in state and state[attname] == value:
+                continue
+            changes[attname] = value
+        return changes
+
+    def create_historical_record(self, instance, history_type, using=None):
+        manager = getattr(instance, self.manager_name)
+        alias = (
+            using
+            if self.use_base_model_db and using
+            else router.db_for_write(manager.model)
+        )
+        deferred = history_deferred() and connections[alias].in_atomic_block
+        if self.m2m_fields or not (deferred or self.diff_only):
+            return super().create_historical_record(instance, history_type, using)
+
+        history_instance = self.build_historical_record(instance, history_type)
+        if history_instance is None:
+            return
+
+        entry = {
+            "instance": instance,
+            "history_instance": history_instance,
+            "using": alias,
+        }
+        if deferred:
+            _buffer.add([entry], using=alias)
+        else:
+            _flush([entry])
+
+    def build_historical_record(self, instance, history_type):
+        """
+        Monta o registro histórico sem salvá-lo, como
+        `HistoricalRecords.create_historical_record`, e envia
+        `pre_create_historical_record`. Em `diff_only`, retorna `None` para
+        uma alteração sem mudança em campos rastreados.
+        """
+        history_date = getattr(instance, "_history_date", timezone.now())
+        manager = getattr(instance, self.manager_name)
+
+        if self.diff_only and history_type == "~":
+            changes = self._changes(instance)
+            if not changes:
+                return None
+            pk_attname = instance._meta.pk.attname
+            attrs = {
+                pk_attname: getattr(instance, pk_attname),
+                "history_diff": {
+                    attname: _encode(value) for attname, value in changes.items()
+                },
+            }
+            instance._history_state = {
+                **getattr(instance, "_history_state", {}),
+                **changes,
+            }
+        else:
+            attrs = {
+                field.attname: getattr(instance, field.attname)
+                for field in self.fields_included(instance)
+            }
+            if self.diff_only:
+                instance._history_state = dict(attrs)
+
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, None
+        )
+        if getattr(manager.model, "history_relation", None) is not None:
+            attrs["history_relation"] = instance
+
+        history_instance = manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+        pre_create_historical_record.send(
+            sender=manager.model,
+            instance=instance,
+            history_date=history_date,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            history_instance=history_instance,
+            using=None,
+        )
+        return history_instance
@@ -1,6 +1,141 @@
-from rest_framework.pagination import CursorPagination
+import json
+from datetime import date, datetime
 
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       LimitOffsetPagination)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginação por chave composta (keyset).
+
+    A ordenação (da view, do filtro de ordenação ou `ordering`) recebe a
+    chave primária como desempate, tornando a posição única mesmo quando
+    vários registros têm o mesmo `created_at` (ex.: inserções em lote). O
+    cursor guarda os valores de todas as colunas da ordenação do último item
+    e a próxima página é lida com a comparação lexicográfica
+    `(a, b, pk) < (a0, b0, pk0)`, usando o índice correspondente, sem
+    deslocamentos (OFFSET).
+
+    O cliente escolhe o tamanho da página com `?page_size=`, limitado a
+    `max_page_size`. As colunas da ordenação não podem ser nulas.
+    """
 
-class CreatedAtCursorPagination(CursorPagination):
     page_size = 10
-    ordering = "-created_at"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at",)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Ordenação do filtro de ordenação da view, se houver; senão, o
+        `ordering` da view ou o padrão da paginação. Acrescenta a chave
+        primária como desempate, no sentido da última coluna.
+        """
+        filters = getattr(view, "filter_backends", [])
+        if any(hasattr(backend, "get_ordering") for backend in filters):
+            ordering = super().get_ordering(request, queryset, view)
+        else:
+            ordering = getattr(view, "ordering", None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        if ordering[-1].lstrip("-") in ("pk", "id"):
+            return ordering
+        descending = ordering[-1].startswith("-")
+        return (*ordering, "-pk" if descending else "pk")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        ordering = self._flip(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor and self.cursor.position is not None:
+            values = self._decode_position(self.cursor.position)
+            queryset = queryset.filter(self._after(ordering, values))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+
+        # Quem chegou por um cursor tem páginas na direção de onde veio
+        came_from_cursor = self.cursor is not None and bool(self.page)
+        self.has_next = came_from_cursor if reverse else has_more
+        self.has_previous = has_more if reverse else came_from_cursor
+
+        self.next_position = self._position(self.page[-1]) if self.page else None
+        self.previous_position = self._position(self.page[0]) if self.page else None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position)
+        )
+
+    def _flip(self, ordering):
+        return tuple(
+            term[1:] if term.startswith("-") else f"-{term}" for term in ordering
+        )
+
+    def _after(self, ordering, values):
+        """
+        Condição lexicográfica "depois de `values`" na ordem `ordering`:
+        `a > a0 OR (a = a0 AND b > b0) OR ...` (ou `<` nas descendentes).
+        """
+        condition = Q()
+        equal = {}
+        for term, value in zip(ordering, values, strict=True):
+            name = term.lstrip("-")
+            lookup = "lt" if term.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _position(self, instance):
+        values = []
+        for term in self.ordering:
+            value = getattr(instance, term.lstrip("-"))
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            values.append(str(value))
+        return json.dumps(values)
+
+    def _decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message) from None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+
+class ScheduleLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Paginação por `limit`/`offset` para sequências calculadas sob demanda
+    (ex.: tabelas de amortização), que só geram os itens da página.
+    """
+
+    default_limit = 60
+    max_limit = 120
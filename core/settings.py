@@ -101,7 +101,7 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "core.pagination.CreatedAtCursorPagination",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
@@ -117,6 +117,63 @@ REST_FRAMEWORK = {
     },
 }
 
+# O resumo financeiro de /api/accounts/me/ usa um cache compartilhado entre
+# os processos da API e os workers (`process_payments`,
+# `import_cnab_payments`), para que as invalidações alcancem todos eles.
+# Por padrão, uma tabela no banco (criada com `createcachetable`); para
+# Redis, use ACCOUNT_SUMMARY_CACHE_BACKEND=
+# django.core.cache.backends.redis.RedisCache e
+# ACCOUNT_SUMMARY_CACHE_LOCATION=redis://host:6379/0 (requer o pacote
+# `redis`). O cache `default` (throttling) continua local a cada processo
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "account_summary": {
+        "BACKEND": os.getenv(
+            "ACCOUNT_SUMMARY_CACHE_BACKEND",
+            "django.core.cache.backends.db.DatabaseCache",
+        ),
+        "LOCATION": os.getenv(
+            "ACCOUNT_SUMMARY_CACHE_LOCATION", "account_summary_cache"
+        ),
+    },
+}
+
+# Tempo de vida (segundos) do resumo financeiro em cache de /api/accounts/me/
+ACCOUNT_SUMMARY_CACHE_TTL = int(os.getenv("ACCOUNT_SUMMARY_CACHE_TTL", "300"))
+
+# Tempo de vida (horas) das respostas guardadas por `Idempotency-Key`
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Controle de concorrência entre pagamentos do mesmo empréstimo:
+# "pessimistic" (select_for_update) ou "optimistic" (coluna version)
+PAYMENT_CONCURRENCY_STRATEGY = os.getenv("PAYMENT_CONCURRENCY_STRATEGY", "pessimistic")
+PAYMENT_OPTIMISTIC_MAX_RETRIES = int(os.getenv("PAYMENT_OPTIMISTIC_MAX_RETRIES", "3"))
+
+# Logs de auditoria são gravados em lote após o commit; com
+# AUDIT_LOG_BACKGROUND=true, por uma thread com fila limitada. Lotes que o
+# banco recusar vão para AUDIT_LOG_SPILL_FILE (NDJSON), reprocessado pelo
+# comando `replay_audit_spill`
+AUDIT_LOG_BACKGROUND = os.getenv("AUDIT_LOG_BACKGROUND", "false").lower() == "true"
+AUDIT_LOG_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_SIZE", "1000"))
+AUDIT_LOG_SPILL_FILE = os.getenv(
+    "AUDIT_LOG_SPILL_FILE", str(BASE_DIR / "audit-log-spill.ndjson")
+)
+
+# Meses de logs de auditoria mantidos na tabela; os anteriores são
+# exportados para AUDIT_LOG_ARCHIVE_DIR pelo comando `archive_audit_logs`
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "12"))
+AUDIT_LOG_ARCHIVE_DIR = os.getenv(
+    "AUDIT_LOG_ARCHIVE_DIR", str(BASE_DIR / "archive" / "audit-logs")
+)
+
+# Com true, o histórico (simple_history) gerado dentro de transações é
+# gravado em lote no commit; o caso de uso de pagamentos já o faz sempre
+HISTORY_DEFERRED_WRITES = (
+    os.getenv("HISTORY_DEFERRED_WRITES", "false").lower() == "true"
+)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Matera API",
     "DESCRIPTION": "API para gerenciamento de empréstimos e pagamentos.",
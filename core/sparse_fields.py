@@ -0,0 +1,74 @@
+from rest_framework.exceptions import ValidationError
+
+
+def _split(value):
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_sparse_fields(query_params, available):
+    """
+    Interpreta os parâmetros `fields` e `omit` e retorna os campos
+    selecionados na ordem de `available`, ou `None` se nenhum foi informado.
+    Uma seleção vazia (`?fields=` sem valor, ou `omit` com todos os campos)
+    é recusada.
+    """
+    fields = _split(query_params.get("fields"))
+    omit = _split(query_params.get("omit")) or []
+
+    unknown = (set(fields or []) | set(omit)) - set(available)
+    if unknown:
+        raise ValidationError(
+            {"fields": f"Campos inválidos: {', '.join(sorted(unknown))}."}
+        )
+
+    if fields is None and not omit:
+        return None
+
+    selected = [
+        name
+        for name in available
+        if (fields is None or name in fields) and name not in omit
+    ]
+    if not selected:
+        raise ValidationError({"fields": "Selecione ao menos um campo."})
+    return selected
+
+
+class SparseFieldsMixin:
+    """
+    Habilita `?fields=` e `?omit=` nas leituras de uma viewset.
+
+    `sparse_field_sources` mapeia cada campo da resposta para as colunas do
+    modelo de que ele depende; os campos escolhidos vão para o contexto do
+    serializer e o queryset carrega apenas as colunas necessárias.
+    """
+
+    sparse_field_sources = {}
+    sparse_field_actions = ("list", "retrieve")
+
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = None
+            if self.action in self.sparse_field_actions:
+                self._sparse_fields = parse_sparse_fields(
+                    self.request.query_params, list(self.sparse_field_sources)
+                )
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_sparse_fields()
+        return context
+
+    def only_sparse_fields(self, queryset, *always):
+        """Restringe o queryset às colunas exigidas pelos campos pedidos."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        columns = {"pk", *always}
+        for name in fields:
+            columns.update(self.sparse_field_sources[name])
+        return queryset.only(*columns)
@@ -0,0 +1,45 @@
+"""Utilitários de teste compartilhados entre os apps."""
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+def query_plan(sql: str) -> str:
+    """
+    Plano de execução de `sql` (`EXPLAIN QUERY PLAN` no SQLite, `EXPLAIN` no
+    PostgreSQL). No PostgreSQL a varredura sequencial é desabilitada na
+    transação, para que as tabelas pequenas dos testes não levem o
+    planejador a ignorar os índices.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+class QueryPlanMixin:
+    """Asserções sobre o uso de índices pelas consultas de um endpoint."""
+
+    def capture_select(self, table, func, contains="ORDER BY"):
+        """Executa `func` e retorna o SQL do SELECT em `table` que contém `contains`."""
+        with CaptureQueriesContext(connection) as queries:
+            func()
+
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if (
+                sql.startswith("SELECT")
+                and f'FROM "{table}"' in sql
+                and contains in sql
+            ):
+                return sql
+        self.fail(f"Nenhuma consulta em {table} contendo {contains!r}.")
+
+    def assertUsesIndex(self, sql, index_name):
+        plan = query_plan(sql)
+        self.assertIn(index_name, plan, msg=plan)
+        return plan
@@ -0,0 +1,62 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class _Pending:
+    """Itens de um bloco atômico, entregues no seu commit."""
+
+    def __init__(self, flush, savepoint_ids):
+        self.savepoint_ids = savepoint_ids
+        self.items = []
+        self.flushed = False
+        self._flush = flush
+        self.callback = self.run
+
+    def run(self):
+        self.flushed = True
+        self._flush(self.items)
+
+
+class CommitBuffer:
+    """
+    Acumula itens por bloco atômico e os entrega a `flush`, em uma única
+    chamada, em `transaction.on_commit`.
+
+    Cada savepoint tem sua própria lista, descartada junto com o callback se
+    o savepoint for desfeito; um rollback da transação descarta tudo. Fora de
+    transação, `flush` é chamado imediatamente.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self._local = threading.local()
+
+    def add(self, items, using=DEFAULT_DB_ALIAS):
+        connection = connections[using]
+        if not connection.in_atomic_block:
+            self.flush(list(items))
+            return
+        self._pending(connection).items.extend(items)
+
+    def _pending(self, connection):
+        """
+        Lista do bloco atômico corrente. Só é reaproveitada se seu callback
+        ainda estiver pendente no mesmo nível de savepoint; após um commit, ou
+        um rollback que descartou o callback, outra é criada.
+        """
+        pending_by_alias = self._local.__dict__.setdefault("pending", {})
+        pending = pending_by_alias.get(connection.alias)
+        savepoint_ids = set(connection.savepoint_ids)
+        if (
+            pending is None
+            or pending.flushed
+            or pending.savepoint_ids != savepoint_ids
+            or not any(
+                func is pending.callback for _, func, _ in connection.run_on_commit
+            )
+        ):
+            pending = _Pending(self.flush, savepoint_ids)
+            transaction.on_commit(pending.callback, using=connection.alias)
+            pending_by_alias[connection.alias] = pending
+        return pending
@@ -25,6 +25,7 @@ from rest_framework_simplejwt.views import (TokenObtainPairView,
 api_urlpatterns = [
     path("", include("loans.urls")),
     path("", include("payments.urls")),
+    path("", include("audits.urls")),
     path("accounts/", include("accounts.urls")),
     path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
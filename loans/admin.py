@@ -1,7 +1,7 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
 
-from loans.models import Loan
+from loans.models import Loan, LoanBalanceSnapshot
 
 
 @admin.register(Loan)
@@ -14,6 +14,9 @@ class LoanAdmin(SimpleHistoryAdmin):
         "principal_amount",
         "monthly_interest_rate",
         "requested_date",
+        "total_paid_amount",
+        "payments_count",
+        "last_payment_at",
     )
     search_fields = ("client", "bank", "user__email")
     list_filter = ("bank", "requested_date")
@@ -22,4 +25,22 @@ class LoanAdmin(SimpleHistoryAdmin):
         "updated_at",
         "requested_date",
         "ip_address",
+        "total_paid_amount",
+        "payments_count",
+        "last_payment_at",
+        "version",
     )
+
+
+@admin.register(LoanBalanceSnapshot)
+class LoanBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = (
+        "loan",
+        "as_of_date",
+        "total_due",
+        "total_paid",
+        "outstanding_balance",
+    )
+    search_fields = ("loan__id",)
+    list_filter = ("as_of_date",)
+    raw_id_fields = ("loan",)
@@ -0,0 +1,125 @@
+"""
+Tabelas de amortização (Price e SAC).
+
+`amortization_schedule` devolve uma sequência preguiçosa: cada parcela é
+calculada por fórmula fechada a partir do saldo devedor teórico, sem gerar
+as anteriores, e memoizada. Como termos idênticos geram tabelas idênticas,
+as sequências também são memoizadas por (valor financiado, taxa, parcelas,
+sistema).
+"""
+
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from . import engine
+
+PRICE = "price"
+SAC = "sac"
+SYSTEMS = (PRICE, SAC)
+MAX_INSTALLMENTS = 360
+SCHEDULE_CACHE_SIZE = 256
+
+
+def _cents(value: Decimal) -> Decimal:
+    return value.quantize(engine.CENTS, rounding=ROUND_HALF_UP)
+
+
+def financed_amount(principal, insurance_rate, installments) -> Decimal:
+    """
+    Valor financiado: principal + seguro + IOF do prazo do contrato
+    (meses comerciais de 30 dias, IOF diário limitado a 365 dias).
+    """
+    return (
+        principal
+        + engine.insurance(principal, insurance_rate)
+        + engine.iof(principal, installments * 30)
+    )
+
+
+def due_date(start_date, number):
+    """Vencimento da parcela `number` (a cada 30 dias a partir do início)."""
+    return start_date + timedelta(days=30 * number)
+
+
+class AmortizationSchedule:
+    """
+    Sequência de parcelas de um financiamento. Suporta `len()` e indexação
+    por inteiro ou fatia, calculando somente as parcelas acessadas.
+    """
+
+    def __init__(self, principal, monthly_rate, installments, system):
+        if system not in SYSTEMS:
+            raise ValueError(f"Sistema de amortização inválido: {system}")
+        if not 1 <= installments <= MAX_INSTALLMENTS:
+            raise ValueError(f"Quantidade de parcelas inválida: {installments}")
+
+        self.principal = principal
+        self.monthly_rate = monthly_rate
+        self.installments = installments
+        self.system = system
+        self.installment_amount = self._price_installment() if system == PRICE else None
+        self._rows = {}
+
+    def __len__(self):
+        return self.installments
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(number) for number in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._row(index)
+
+    def _price_installment(self):
+        """PMT = P * i / (1 - (1 + i)^-n), ou P / n sem juros."""
+        if not self.monthly_rate:
+            return _cents(self.principal / self.installments)
+        factor = (1 + self.monthly_rate) ** self.installments
+        return _cents(self.principal * self.monthly_rate * factor / (factor - 1))
+
+    def _balance(self, paid):
+        """Saldo devedor após `paid` parcelas, arredondado em centavos."""
+        if paid >= self.installments:
+            return engine.ZERO
+        if self.system == SAC:
+            return _cents(self.principal - self.principal * paid / self.installments)
+        if not self.monthly_rate:
+            return _cents(self.principal - self.installment_amount * paid)
+
+        growth = (1 + self.monthly_rate) ** paid
+        return _cents(
+            self.principal * growth
+            - self.installment_amount * (growth - 1) / self.monthly_rate
+        )
+
+    def _row(self, index):
+        if index not in self._rows:
+            number = index + 1
+            opening = self._balance(index)
+            closing = self._balance(number)
+            amortization = opening - closing
+
+            if self.system == PRICE and number < self.installments:
+                payment = self.installment_amount
+                interest = payment - amortization
+            else:
+                interest = _cents(opening * self.monthly_rate)
+                payment = amortization + interest
+
+            self._rows[index] = {
+                "number": number,
+                "payment": payment,
+                "interest": interest,
+                "amortization": amortization,
+                "balance": closing,
+            }
+        return self._rows[index]
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def amortization_schedule(principal, monthly_rate, installments, system=PRICE):
+    """Tabela memoizada para os termos informados."""
+    return AmortizationSchedule(principal, monthly_rate, installments, system)
@@ -0,0 +1,162 @@
+"""
+Motor de cálculo financeiro dos empréstimos.
+
+As fórmulas escalares são a fonte única usada pelas propriedades de `Loan`.
+`calculate_portfolio` aplica as mesmas fórmulas em lote, coluna a coluna.
+
+A taxa diária e o fator de capitalização são memoizados em tabelas LRU do
+processo, chaveadas por taxa e por (taxa, dias): a carteira compartilha
+poucas taxas e um intervalo limitado de dias, então cada potência decimal
+é calculada praticamente uma única vez.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.utils.timezone import now
+
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+IOF_DAILY_RATE = Decimal("0.000082")
+IOF_FIXED_RATE = Decimal("0.0038")
+IOF_MAX_DAYS = 365
+
+DAILY_RATE_CACHE_SIZE = 256
+COMPOUND_FACTOR_CACHE_SIZE = 65536
+
+FINANCIAL_COLUMNS = (
+    "compounded_amount",
+    "iof",
+    "insurance",
+    "total_due",
+    "total_paid",
+    "outstanding_balance",
+)
+
+
+@lru_cache(maxsize=DAILY_RATE_CACHE_SIZE)
+def daily_rate(monthly_rate: Decimal) -> Decimal:
+    """Taxa diária equivalente à taxa mensal (mês comercial de 30 dias)."""
+    return (1 + monthly_rate) ** (Decimal("1") / 30) - 1
+
+
+@lru_cache(maxsize=COMPOUND_FACTOR_CACHE_SIZE)
+def compound_factor(monthly_rate: Decimal, days: int) -> Decimal:
+    """Fator de capitalização (1 + i)^n para a taxa diária equivalente."""
+    return (1 + daily_rate(monthly_rate)) ** days
+
+
+def cache_stats() -> dict:
+    """Contadores de acerto/falha das tabelas memoizadas."""
+    return {
+        name: {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+        for name, info in (
+            ("daily_rate", daily_rate.cache_info()),
+            ("compound_factor", compound_factor.cache_info()),
+        )
+    }
+
+
+def clear_caches():
+    """Esvazia as tabelas memoizadas e zera os contadores."""
+    daily_rate.cache_clear()
+    compound_factor.cache_clear()
+
+
+def compounded_amount(principal: Decimal, monthly_rate: Decimal, days: int):
+    """Valor com juros compostos pro rata dia: M = P * (1 + i)^n."""
+    if days <= 0:
+        return principal
+    return (principal * compound_factor(monthly_rate, days)).quantize(
+        CENTS, rounding=ROUND_HALF_UP
+    )
+
+
+def iof(principal: Decimal, days: int) -> Decimal:
+    """IOF fixo (0.38%) + IOF diário (0.0082% ao dia, até 365 dias)."""
+    dias = min(days, IOF_MAX_DAYS)
+    total_iof = principal * IOF_DAILY_RATE * dias + principal * IOF_FIXED_RATE
+    return total_iof.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def insurance(principal: Decimal, insurance_rate: Decimal) -> Decimal:
+    """Valor do seguro sobre o principal."""
+    return (principal * insurance_rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def total_due(compounded: Decimal, iof_amount: Decimal, insurance_amount: Decimal):
+    """Valor total atualizado: juros + IOF + seguro."""
+    return (compounded + iof_amount + insurance_amount).quantize(CENTS)
+
+
+def outstanding_balance(total_due_amount: Decimal, total_paid: Decimal) -> Decimal:
+    """Saldo devedor, nunca negativo."""
+    return max(total_due_amount - total_paid, ZERO)
+
+
+def calculate_portfolio(
+    principal, monthly_rate, insurance_rate, days, total_paid
+) -> dict:
+    """
+    Calcula todas as colunas derivadas para uma carteira de empréstimos.
+
+    Recebe sequências paralelas (mesmo tamanho) e retorna um dicionário com
+    uma lista por coluna de `FINANCIAL_COLUMNS`, na ordem da entrada. Os
+    valores são idênticos, centavo a centavo, aos das propriedades de `Loan`.
+    """
+    columns = {column: [] for column in FINANCIAL_COLUMNS}
+
+    for p, rate, ins_rate, n, paid in zip(
+        principal, monthly_rate, insurance_rate, days, total_paid, strict=True
+    ):
+        compounded = compounded_amount(p, rate, n)
+        iof_amount = iof(p, n)
+        insurance_amount = insurance(p, ins_rate)
+        due = total_due(compounded, iof_amount, insurance_amount)
+
+        columns["compounded_amount"].append(compounded)
+        columns["iof"].append(iof_amount)
+        columns["insurance"].append(insurance_amount)
+        columns["total_due"].append(due)
+        columns["total_paid"].append(paid)
+        columns["outstanding_balance"].append(outstanding_balance(due, paid))
+
+    return columns
+
+
+def calculate_queryset(
+    queryset, as_of=None, total_paid_field="total_paid_amount"
+) -> dict:
+    """
+    Lê as colunas necessárias de um queryset de `Loan` e calcula a carteira.
+
+    `as_of` é a data de referência (padrão: hoje) e `total_paid_field` o
+    campo ou anotação com o total pago. Retorna as colunas de
+    `calculate_portfolio` acrescidas de `id` e `days`.
+    """
+    as_of = as_of or now().date()
+    rows = queryset.values_list(
+        "id",
+        "principal_amount",
+        "monthly_interest_rate",
+        "insurance_rate",
+        "requested_date",
+        total_paid_field,
+    )
+
+    ids, principal, rates, insurance_rates, days, paid = [], [], [], [], [], []
+    for loan_id, p, rate, ins_rate, requested_date, total_paid in rows.iterator():
+        ids.append(loan_id)
+        principal.append(p)
+        rates.append(rate)
+        insurance_rates.append(ins_rate)
+        days.append((as_of - requested_date.date()).days)
+        paid.append(total_paid)
+
+    columns = calculate_portfolio(principal, rates, insurance_rates, days, paid)
+    return {"id": ids, "days": days, **columns}
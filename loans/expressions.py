@@ -0,0 +1,90 @@
+"""
+Expressões de banco que espelham as fórmulas de `loans.engine`.
+
+Servem para filtrar e ordenar empréstimos no SQL. Os cálculos usam ponto
+flutuante do banco e podem divergir das propriedades de `Loan` em um centavo
+nos casos de arredondamento limite; os valores exibidos continuam vindo do
+cálculo decimal exato.
+"""
+
+from django.db import models
+from django.db.models import Case, F, Func, Value, When
+from django.db.models.functions import Cast, Greatest, Least, Power, Round
+from django.db.models.lookups import LessThanOrEqual
+
+from . import engine
+
+
+class DaysSince(Func):
+    """
+    Dias corridos entre a data (UTC) de um timestamp e a data `as_of`,
+    equivalente a `(as_of - timestamp.date()).days`.
+    """
+
+    output_field = models.IntegerField()
+    template = "(DATE '%(as_of)s' - CAST(%(expressions)s AS DATE))"
+
+    def __init__(self, expression, as_of, **extra):
+        super().__init__(expression, as_of=as_of.isoformat(), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template=(
+                "CAST(julianday('%(as_of)s') - julianday(date(%(expressions)s))"
+                " AS INTEGER)"
+            ),
+            **extra_context,
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="(DATE '%(as_of)s' - (%(expressions)s)::date)",
+            **extra_context,
+        )
+
+
+def _float(expression):
+    return Cast(expression, models.FloatField())
+
+
+def _money(expression):
+    return Cast(
+        Round(expression, 2), models.DecimalField(max_digits=14, decimal_places=2)
+    )
+
+
+def balance_expressions(as_of):
+    """
+    Retorna as expressões `days_since_requested`, `total_due` e
+    `outstanding_balance` calculadas no banco para a data `as_of`.
+    """
+    days = DaysSince("requested_date", as_of)
+    principal = _float("principal_amount")
+
+    daily_factor = Power(Value(1.0) + _float("monthly_interest_rate"), Value(1.0 / 30))
+    compounded = Case(
+        When(LessThanOrEqual(days, 0), then=principal),
+        default=Round(principal * Power(daily_factor, days), 2),
+        output_field=models.FloatField(),
+    )
+    iof = Round(
+        principal
+        * Value(float(engine.IOF_DAILY_RATE))
+        * Least(days, engine.IOF_MAX_DAYS)
+        + principal * Value(float(engine.IOF_FIXED_RATE)),
+        2,
+    )
+    insurance = Round(principal * _float("insurance_rate"), 2)
+    total_due = compounded + iof + insurance
+
+    return {
+        "days_since_requested": days,
+        "total_due": _money(total_due),
+        "outstanding_balance": _money(
+            Greatest(total_due - _float(F("total_paid_amount")), Value(0.0))
+        ),
+    }
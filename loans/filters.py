@@ -0,0 +1,17 @@
+import django_filters
+
+from .models import Loan
+
+
+class LoanFilter(django_filters.FilterSet):
+    outstanding_balance = django_filters.RangeFilter(
+        field_name="db_outstanding_balance"
+    )
+    total_due = django_filters.RangeFilter(field_name="db_total_due")
+    days_since_requested = django_filters.RangeFilter(
+        field_name="db_days_since_requested"
+    )
+
+    class Meta:
+        model = Loan
+        fields = ["bank", "client", "is_fully_paid", "requested_date"]
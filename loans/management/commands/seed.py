@@ -2,8 +2,10 @@ import random
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils.timezone import make_aware
 from faker import Faker
+from simple_history.utils import bulk_create_with_history
 
 from accounts.models import User
 from loans.models import Loan
@@ -30,28 +32,40 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"Usuário criado: {user.email}"))
 
+        # Empréstimos, pagamentos e históricos gravados com `bulk_create`; os
+        # totais desnormalizados são calculados aqui, pois o lote não passa
+        # por `Payment.save`
+        loans, payments = [], []
         for _ in range(random.randint(10, 20)):
-            requested_date = make_aware(fake.date_time_this_year())
-            loan = Loan.objects.create(
+            loan = Loan(
                 user=user,
                 principal_amount=Decimal(random.randint(1000, 10000)),
                 monthly_interest_rate=Decimal("0.02"),
                 ip_address=fake.ipv4(),
-                requested_date=requested_date,
+                requested_date=make_aware(fake.date_time_this_year()),
                 bank=fake.company(),
                 client=fake.name(),
             )
-
-            self.stdout.write(f"Empréstimo criado: {loan.id}")
+            loans.append(loan)
 
             for _ in range(random.randint(1, 4)):
-                payment_date = make_aware(
-                    fake.date_time_between(start_date=loan.requested_date)
-                )
-                Payment.objects.create(
+                payment = Payment(
                     loan=loan,
                     amount=Decimal(random.randint(100, 1000)),
-                    payment_date=payment_date,
+                    payment_date=make_aware(
+                        fake.date_time_between(start_date=loan.requested_date)
+                    ),
                 )
+                payments.append(payment)
+                loan.total_paid_amount += payment.amount
+                loan.payments_count += 1
+                loan.last_payment_at = max(
+                    filter(None, (loan.last_payment_at, payment.payment_date))
+                )
+
+        with transaction.atomic():
+            bulk_create_with_history(loans, Loan, default_user=user)
+            bulk_create_with_history(payments, Payment, default_user=user)
 
-            self.stdout.write("Pagamentos adicionados")
+        self.stdout.write(f"{len(loans)} empréstimos criados")
+        self.stdout.write(f"{len(payments)} pagamentos adicionados")
@@ -0,0 +1,128 @@
+import time
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from loans import engine
+from loans.models import Loan, LoanBalanceSnapshot
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera fotografias diárias dos saldos dos empréstimos em lotes, "
+        "ignorando empréstimos que já possuem fotografia para a data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Data de referência (YYYY-MM-DD). Padrão: ontem",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Quantidade de empréstimos por lote/transação",
+        )
+
+    def handle(self, *args, **options):
+        as_of = self._parse_date(options["date"])
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size deve ser maior que zero")
+
+        pending = self._pending_loans(as_of)
+        started = time.monotonic()
+        created = 0
+        last_id = None
+
+        while True:
+            batch = pending.filter(pk__gt=last_id) if last_id else pending
+            ids = list(batch.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+
+            created += self._snapshot_batch(ids, as_of)
+            last_id = ids[-1]
+
+        elapsed = time.monotonic() - started
+        rate = created / elapsed if elapsed > 0 else created
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{created} fotografia(s) de {as_of} criada(s) em {elapsed:.2f}s "
+                f"({rate:.0f} linhas/s)"
+            )
+        )
+
+    def _parse_date(self, value):
+        if not value:
+            return now().date() - timedelta(days=1)
+        try:
+            return date.fromisoformat(value)
+        except ValueError as exc:
+            raise CommandError(f"Data inválida: {value}") from exc
+
+    def _end_of_day(self, as_of):
+        """Fim do dia `as_of` em UTC, mesma base de datas do motor de cálculo."""
+        return datetime.combine(as_of + timedelta(days=1), datetime.min.time(), UTC)
+
+    def _pending_loans(self, as_of):
+        """Empréstimos solicitados até `as_of` e ainda sem fotografia na data."""
+        return (
+            Loan.objects.filter(requested_date__lt=self._end_of_day(as_of))
+            .exclude(
+                Exists(
+                    LoanBalanceSnapshot.objects.filter(
+                        loan=OuterRef("pk"), as_of_date=as_of
+                    )
+                )
+            )
+            .order_by("pk")
+        )
+
+    def _snapshot_batch(self, ids, as_of):
+        """
+        Calcula um lote pelo motor de cálculo, considerando apenas pagamentos
+        realizados até o fim de `as_of`, e grava as fotografias.
+        """
+        paid_as_of = (
+            Payment.objects.filter(
+                loan=OuterRef("pk"), payment_date__lt=self._end_of_day(as_of)
+            )
+            .order_by()
+            .values("loan")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+        queryset = Loan.objects.filter(pk__in=ids).annotate(
+            paid_as_of=Coalesce(
+                Subquery(paid_as_of),
+                Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+        columns = engine.calculate_queryset(
+            queryset, as_of=as_of, total_paid_field="paid_as_of"
+        )
+
+        snapshots = [
+            LoanBalanceSnapshot(
+                loan_id=loan_id,
+                as_of_date=as_of,
+                **{
+                    column: columns[column][index]
+                    for column in engine.FINANCIAL_COLUMNS
+                },
+            )
+            for index, loan_id in enumerate(columns["id"])
+        ]
+
+        with transaction.atomic():
+            LoanBalanceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+        return len(snapshots)
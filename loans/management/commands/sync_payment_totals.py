@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+
+from loans.models import Loan
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói os totais desnormalizados de pagamentos dos empréstimos "
+        "(total pago, quantidade e último pagamento) a partir de Payment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Apenas verifica divergências, sem corrigir",
+        )
+
+    def handle(self, *args, **options):
+        diverging = self._diverging_loans()
+
+        if options["check"]:
+            for loan in diverging:
+                self.stdout.write(
+                    f"Divergência em {loan.id}: "
+                    f"total_paid_amount={loan.total_paid_amount} "
+                    f"(esperado {loan.expected_total_paid_amount}), "
+                    f"payments_count={loan.payments_count} "
+                    f"(esperado {loan.expected_payments_count})"
+                )
+            if diverging:
+                raise CommandError(f"{len(diverging)} empréstimo(s) divergente(s)")
+            self.stdout.write(self.style.SUCCESS("Totais de pagamentos consistentes"))
+            return
+
+        with transaction.atomic():
+            updated = Loan.objects.sync_payment_totals()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{updated} empréstimo(s) reconstruído(s), "
+                f"{len(diverging)} estavam divergentes"
+            )
+        )
+
+    def _diverging_loans(self):
+        return list(
+            Loan.objects.with_payment_totals()
+            .filter(
+                ~Q(total_paid_amount=F("expected_total_paid_amount"))
+                | ~Q(payments_count=F("expected_payments_count"))
+                | ~Q(last_payment_at=F("expected_last_payment_at"))
+                | Q(
+                    last_payment_at__isnull=True, expected_last_payment_at__isnull=False
+                )
+                | Q(
+                    last_payment_at__isnull=False, expected_last_payment_at__isnull=True
+                )
+            )
+            .only("id", "total_paid_amount", "payments_count", "last_payment_at")
+        )
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .expressions import balance_expressions
+
+
+class LoanQuerySet(models.QuerySet):
+    def with_balances(self, as_of=None, select=True):
+        """
+        Anota `db_days_since_requested`, `db_total_due` e
+        `db_outstanding_balance` calculados no banco para a data `as_of`
+        (padrão: hoje), permitindo filtrar e ordenar por esses valores.
+
+        Com `select=False` as expressões são apenas apelidos (`alias`): só
+        entram no SQL se usadas em filtros, sem serem lidas para as instâncias.
+        """
+        as_of = as_of or now().date()
+        expressions = {
+            f"db_{name}": expression
+            for name, expression in balance_expressions(as_of).items()
+        }
+        if select:
+            return self.annotate(**expressions)
+        return self.alias(**expressions)
+
+    def change_markers(self):
+        """
+        Marcadores baratos de alteração do conjunto de empréstimos, usados
+        como validadores de cache (ETag): quantidade, última atualização,
+        totais de pagamentos e criação do pagamento mais recente.
+        """
+        Payment = apps.get_model("payments", "Payment")
+        latest_payment = (
+            Payment.objects.filter(loan=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("created_at")[:1]
+        )
+        return self.order_by().aggregate(
+            count=Count("pk"),
+            updated_at=Max("updated_at"),
+            latest_payment_created_at=Max(Subquery(latest_payment)),
+            payments_count=Sum("payments_count"),
+            total_paid_amount=Sum("total_paid_amount"),
+        )
+
+    def _payment_subqueries(self):
+        """
+        Subqueries que recalculam, a partir de `Payment`, os totais que o
+        empréstimo mantém desnormalizados.
+        """
+        Payment = apps.get_model("payments", "Payment")
+        payments = Payment.objects.filter(loan=OuterRef("pk")).order_by().values("loan")
+
+        return {
+            "total_paid_amount": Coalesce(
+                Subquery(
+                    payments.annotate(total=Sum("amount")).values("total"),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                ),
+                Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            "payments_count": Coalesce(
+                Subquery(
+                    payments.annotate(total=Count("id")).values("total"),
+                    output_field=models.IntegerField(),
+                ),
+                Value(0),
+            ),
+            "last_payment_at": Subquery(
+                payments.annotate(last=Max("payment_date")).values("last"),
+                output_field=models.DateTimeField(),
+            ),
+        }
+
+    def with_payment_totals(self):
+        """
+        Anota `expected_<campo>` com os totais recalculados a partir dos
+        pagamentos, para conferência com as colunas armazenadas.
+        """
+        return self.annotate(
+            **{
+                f"expected_{field}": expression
+                for field, expression in self._payment_subqueries().items()
+            }
+        )
+
+    def sync_payment_totals(self):
+        """
+        Reconstrói `total_paid_amount`, `payments_count` e `last_payment_at`
+        a partir dos pagamentos, incrementando `version`. Retorna o número de
+        empréstimos atualizados.
+        """
+        return self.update(**self._payment_subqueries(), version=F("version") + 1)
+
+
+class LoanManager(models.Manager.from_queryset(LoanQuerySet)):
+    pass
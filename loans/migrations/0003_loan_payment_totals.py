@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 15:29
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_payment_totals(apps, schema_editor):
+    Loan = apps.get_model("loans", "Loan")
+    Payment = apps.get_model("payments", "Payment")
+    payments = Payment.objects.filter(loan=OuterRef("pk")).order_by().values("loan")
+
+    Loan.objects.update(
+        total_paid_amount=Coalesce(
+            Subquery(payments.annotate(total=Sum("amount")).values("total")),
+            Value(Decimal("0.00")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        payments_count=Coalesce(
+            Subquery(payments.annotate(total=Count("id")).values("total")),
+            Value(0),
+        ),
+        last_payment_at=Subquery(
+            payments.annotate(last=Max("payment_date")).values("last")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0002_historicalloan"),
+        ("payments", "0002_historicalpayment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicalloan",
+            name="last_payment_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalloan",
+            name="payments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="historicalloan",
+            name="total_paid_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="last_payment_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="payments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="total_paid_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.RunPython(backfill_payment_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0003_loan_payment_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoanBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("as_of_date", models.DateField(db_index=True)),
+                (
+                    "compounded_amount",
+                    models.DecimalField(decimal_places=2, max_digits=14),
+                ),
+                ("iof", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("insurance", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("total_due", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("total_paid", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "outstanding_balance",
+                    models.DecimalField(decimal_places=2, max_digits=14),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="loans.loan",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-as_of_date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("loan", "as_of_date"),
+                        name="unique_loan_snapshot_per_day",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0004_loanbalancesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicalloan",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="loan",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
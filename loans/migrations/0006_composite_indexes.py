@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0005_loan_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(
+                fields=["user", "-created_at"], name="loan_user_created_idx"
+            ),
+        ),
+    ]
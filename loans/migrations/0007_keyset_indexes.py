@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0006_composite_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="loan",
+            name="loan_user_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="loan",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="loan_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0007_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="historicalloan",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="historicalloan",
+            name="version",
+        ),
+        migrations.AddField(
+            model_name="historicalloan",
+            name="history_diff",
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="bank",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="client",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="created_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="insurance_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, max_digits=5, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="ip_address",
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="is_fully_paid",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="monthly_interest_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, max_digits=5, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="payments_count",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="principal_amount",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="requested_date",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="historicalloan",
+            name="total_paid_amount",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=12, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 20:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0008_historicalloan_diff_only"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="historicalloan",
+            name="last_payment_at",
+        ),
+        migrations.RemoveField(
+            model_name="historicalloan",
+            name="payments_count",
+        ),
+        migrations.RemoveField(
+            model_name="historicalloan",
+            name="total_paid_amount",
+        ),
+    ]
@@ -1,12 +1,23 @@
 import uuid
-from decimal import ROUND_HALF_UP, Decimal
+from decimal import Decimal
 from functools import cached_property
 
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.timezone import now
-from simple_history.models import HistoricalRecords
 
 from accounts.models import User
+from core.history import BufferedHistoricalRecords
+
+from . import engine
+from .managers import LoanManager
+
+# Colunas mantidas apenas por UPDATEs atômicos (`apply_payment`,
+# `sync_payment_totals` e o fluxo em lote de pagamentos)
+PAYMENT_TOTAL_FIELDS = frozenset(
+    {"total_paid_amount", "payments_count", "last_payment_at", "version"}
+)
 
 
 class Loan(models.Model):
@@ -42,21 +53,93 @@ class Loan(models.Model):
     insurance_rate = models.DecimalField(
         max_digits=5, decimal_places=4, default=Decimal("0.01")
     )
+    total_paid_amount = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"), editable=False
+    )
+    payments_count = models.PositiveIntegerField(default=0, editable=False)
+    last_payment_at = models.DateTimeField(null=True, blank=True, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    history = HistoricalRecords()
+    # Alterações gravam só os campos alterados. `version` e `updated_at` mudam
+    # a cada save; os totais de pagamentos são alterados por `apply_payment`
+    # sem passar por `save` e são reconstruíveis a partir de `Payment`: nenhum
+    # deles entra no histórico
+    history = BufferedHistoricalRecords(
+        diff_only=True,
+        excluded_fields=[
+            "version",
+            "updated_at",
+            "total_paid_amount",
+            "payments_count",
+            "last_payment_at",
+        ],
+    )
+
+    objects = LoanManager()
 
     def __str__(self):
         return f"Loan {self.id}"
 
+    def save(self, *args, update_fields=None, **kwargs):
+        """
+        Em uma linha existente, não grava os totais de pagamentos nem
+        `version`: uma instância carregada antes de um pagamento não deve
+        sobrescrever os valores atualizados por `apply_payment`.
+        """
+        if not self._state.adding:
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in PAYMENT_TOTAL_FIELDS
+                ]
+            else:
+                update_fields = [
+                    name for name in update_fields if name not in PAYMENT_TOTAL_FIELDS
+                ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def apply_payment(self, payment):
+        """
+        Soma o pagamento aos totais desnormalizados com um único UPDATE
+        atômico, incrementa `version` e reflete o resultado nesta instância.
+        """
+        type(self).objects.filter(pk=self.pk).update(
+            total_paid_amount=F("total_paid_amount") + payment.amount,
+            payments_count=F("payments_count") + 1,
+            last_payment_at=Greatest(
+                Coalesce(F("last_payment_at"), Value(payment.payment_date)),
+                Value(payment.payment_date),
+            ),
+            version=F("version") + 1,
+        )
+        self.total_paid_amount += payment.amount
+        self.payments_count += 1
+        self.version += 1
+        if self.last_payment_at is None or payment.payment_date > self.last_payment_at:
+            self.last_payment_at = payment.payment_date
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # `id` desempata a paginação por chave (`created_at`, `id`)
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="loan_user_created_idx"
+            )
+        ]
 
-    @cached_property
+    @property
     def total_paid(self):
-        """Soma de todos os pagamentos realizados para este empréstimo."""
-        return sum(payment.amount for payment in self.payments.all())
+        """
+        Soma de todos os pagamentos realizados para este empréstimo.
+
+        Lida do total desnormalizado, mantido a cada pagamento registrado
+        (ver `Payment.save` e `PaymentQuerySet`) e reconstruível com
+        `sync_payment_totals`.
+        """
+        return self.total_paid_amount
 
     @cached_property
     def days_since_requested(self):
@@ -69,13 +152,11 @@ class Loan(models.Model):
         Valor do empréstimo com aplicação de juros compostos pro rata dia.
         Fórmula: M = P * (1 + i)^n, onde i é a taxa diária.
         """
-        if self.days_since_requested <= 0:
-            return self.principal_amount
-        daily_rate = (1 + self.monthly_interest_rate) ** (Decimal("1") / 30) - 1
-        compounded = (
-            self.principal_amount * (1 + daily_rate) ** self.days_since_requested
+        return engine.compounded_amount(
+            self.principal_amount,
+            self.monthly_interest_rate,
+            self.days_since_requested,
         )
-        return compounded.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
     @property
     def iof(self):
@@ -84,27 +165,64 @@ class Loan(models.Model):
         IOF fixo: 0.38% do valor
         IOF diário: 0.0082% por dia (máx. 3%)
         """
-        dias = min(self.days_since_requested, 365)
-        iof_diario = self.principal_amount * Decimal("0.000082") * dias
-        iof_fixo = self.principal_amount * Decimal("0.0038")
-        total_iof = iof_diario + iof_fixo
-        return total_iof.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return engine.iof(self.principal_amount, self.days_since_requested)
 
     @property
     def insurance(self):
         """Valor do seguro sobre o empréstimo (default 1%)."""
-        return (self.principal_amount * self.insurance_rate).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
-        )
+        return engine.insurance(self.principal_amount, self.insurance_rate)
 
     @property
     def total_due(self):
         """Valor total atualizado do empréstimo com juros, IOF e seguro."""
-        return (self.compounded_amount + self.iof + self.insurance).quantize(
-            Decimal("0.01")
-        )
+        return engine.total_due(self.compounded_amount, self.iof, self.insurance)
 
     @property
     def outstanding_balance(self):
         """Saldo devedor: valor total menos o que já foi pago."""
-        return max(self.total_due - self.total_paid, Decimal("0.00"))
+        return engine.outstanding_balance(self.total_due, self.total_paid)
+
+    def balances_on(self, as_of):
+        """
+        Projeta os valores financeiros para a data `as_of`, com as mesmas
+        fórmulas das propriedades acima e a contagem de dias explícita.
+        """
+        days = (as_of - self.requested_date.date()).days
+        columns = engine.calculate_portfolio(
+            [self.principal_amount],
+            [self.monthly_interest_rate],
+            [self.insurance_rate],
+            [days],
+            [self.total_paid],
+        )
+        return {"days": days, **{name: values[0] for name, values in columns.items()}}
+
+
+class LoanBalanceSnapshot(models.Model):
+    """
+    Fotografia diária dos valores calculados de um empréstimo, gerada pelo
+    comando `snapshot_balances` para leitura sem recálculo de juros.
+    """
+
+    loan = models.ForeignKey(
+        Loan, on_delete=models.CASCADE, related_name="balance_snapshots"
+    )
+    as_of_date = models.DateField(db_index=True)
+    compounded_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    iof = models.DecimalField(max_digits=14, decimal_places=2)
+    insurance = models.DecimalField(max_digits=14, decimal_places=2)
+    total_due = models.DecimalField(max_digits=14, decimal_places=2)
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2)
+    outstanding_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-as_of_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan", "as_of_date"], name="unique_loan_snapshot_per_day"
+            )
+        ]
+
+    def __str__(self):
+        return f"Snapshot {self.loan_id} @ {self.as_of_date}"
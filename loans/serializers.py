@@ -1,5 +1,9 @@
+from functools import cached_property
+
+from django.utils.timezone import now
 from rest_framework import serializers
 
+from loans import amortization, engine
 from loans.models import Loan
 
 
@@ -61,3 +65,162 @@ class LoanSerializer(serializers.ModelSerializer):
 
     def get_total_due(self, obj):
         return round(obj.total_due, 2)
+
+
+_COMPOUNDED_SOURCES = ("principal_amount", "monthly_interest_rate", "requested_date")
+_IOF_SOURCES = ("principal_amount", "requested_date")
+_INSURANCE_SOURCES = ("principal_amount", "insurance_rate")
+_TOTAL_DUE_SOURCES = _COMPOUNDED_SOURCES + _IOF_SOURCES + _INSURANCE_SOURCES
+
+LOAN_FIELD_SOURCES = {
+    "id": ("id",),
+    "principal_amount": ("principal_amount",),
+    "monthly_interest_rate": ("monthly_interest_rate",),
+    "ip_address": ("ip_address",),
+    "requested_date": ("requested_date",),
+    "bank": ("bank",),
+    "client": ("client",),
+    "outstanding_balance": _TOTAL_DUE_SOURCES + ("total_paid_amount",),
+    "total_paid": ("total_paid_amount",),
+    "compounded_amount": _COMPOUNDED_SOURCES,
+    "iof": _IOF_SOURCES,
+    "insurance": _INSURANCE_SOURCES,
+    "total_due": _TOTAL_DUE_SOURCES,
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+}
+"""Colunas de `Loan` necessárias para cada campo da resposta."""
+
+
+class _LoanFigures:
+    """Valores financeiros de um empréstimo, calculados sob demanda e uma vez."""
+
+    def __init__(self, loan):
+        self.loan = loan
+
+    @cached_property
+    def compounded_amount(self):
+        return self.loan.compounded_amount
+
+    @cached_property
+    def iof(self):
+        return self.loan.iof
+
+    @cached_property
+    def insurance(self):
+        return self.loan.insurance
+
+    @cached_property
+    def total_due(self):
+        return engine.total_due(self.compounded_amount, self.iof, self.insurance)
+
+    @cached_property
+    def total_paid(self):
+        return self.loan.total_paid
+
+    @cached_property
+    def outstanding_balance(self):
+        return engine.outstanding_balance(self.total_due, self.total_paid)
+
+
+class LoanReadSerializer(serializers.BaseSerializer):
+    """
+    Representação somente leitura de `Loan` para list/retrieve.
+
+    Produz exatamente o mesmo JSON de `LoanSerializer`, mas calcula os
+    valores financeiros uma única vez por empréstimo e monta o dicionário
+    diretamente, sem passar pelo mecanismo de campos do DRF. Se o contexto
+    trouxer `fields`, apenas esses campos são calculados e retornados.
+    """
+
+    _financial_fields = frozenset(engine.FINANCIAL_COLUMNS)
+    _datetime = serializers.DateTimeField()
+    _formatters = {
+        "id": serializers.UUIDField().to_representation,
+        "principal_amount": serializers.DecimalField(
+            max_digits=12, decimal_places=2
+        ).to_representation,
+        "monthly_interest_rate": serializers.DecimalField(
+            max_digits=5, decimal_places=4
+        ).to_representation,
+        "requested_date": _datetime.to_representation,
+        "created_at": _datetime.to_representation,
+        "updated_at": _datetime.to_representation,
+    }
+
+    def to_representation(self, obj):
+        fields = self.context.get("fields")
+        if fields is None:
+            fields = LOAN_FIELD_SOURCES
+        figures = _LoanFigures(obj)
+
+        data = {}
+        for name in fields:
+            if name in self._financial_fields:
+                data[name] = round(getattr(figures, name), 2)
+            else:
+                data[name] = self._formatters.get(name, str)(getattr(obj, name))
+        return data
+
+
+class ScheduleQuerySerializer(serializers.Serializer):
+    """Parâmetros de `GET /api/loans/{id}/schedule/`."""
+
+    system = serializers.ChoiceField(
+        choices=amortization.SYSTEMS, default=amortization.PRICE
+    )
+    installments = serializers.IntegerField(
+        min_value=1, max_value=amortization.MAX_INSTALLMENTS, default=12
+    )
+
+
+class InstallmentSerializer(serializers.Serializer):
+    """
+    Parcela de uma tabela de amortização. O vencimento é calculado a partir
+    de `context["start_date"]`, pois a tabela memoizada independe da data.
+    """
+
+    number = serializers.IntegerField()
+    due_date = serializers.SerializerMethodField()
+    payment = serializers.DecimalField(max_digits=14, decimal_places=2)
+    interest = serializers.DecimalField(max_digits=14, decimal_places=2)
+    amortization = serializers.DecimalField(max_digits=14, decimal_places=2)
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+    def get_due_date(self, obj):
+        return amortization.due_date(self.context["start_date"], obj["number"])
+
+
+class PayoffQuerySerializer(serializers.Serializer):
+    """Data de quitação: hoje ou uma data futura."""
+
+    date = serializers.DateField()
+
+    def validate_date(self, value):
+        if value < now().date():
+            raise serializers.ValidationError("A data não pode estar no passado.")
+        return value
+
+
+class BatchPayoffSerializer(PayoffQuerySerializer):
+    """Entrada de `POST /api/loans/payoff/`."""
+
+    MAX_LOANS = 500
+
+    loans = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=MAX_LOANS
+    )
+
+
+class PayoffQuoteSerializer(serializers.Serializer):
+    """Cotação de quitação de um empréstimo em uma data."""
+
+    id = serializers.UUIDField()
+    date = serializers.DateField()
+    days = serializers.IntegerField()
+    compounded_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    iof = serializers.DecimalField(max_digits=14, decimal_places=2)
+    insurance = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_due = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_paid = serializers.DecimalField(max_digits=14, decimal_places=2)
+    outstanding_balance = serializers.DecimalField(max_digits=14, decimal_places=2)
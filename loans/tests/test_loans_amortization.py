@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from loans import amortization
+
+
+class AmortizationScheduleTest(SimpleTestCase):
+    def setUp(self):
+        amortization.amortization_schedule.cache_clear()
+
+    def assertConsistent(self, schedule):
+        rows = schedule[:]
+        balance = schedule.principal
+        for row in rows:
+            self.assertEqual(row["payment"], row["interest"] + row["amortization"])
+            self.assertEqual(balance - row["amortization"], row["balance"])
+            balance = row["balance"]
+        self.assertEqual(rows[-1]["balance"], Decimal("0.00"))
+        self.assertEqual(sum(r["amortization"] for r in rows), schedule.principal)
+
+    def test_price_has_constant_installments(self):
+        schedule = amortization.amortization_schedule(
+            Decimal("1000.00"), Decimal("0.02"), 12, amortization.PRICE
+        )
+
+        self.assertEqual(schedule.installment_amount, Decimal("94.56"))
+        self.assertEqual(schedule[0]["interest"], Decimal("20.00"))
+        self.assertTrue(all(r["payment"] == Decimal("94.56") for r in schedule[:-1]))
+        self.assertConsistent(schedule)
+
+    def test_sac_has_constant_amortization(self):
+        schedule = amortization.amortization_schedule(
+            Decimal("1200.00"), Decimal("0.02"), 12, amortization.SAC
+        )
+
+        self.assertTrue(
+            all(r["amortization"] == Decimal("100.00") for r in schedule[:])
+        )
+        self.assertEqual(schedule[0]["payment"], Decimal("124.00"))
+        self.assertEqual(schedule[-1]["payment"], Decimal("102.00"))
+        self.assertConsistent(schedule)
+
+    def test_zero_rate_and_long_terms_close_the_balance(self):
+        for system in amortization.SYSTEMS:
+            for rate, installments in ((Decimal("0"), 7), (Decimal("0.0125"), 360)):
+                schedule = amortization.amortization_schedule(
+                    Decimal("98765.43"), rate, installments, system
+                )
+                self.assertConsistent(schedule)
+
+    def test_slice_matches_full_schedule(self):
+        terms = (Decimal("5000.00"), Decimal("0.03"), 48, amortization.PRICE)
+        page = amortization.AmortizationSchedule(*terms)[20:25]
+
+        self.assertEqual(page, amortization.AmortizationSchedule(*terms)[:][20:25])
+        self.assertEqual([r["number"] for r in page], [21, 22, 23, 24, 25])
+
+    def test_schedule_is_memoized_per_terms(self):
+        terms = (Decimal("1000.00"), Decimal("0.02"), 12, amortization.SAC)
+
+        first = amortization.amortization_schedule(*terms)
+        second = amortization.amortization_schedule(*terms)
+
+        self.assertIs(first, second)
+        self.assertEqual(amortization.amortization_schedule.cache_info().hits, 1)
+
+    def test_invalid_terms_raise(self):
+        with self.assertRaises(ValueError):
+            amortization.AmortizationSchedule(Decimal("1"), Decimal("0"), 12, "x")
+        with self.assertRaises(ValueError):
+            amortization.AmortizationSchedule(Decimal("1"), Decimal("0"), 0, "sac")
+
+    def test_financed_amount_includes_iof_and_insurance(self):
+        financed = amortization.financed_amount(Decimal("1000.00"), Decimal("0.01"), 12)
+
+        # seguro 10.00 + IOF (0.0082% * 360 dias + 0.38%) 33.32
+        self.assertEqual(financed, Decimal("1043.32"))
+        self.assertEqual(amortization.due_date(date(2025, 1, 1), 2), date(2025, 3, 2))
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from loans.models import Loan, LoanBalanceSnapshot
+from payments.models import Payment
+
+
+class SyncPaymentTotalsCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="command@example.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Comando",
+            client="Cliente Comando",
+        )
+        Payment.objects.create(loan=self.loan, amount=Decimal("120.00"))
+
+    def test_check_passes_when_totals_are_consistent(self):
+        out = StringIO()
+        call_command("sync_payment_totals", "--check", stdout=out)
+        self.assertIn("consistentes", out.getvalue())
+
+    def test_check_fails_and_rebuild_fixes_divergent_totals(self):
+        Loan.objects.filter(id=self.loan.id).update(
+            total_paid_amount=Decimal("0.00"), payments_count=0, last_payment_at=None
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("sync_payment_totals", "--check", stdout=StringIO())
+
+        out = StringIO()
+        call_command("sync_payment_totals", stdout=out)
+        self.assertIn("1 estavam divergentes", out.getvalue())
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("120.00"))
+        self.assertEqual(self.loan.payments_count, 1)
+        call_command("sync_payment_totals", "--check", stdout=StringIO())
+
+
+class SnapshotBalancesCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="snapshot@example.com", password="12345678", document="12345678900"
+        )
+        self.loans = []
+        for days in (0, 15, 45):
+            loan = Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                monthly_interest_rate=Decimal("0.02"),
+                ip_address="127.0.0.1",
+                bank="Banco Snapshot",
+                client="Cliente Snapshot",
+            )
+            loan.requested_date = now() - timedelta(days=days)
+            loan.save(update_fields=["requested_date"])
+            self.loans.append(loan)
+        Payment.objects.create(loan=self.loans[2], amount=Decimal("100.00"))
+        self.today = now().date().isoformat()
+
+    def test_snapshot_matches_loan_properties(self):
+        out = StringIO()
+        call_command(
+            "snapshot_balances", "--date", self.today, "--batch-size", "2", stdout=out
+        )
+
+        self.assertIn("3 fotografia(s)", out.getvalue())
+        self.assertIn("linhas/s", out.getvalue())
+        for loan in self.loans:
+            loan = Loan.objects.get(id=loan.id)
+            snapshot = LoanBalanceSnapshot.objects.get(loan=loan)
+            self.assertEqual(snapshot.compounded_amount, loan.compounded_amount)
+            self.assertEqual(snapshot.iof, loan.iof)
+            self.assertEqual(snapshot.insurance, loan.insurance)
+            self.assertEqual(snapshot.total_due, loan.total_due)
+            self.assertEqual(snapshot.total_paid, loan.total_paid)
+            self.assertEqual(snapshot.outstanding_balance, loan.outstanding_balance)
+
+    def test_snapshot_is_incremental(self):
+        call_command("snapshot_balances", "--date", self.today, stdout=StringIO())
+        LoanBalanceSnapshot.objects.filter(loan=self.loans[0]).delete()
+
+        out = StringIO()
+        call_command("snapshot_balances", "--date", self.today, stdout=out)
+
+        self.assertIn("1 fotografia(s)", out.getvalue())
+        self.assertEqual(LoanBalanceSnapshot.objects.count(), 3)
+
+    def test_snapshot_skips_loans_requested_after_date(self):
+        yesterday = (now().date() - timedelta(days=1)).isoformat()
+        call_command("snapshot_balances", "--date", yesterday, stdout=StringIO())
+
+        self.assertEqual(LoanBalanceSnapshot.objects.count(), 2)
+        self.assertFalse(
+            LoanBalanceSnapshot.objects.filter(loan=self.loans[0]).exists()
+        )
+
+    def test_invalid_date_raises_error(self):
+        with self.assertRaises(CommandError):
+            call_command("snapshot_balances", "--date", "ontem", stdout=StringIO())
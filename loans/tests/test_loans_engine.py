@@ -0,0 +1,96 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from loans import engine
+from loans.models import Loan
+from payments.models import Payment
+
+
+class LoanEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="engine@example.com", password="12345678", document="12345678900"
+        )
+        self.loans = []
+        cases = [
+            (Decimal("1000.00"), Decimal("0.02"), Decimal("0.01"), 0),
+            (Decimal("1000.00"), Decimal("0.02"), Decimal("0.01"), 30),
+            (Decimal("2500.55"), Decimal("0.0375"), Decimal("0.0150"), 45),
+            (Decimal("333.33"), Decimal("0.0100"), Decimal("0.0000"), 400),
+            (Decimal("9999.99"), Decimal("0.02"), Decimal("0.01"), 30),
+        ]
+        for principal, rate, insurance_rate, days in cases:
+            loan = Loan.objects.create(
+                user=self.user,
+                principal_amount=principal,
+                monthly_interest_rate=rate,
+                insurance_rate=insurance_rate,
+                ip_address="127.0.0.1",
+                bank="Banco Engine",
+                client="Cliente Engine",
+            )
+            loan.requested_date = now() - timedelta(days=days)
+            loan.save(update_fields=["requested_date"])
+            self.loans.append(Loan.objects.get(id=loan.id))
+
+        Payment.objects.create(loan=self.loans[1], amount=Decimal("150.00"))
+
+    def test_portfolio_matches_loan_properties(self):
+        result = engine.calculate_portfolio(
+            principal=[loan.principal_amount for loan in self.loans],
+            monthly_rate=[loan.monthly_interest_rate for loan in self.loans],
+            insurance_rate=[loan.insurance_rate for loan in self.loans],
+            days=[loan.days_since_requested for loan in self.loans],
+            total_paid=[loan.total_paid for loan in self.loans],
+        )
+
+        for index, loan in enumerate(self.loans):
+            for column in engine.FINANCIAL_COLUMNS:
+                self.assertEqual(result[column][index], getattr(loan, column))
+
+    def test_queryset_matches_loan_properties(self):
+        result = engine.calculate_queryset(Loan.objects.filter(user=self.user))
+
+        by_id = {loan.id: loan for loan in self.loans}
+        self.assertEqual(len(result["id"]), len(self.loans))
+        for index, loan_id in enumerate(result["id"]):
+            loan = by_id[loan_id]
+            self.assertEqual(result["days"][index], loan.days_since_requested)
+            for column in engine.FINANCIAL_COLUMNS:
+                self.assertEqual(result[column][index], getattr(loan, column))
+
+    def test_portfolio_rejects_columns_of_different_sizes(self):
+        with self.assertRaises(ValueError):
+            engine.calculate_portfolio(
+                principal=[Decimal("1000.00")],
+                monthly_rate=[],
+                insurance_rate=[],
+                days=[],
+                total_paid=[],
+            )
+
+    def test_compound_factor_is_memoized(self):
+        engine.clear_caches()
+
+        first = self.loans[1].compounded_amount
+        second = Loan.objects.get(id=self.loans[4].id).compounded_amount
+
+        stats = engine.cache_stats()
+        self.assertEqual(stats["compound_factor"]["misses"], 1)
+        self.assertEqual(stats["compound_factor"]["hits"], 1)
+        self.assertEqual(stats["daily_rate"]["misses"], 1)
+        self.assertEqual(first, Decimal("1020.00"))
+        self.assertGreater(second, self.loans[4].principal_amount)
+
+    def test_clear_caches_resets_counters(self):
+        self.assertEqual(self.loans[1].compounded_amount, Decimal("1020.00"))
+        self.assertGreater(engine.cache_stats()["compound_factor"]["size"], 0)
+        engine.clear_caches()
+
+        stats = engine.cache_stats()
+        self.assertEqual(stats["compound_factor"]["hits"], 0)
+        self.assertEqual(stats["compound_factor"]["size"], 0)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from core.history import rebuild_state
+from loans.models import Loan
+from payments.usecases import ProcessPaymentUseCase
+
+
+class LoanDiffHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="diff@example.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Original",
+            client="Cliente Diff",
+        )
+
+    def test_update_stores_only_changed_fields(self):
+        self.loan.is_fully_paid = True
+        self.loan.save(update_fields=["is_fully_paid"])
+
+        record = self.loan.history.first()
+        self.assertEqual(record.history_type, "~")
+        self.assertEqual(record.history_diff, {"is_fully_paid": True})
+        self.assertIsNone(record.bank)
+        self.assertIsNone(record.principal_amount)
+
+    def test_creation_stores_full_state(self):
+        record = self.loan.history.get()
+
+        self.assertEqual(record.history_type, "+")
+        self.assertIsNone(record.history_diff)
+        self.assertEqual(record.bank, "Banco Original")
+
+    def test_save_without_tracked_changes_is_not_recorded(self):
+        self.loan.version += 1
+        self.loan.save()
+        Loan.objects.get(pk=self.loan.pk).save()
+
+        self.assertEqual(self.loan.history.count(), 1)
+
+    def test_fields_outside_update_fields_are_not_recorded(self):
+        self.loan.bank = "Não gravado"
+        self.loan.client = "Cliente Novo"
+        self.loan.save(update_fields=["client"])
+
+        self.assertEqual(
+            self.loan.history.first().history_diff, {"client": "Cliente Novo"}
+        )
+
+    def test_rebuilds_state_at_any_point_in_time(self):
+        requested_at = now() - timedelta(days=10)
+        steps = [
+            {"bank": "Banco Novo"},
+            {
+                "monthly_interest_rate": Decimal("0.0350"),
+                "requested_date": requested_at,
+            },
+            {"bank": "Banco Final", "is_fully_paid": True},
+        ]
+        for step in steps:
+            loan = Loan.objects.get(pk=self.loan.pk)
+            for name, value in step.items():
+                setattr(loan, name, value)
+            loan.save()
+
+        records = list(self.loan.history.order_by("history_date", "history_id"))
+        self.assertEqual(len(records), 4)
+
+        middle = records[2].instance
+        self.assertEqual(middle.bank, "Banco Novo")
+        self.assertEqual(middle.monthly_interest_rate, Decimal("0.0350"))
+        self.assertEqual(middle.requested_date, requested_at)
+        self.assertFalse(middle.is_fully_paid)
+        self.assertEqual(middle.client, "Cliente Diff")
+        self.assertEqual(middle.user_id, self.user.pk)
+
+        as_of = self.loan.history.as_of(records[1].history_date)
+        self.assertEqual(as_of.bank, "Banco Novo")
+        self.assertEqual(as_of.monthly_interest_rate, Decimal("0.0200"))
+
+        final = rebuild_state(records[3])
+        self.assertEqual(final["bank"], "Banco Final")
+        self.assertTrue(final["is_fully_paid"])
+        self.assertEqual(final["monthly_interest_rate"], Decimal("0.0350"))
+
+    def test_payment_flow_history_rebuilds_current_totals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessPaymentUseCase().handle(
+                loan=self.loan, user=self.user, amount=self.loan.total_due
+            )
+
+        record = Loan.history.first()
+        self.assertEqual(record.history_diff, {"is_fully_paid": True})
+
+        rebuilt = record.instance
+        self.loan.refresh_from_db()
+        self.assertTrue(rebuilt.is_fully_paid)
+        self.assertEqual(rebuilt.total_paid_amount, self.loan.total_paid_amount)
+        self.assertEqual(rebuilt.payments_count, 1)
+        self.assertEqual(rebuilt.last_payment_at, self.loan.last_payment_at)
+        self.assertEqual(rebuilt.bank, "Banco Original")
+
+    def test_diff_against_compares_rebuilt_states(self):
+        for bank in ("Banco A", "Banco B"):
+            loan = Loan.objects.get(pk=self.loan.pk)
+            loan.bank = bank
+            loan.save()
+
+        newest, previous, created = self.loan.history.all()
+
+        delta = newest.diff_against(previous)
+        self.assertEqual(delta.changed_fields, ["bank"])
+        self.assertEqual(
+            (delta.changes[0].old, delta.changes[0].new), ("Banco A", "Banco B")
+        )
+        self.assertEqual(newest.prev_record, previous)
+        self.assertEqual(previous.diff_against(created).changed_fields, ["bank"])
+
+    def test_rebuild_starts_from_latest_full_record(self):
+        Loan.history.filter(id=self.loan.pk).update(
+            history_date=now() - timedelta(days=1)
+        )
+        self.loan.bank = "Banco Intermediário"
+        self.loan.save()
+        self.loan.history.filter(history_type="~").update(
+            history_date=now() - timedelta(hours=1)
+        )
+        Loan.history.create(
+            id=self.loan.pk,
+            history_type="~",
+            history_date=now() - timedelta(minutes=30),
+            **{
+                field.attname: getattr(self.loan, field.attname)
+                for field in Loan.history.model.tracked_fields
+                if field.attname != "id"
+            },
+        )
+        self.loan.client = "Cliente Final"
+        self.loan.save()
+
+        latest = self.loan.history.first().instance
+        self.assertEqual(latest.bank, "Banco Intermediário")
+        self.assertEqual(latest.client, "Cliente Final")
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.testing import QueryPlanMixin
+from loans.models import Loan
+
+
+class LoanIndexTest(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="index@example.com", password="12345678", document="12345678900"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Índice",
+            client="Cliente Índice",
+        )
+
+    def test_loan_list_uses_user_created_at_index(self):
+        sql = self.capture_select(
+            "loans_loan",
+            lambda: self.client.get(reverse("loans-list")),
+            contains='ORDER BY "loans_loan"."created_at" DESC',
+        )
+
+        plan = self.assertUsesIndex(sql, "loan_user_created_idx")
+        if connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE", plan)
@@ -6,6 +6,7 @@ from django.utils.timezone import now
 
 from accounts.models import User
 from loans.models import Loan
+from loans.serializers import LoanSerializer
 from payments.models import Payment
 
 
@@ -59,6 +60,20 @@ class LoanModelTest(TestCase):
         )
         self.assertEqual(loan_today.compounded_amount, Decimal("1000.00"))
 
+    def test_balances_on_today_matches_properties(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("100.00"))
+        quote = self.loan.balances_on(now().date())
+
+        self.assertEqual(quote["days"], self.loan.days_since_requested)
+        self.assertEqual(quote["total_due"], self.loan.total_due)
+        self.assertEqual(quote["outstanding_balance"], self.loan.outstanding_balance)
+
+    def test_balances_on_future_date_uses_explicit_days(self):
+        quote = self.loan.balances_on(now().date() + timedelta(days=90))
+
+        self.assertEqual(quote["days"], self.loan.days_since_requested + 90)
+        self.assertGreater(quote["total_due"], self.loan.total_due)
+
     def test_iof_calculation(self):
         expected_iof = (
             self.loan.principal_amount * Decimal("0.000082") * 30
@@ -101,3 +116,61 @@ class LoanModelTest(TestCase):
     def test_outstanding_balance_after_full_payment(self):
         Payment.objects.create(loan=self.loan, amount=self.loan.total_due)
         self.assertEqual(self.loan.outstanding_balance, Decimal("0.00"))
+
+    def test_payment_totals_are_stored_on_loan(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("300.00"))
+        Payment.objects.create(loan=self.loan, amount=Decimal("200.00"))
+
+        loan = Loan.objects.get(id=self.loan.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(loan.total_paid, Decimal("500.00"))
+            self.assertEqual(loan.payments_count, 2)
+            self.assertIsNotNone(loan.last_payment_at)
+            self.assertEqual(
+                loan.outstanding_balance, loan.total_due - Decimal("500.00")
+            )
+
+    def test_sync_payment_totals_rebuilds_from_payments(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("300.00"))
+        Loan.objects.filter(id=self.loan.id).update(
+            total_paid_amount=Decimal("0.00"), payments_count=0, last_payment_at=None
+        )
+
+        updated = Loan.objects.filter(id=self.loan.id).sync_payment_totals()
+
+        self.loan.refresh_from_db()
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.loan.total_paid_amount, Decimal("300.00"))
+        self.assertEqual(self.loan.payments_count, 1)
+        self.assertIsNotNone(self.loan.last_payment_at)
+
+    def test_stale_instance_save_keeps_payment_totals(self):
+        stale = Loan.objects.get(id=self.loan.id)
+        Payment.objects.create(loan=self.loan, amount=Decimal("300.00"))
+
+        serializer = LoanSerializer(stale, {"bank": "Banco Novo"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        stale.client = "Cliente Novo"
+        stale.save()
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.bank, "Banco Novo")
+        self.assertEqual(self.loan.client, "Cliente Novo")
+        self.assertEqual(self.loan.total_paid_amount, Decimal("300.00"))
+        self.assertEqual(self.loan.payments_count, 1)
+        self.assertIsNotNone(self.loan.last_payment_at)
+        self.assertEqual(self.loan.version, 1)
+
+    def test_with_balances_matches_loan_properties(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("200.00"))
+        self.loan.refresh_from_db()
+
+        loan = Loan.objects.with_balances().get(id=self.loan.id)
+
+        self.assertEqual(loan.db_days_since_requested, self.loan.days_since_requested)
+        self.assertAlmostEqual(loan.db_total_due, self.loan.total_due, delta=0.01)
+        self.assertAlmostEqual(
+            loan.db_outstanding_balance, self.loan.outstanding_balance, delta=0.01
+        )
@@ -0,0 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from loans.models import Loan
+from loans.serializers import LoanReadSerializer, LoanSerializer
+from payments.models import Payment
+
+
+class LoanReadSerializerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="serializer@example.com", password="12345678", document="12345678900"
+        )
+        cases = [
+            (Decimal("1000.00"), Decimal("0.02"), 0, None),
+            (Decimal("2500.55"), Decimal("0.0375"), 45, Decimal("300.10")),
+            (Decimal("333.33"), Decimal("0.0100"), 400, Decimal("333.33")),
+            (Decimal("9999.99"), Decimal("0.0250"), 5000, Decimal("0.01")),
+        ]
+        for principal, rate, days, payment in cases:
+            loan = Loan.objects.create(
+                user=self.user,
+                principal_amount=principal,
+                monthly_interest_rate=rate,
+                ip_address="10.0.0.1",
+                bank="Banco Serializer",
+                client="Cliente Serializer",
+            )
+            loan.requested_date = now() - timedelta(days=days)
+            loan.save(update_fields=["requested_date"])
+            if payment:
+                Payment.objects.create(loan=loan, amount=payment)
+
+    def test_output_is_byte_identical_to_model_serializer(self):
+        loans = list(Loan.objects.filter(user=self.user))
+
+        expected = JSONRenderer().render(LoanSerializer(loans, many=True).data)
+        actual = JSONRenderer().render(LoanReadSerializer(loans, many=True).data)
+
+        self.assertEqual(actual, expected)
+
+    def test_single_loan_output_matches_model_serializer(self):
+        loan = Loan.objects.filter(user=self.user).first()
+
+        self.assertEqual(LoanReadSerializer(loan).data, LoanSerializer(loan).data)
@@ -1,16 +1,22 @@
 import datetime
+from datetime import timedelta
 from decimal import Decimal
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.utils.timezone import make_aware
+from django.utils.timezone import make_aware, now
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from accounts.models import User
 from audits.enums.loan_audit_enum import LoanActionEnum
 from audits.models.loan_audit_model import LoanAuditLog
+from core.pagination import KeysetPagination
 from loans.models import Loan
+from loans.serializers import LOAN_FIELD_SOURCES
+from payments.models import Payment
 
 
 class LoanViewSetTestCase(TestCase):
@@ -55,6 +61,335 @@ class LoanViewSetTestCase(TestCase):
             "1000.00",
         )
 
+    def test_list_query_count_does_not_grow_with_payments(self):
+        for index in range(5):
+            loan = Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                monthly_interest_rate=Decimal("0.02"),
+                ip_address="127.0.0.1",
+                bank=f"Banco {index}",
+                client=f"Cliente {index}",
+            )
+            for _ in range(index + 1):
+                Payment.objects.create(loan=loan, amount=Decimal("10.00"))
+
+        # validador do ETag + página de empréstimos
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("loans-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 6)
+        self.assertEqual(response.data["results"][0]["total_paid"], Decimal("50.00"))
+
+    def _create_aged_loan(self, principal, days):
+        loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal(principal),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Saldo",
+            client="Cliente Saldo",
+        )
+        loan.requested_date = now() - timedelta(days=days)
+        loan.save(update_fields=["requested_date"])
+        return loan
+
+    def test_order_by_largest_outstanding_balance(self):
+        big = self._create_aged_loan("5000.00", 60)
+        medium = self._create_aged_loan("3000.00", 10)
+
+        response = self.client.get(
+            reverse("loans-list"), {"ordering": "-outstanding_balance"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertEqual(ids, [str(big.id), str(medium.id), str(self.loan1.id)])
+
+    def test_filter_by_outstanding_balance_and_days_range(self):
+        big = self._create_aged_loan("5000.00", 60)
+        self._create_aged_loan("3000.00", 10)
+
+        response = self.client.get(
+            reverse("loans-list"),
+            {"outstanding_balance_min": "4000", "days_since_requested_min": "30"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertEqual(ids, [str(big.id)])
+
+    def test_filter_by_total_due_range(self):
+        response = self.client.get(reverse("loans-list"), {"total_due_max": "500"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_fields_param_limits_response_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("loans-list"), {"fields": "id,bank,outstanding_balance"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(response.data["results"][0]), ["id", "bank", "outstanding_balance"]
+        )
+        self.assertEqual(
+            response.data["results"][0]["outstanding_balance"],
+            self.loan1.outstanding_balance,
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("ip_address", queries[-1]["sql"])
+        self.assertNotIn("client", queries[-1]["sql"])
+
+    def test_omit_param_removes_fields(self):
+        response = self.client.get(
+            reverse("loans-detail", args=[self.loan1.id]),
+            {"omit": "compounded_amount,iof,insurance,total_due"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("iof", response.data)
+        self.assertNotIn("total_due", response.data)
+        self.assertIn("outstanding_balance", response.data)
+
+    def test_fields_param_rejects_unknown_fields(self):
+        response = self.client.get(reverse("loans-list"), {"fields": "id,user"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_field_selection_is_rejected(self):
+        omit_all = ",".join(LOAN_FIELD_SOURCES)
+
+        for params in ({"fields": ""}, {"fields": ","}, {"omit": omit_all}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("loans-list"), params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_returns_etag_and_304_when_unchanged(self):
+        url = reverse("loans-detail", args=[self.loan1.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached["ETag"], etag)
+        self.assertFalse(cached.content)
+
+    def test_etag_changes_after_payment(self):
+        url = reverse("loans-detail", args=[self.loan1.id])
+        etag = self.client.get(url)["ETag"]
+
+        Payment.objects.create(loan=self.loan1, amount=Decimal("10.00"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_etag_depends_on_query_params(self):
+        url = reverse("loans-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        response = self.client.get(url, {"fields": "id"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_schedule_is_paginated_by_limit_and_offset(self):
+        url = reverse("loans-schedule", args=[self.loan1.id])
+
+        response = self.client.get(
+            url, {"system": "sac", "installments": 24, "limit": 5, "offset": 5}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 24)
+        self.assertEqual(response.data["system"], "sac")
+        self.assertIsNone(response.data["installment_amount"])
+        self.assertEqual(
+            [row["number"] for row in response.data["results"]], [6, 7, 8, 9, 10]
+        )
+        self.assertIn("offset=10", response.data["next"])
+        self.assertEqual(
+            response.data["results"][0]["due_date"],
+            self.loan1.requested_date.date() + timedelta(days=180),
+        )
+
+    def test_schedule_defaults_to_price_with_financed_amount(self):
+        url = reverse("loans-schedule", args=[self.loan1.id])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["system"], "price")
+        self.assertEqual(response.data["count"], 12)
+        # 1000.00 + seguro padrão (1%) + IOF de 360 dias
+        self.assertEqual(response.data["financed_amount"], "1043.32")
+        payments = {row["payment"] for row in response.data["results"][:-1]}
+        self.assertEqual(payments, {response.data["installment_amount"]})
+
+    def test_schedule_rejects_invalid_params(self):
+        url = reverse("loans-schedule", args=[self.loan1.id])
+
+        for params in ({"system": "foo"}, {"installments": 0}, {"installments": 361}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schedule_of_other_users_loan_is_not_found(self):
+        response = self.client.get(reverse("loans-schedule", args=[self.loan2.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_payoff_quote_for_future_date(self):
+        target = now().date() + timedelta(days=30)
+
+        response = self.client.get(
+            reverse("loans-payoff", args=[self.loan1.id]), {"date": target}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        quote = self.loan1.balances_on(target)
+        self.assertEqual(response.data["days"], quote["days"])
+        self.assertEqual(response.data["total_due"], str(quote["total_due"]))
+        self.assertEqual(
+            response.data["outstanding_balance"], str(quote["outstanding_balance"])
+        )
+
+    def test_payoff_requires_a_date_not_in_the_past(self):
+        url = reverse("loans-payoff", args=[self.loan1.id])
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(url, {"date": now().date() - timedelta(days=1)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_payoff_in_a_single_query(self):
+        loan3 = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("500.00"),
+            monthly_interest_rate=Decimal("0.01"),
+            ip_address="127.0.0.1",
+            bank="Banco C",
+            client="Cliente C",
+        )
+        target = now().date() + timedelta(days=60)
+        data = {
+            "date": target.isoformat(),
+            "loans": [str(loan3.id), str(self.loan2.id), str(self.loan1.id)],
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("loans-payoff"), data=data, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [quote["id"] for quote in response.data["results"]],
+            [str(loan3.id), str(self.loan1.id)],
+        )
+        self.assertEqual(response.data["not_found"], [self.loan2.id])
+        self.assertEqual(
+            response.data["results"][1]["total_due"],
+            str(self.loan1.balances_on(target)["total_due"]),
+        )
+
+    def _walk(self, url, params=None, link="next"):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            pages += 1
+            if not response.data[link]:
+                return ids, pages, response
+            response = self.client.get(response.data[link])
+
+    def test_keyset_pagination_walks_tied_created_at_without_gaps(self):
+        Loan.objects.bulk_create(
+            Loan(
+                user=self.user,
+                principal_amount=Decimal("100.00"),
+                ip_address="127.0.0.1",
+                bank="Banco Lote",
+                client="Cliente Lote",
+            )
+            for _ in range(11)
+        )
+        Loan.objects.filter(user=self.user).update(created_at=now())
+        expected = [
+            str(pk)
+            for pk in Loan.objects.filter(user=self.user)
+            .order_by("-pk")
+            .values_list("pk", flat=True)
+        ]
+
+        ids, pages, last = self._walk(reverse("loans-list"), {"page_size": 5})
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+        previous = self.client.get(last.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in previous.data["results"]], expected[5:10]
+        )
+        self.assertIsNotNone(previous.data["next"])
+        self.assertIsNotNone(previous.data["previous"])
+
+    def test_keyset_pagination_with_ordering_filter_and_ties(self):
+        Loan.objects.bulk_create(
+            Loan(
+                user=self.user,
+                principal_amount=Decimal("500.00"),
+                ip_address="127.0.0.1",
+                bank="Banco Lote",
+                client="Cliente Lote",
+            )
+            for _ in range(6)
+        )
+        expected = [
+            str(pk)
+            for pk in Loan.objects.filter(user=self.user)
+            .order_by("principal_amount", "pk")
+            .values_list("pk", flat=True)
+        ]
+
+        ids, _, _ = self._walk(
+            reverse("loans-list"), {"ordering": "principal_amount", "page_size": 2}
+        )
+        self.assertEqual(ids, expected)
+
+    def test_page_size_is_capped_at_server_maximum(self):
+        Loan.objects.bulk_create(
+            Loan(
+                user=self.user,
+                principal_amount=Decimal("100.00"),
+                ip_address="127.0.0.1",
+                bank="Banco Lote",
+                client="Cliente Lote",
+            )
+            for _ in range(KeysetPagination.max_page_size + 1)
+        )
+
+        response = self.client.get(reverse("loans-list"), {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), KeysetPagination.max_page_size)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse("loans-list"), {"cursor": "invalido"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_of_other_users_loan_is_not_found(self):
+        response = self.client.get(
+            reverse("loans-detail", args=[self.loan2.id]), HTTP_IF_NONE_MATCH="*"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_loan_successfully(self):
         data = {
             "principal_amount": "1500.00",
@@ -62,7 +397,8 @@ class LoanViewSetTestCase(TestCase):
             "bank": "Banco C",
             "client": "Cliente C",
         }
-        response = self.client.post(reverse("loans-list"), data=data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("loans-list"), data=data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
         self.assertEqual(response.data["principal_amount"], "1500.00")
@@ -90,7 +426,8 @@ class LoanViewSetTestCase(TestCase):
             "client": "Cliente D",
         }
 
-        response = self.client.post(reverse("loans-list"), data=data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("loans-list"), data=data)
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         loan = Loan.objects.get(id=response.data["id"])
@@ -1,31 +1,237 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import (OpenApiParameter, extend_schema,
+                                   extend_schema_view)
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from accounts.services import invalidate_account_summary
 from audits.enums import LoanActionEnum
 from audits.services import log_loan_action
+from core.conditional import ConditionalGetMixin, make_etag
+from core.filters import AliasedOrderingFilter
+from core.pagination import ScheduleLimitOffsetPagination
+from core.sparse_fields import SparseFieldsMixin
 
+from . import amortization, engine
+from .filters import LoanFilter
 from .models import Loan
-from .serializers import LoanSerializer
+from .serializers import (LOAN_FIELD_SOURCES, BatchPayoffSerializer,
+                          InstallmentSerializer, LoanReadSerializer,
+                          LoanSerializer, PayoffQuerySerializer,
+                          PayoffQuoteSerializer, ScheduleQuerySerializer)
 
 
-class LoanViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(responses=LoanSerializer(many=True)),
+    retrieve=extend_schema(responses=LoanSerializer),
+)
+class LoanViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     serializer_class = LoanSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["bank", "client", "is_fully_paid", "requested_date"]
+    filter_backends = [DjangoFilterBackend, AliasedOrderingFilter]
+    filterset_class = LoanFilter
+    ordering_fields = [
+        "created_at",
+        "requested_date",
+        "principal_amount",
+        "outstanding_balance",
+        "total_due",
+        "days_since_requested",
+    ]
+    ordering_aliases = {
+        "outstanding_balance": "db_outstanding_balance",
+        "total_due": "db_total_due",
+        "days_since_requested": "db_days_since_requested",
+    }
     ordering = ["-created_at"]
+    sparse_field_sources = LOAN_FIELD_SOURCES
+
+    def get_serializer_class(self):
+        """
+        Leituras usam a representação rápida, com o mesmo formato de saída;
+        escritas continuam validadas por `LoanSerializer`.
+        """
+        if self.action in ("list", "retrieve"):
+            return LoanReadSerializer
+        return LoanSerializer
 
     def get_queryset(self):
         """
-        Filtra os empréstimos para retornar apenas os que pertencem ao usuário
-        autenticado.
+        1. Filtra os empréstimos para retornar apenas os que pertencem ao
+            usuário autenticado.
+        2. Disponibiliza os saldos calculados no banco para filtros; eles só
+            são lidos quando usados na ordenação (exigido pelo cursor).
+        3. Com `?fields=`/`?omit=`, carrega apenas as colunas necessárias
+            para os campos pedidos e para a ordenação.
         """
-        return (
-            Loan.objects.filter(user=self.request.user)
-            .select_related("user")
-            .order_by("-created_at")
+        # 1
+        queryset = Loan.objects.filter(user=self.request.user)
+
+        # 2
+        ordered_by = [
+            term.lstrip("-")
+            for term in AliasedOrderingFilter().get_ordering(
+                self.request, queryset, self
+            )
+        ]
+        annotated = [name for name in ordered_by if name.startswith("db_")]
+        queryset = queryset.with_balances(select=bool(annotated))
+
+        # 3
+        model_ordering = [name for name in ordered_by if name not in annotated]
+        return self.only_sparse_fields(queryset, *model_ordering).order_by(
+            "-created_at"
+        )
+
+    def get_list_etag(self, request):
+        markers = self.filter_queryset(self.get_queryset()).change_markers()
+        return self._make_etag(request, markers)
+
+    def get_retrieve_etag(self, request):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            markers = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: lookup})
+                .change_markers()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+
+        if not markers["count"]:
+            return None
+        return self._make_etag(request, markers)
+
+    def _make_etag(self, request, markers):
+        """
+        O ETag combina os marcadores de alteração com a URL completa
+        (filtros, cursor, campos), o formato da resposta e a data do dia,
+        pois os juros mudam diariamente.
+        """
+        return make_etag(
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            now().date(),
+            *markers.values(),
+        )
+
+    @extend_schema(
+        parameters=[
+            ScheduleQuerySerializer,
+            OpenApiParameter("limit", int),
+            OpenApiParameter("offset", int),
+        ],
+        responses=InstallmentSerializer(many=True),
+    )
+    @action(detail=True, methods=["get"])
+    def schedule(self, request, pk=None):
+        """
+        Tabela de amortização (Price ou SAC) do empréstimo.
+
+        1. Valida o sistema e a quantidade de parcelas.
+        2. Obtém a tabela memoizada para os termos do empréstimo; o valor
+            financiado inclui IOF e seguro.
+        3. Pagina por `limit`/`offset`, calculando apenas as parcelas da
+            página.
+        """
+        # 1
+        params = ScheduleQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        system = params.validated_data["system"]
+        installments = params.validated_data["installments"]
+
+        # 2
+        loan = self.get_object()
+        financed = amortization.financed_amount(
+            loan.principal_amount, loan.insurance_rate, installments
+        )
+        schedule = amortization.amortization_schedule(
+            financed, loan.monthly_interest_rate, installments, system
+        )
+
+        # 3
+        paginator = ScheduleLimitOffsetPagination()
+        page = paginator.paginate_queryset(schedule, request, view=self)
+        serializer = InstallmentSerializer(
+            page, many=True, context={"start_date": loan.requested_date.date()}
+        )
+        response = paginator.get_paginated_response(serializer.data)
+        response.data.update(
+            system=system,
+            installments=installments,
+            financed_amount=str(financed),
+            installment_amount=(
+                str(schedule.installment_amount)
+                if schedule.installment_amount is not None
+                else None
+            ),
+        )
+        return response
+
+    @extend_schema(parameters=[PayoffQuerySerializer], responses=PayoffQuoteSerializer)
+    @action(detail=True, methods=["get"])
+    def payoff(self, request, pk=None):
+        """
+        Cotação de quitação do empréstimo na data `?date=YYYY-MM-DD`.
+        """
+        params = PayoffQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        as_of = params.validated_data["date"]
+
+        loan = self.get_object()
+        quote = {"id": loan.pk, "date": as_of, **loan.balances_on(as_of)}
+        return Response(PayoffQuoteSerializer(quote).data)
+
+    @extend_schema(
+        request=BatchPayoffSerializer, responses=PayoffQuoteSerializer(many=True)
+    )
+    @action(detail=False, methods=["post"], url_path="payoff", url_name="payoff")
+    def batch_payoff(self, request):
+        """
+        Cotações de quitação de vários empréstimos na mesma data.
+
+        1. Valida a data e a lista de empréstimos.
+        2. Calcula a carteira em uma única passada do motor, a partir de uma
+            única leitura das colunas necessárias.
+        3. Retorna as cotações na ordem pedida e os ids não encontrados
+            (inexistentes ou de outro usuário).
+        """
+        # 1
+        params = BatchPayoffSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        as_of = params.validated_data["date"]
+        loan_ids = list(dict.fromkeys(params.validated_data["loans"]))
+
+        # 2
+        portfolio = engine.calculate_queryset(
+            Loan.objects.filter(user=request.user, pk__in=loan_ids).order_by(),
+            as_of=as_of,
+        )
+        columns = ("days", *engine.FINANCIAL_COLUMNS)
+        quotes = {
+            loan_id: {
+                "id": loan_id,
+                "date": as_of,
+                **{name: portfolio[name][index] for name in columns},
+            }
+            for index, loan_id in enumerate(portfolio["id"])
+        }
+
+        # 3
+        return Response(
+            {
+                "date": as_of,
+                "results": PayoffQuoteSerializer(
+                    [quotes[pk] for pk in loan_ids if pk in quotes], many=True
+                ).data,
+                "not_found": [pk for pk in loan_ids if pk not in quotes],
+            }
         )
 
     @transaction.atomic
@@ -34,6 +240,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         1. Obtém o endereço IP do usuário a partir do request.
         2. Salva o empréstimo associando-o ao usuário autenticado e ao IP.
         3. Cria um log de auditoria com informações do empréstimo:
+        4. Invalida o resumo financeiro em cache do usuário após o commit.
         """
         # 1
         ip = self.request.META.get("REMOTE_ADDR", "127.0.0.1")
@@ -53,3 +260,20 @@ class LoanViewSet(viewsets.ModelViewSet):
                 "bank": loan.bank,
             },
         )
+
+        # 4
+        self._invalidate_summary()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._invalidate_summary()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self._invalidate_summary()
+
+    def _invalidate_summary(self):
+        user_id = self.request.user.pk
+        transaction.on_commit(lambda: invalidate_account_summary(user_id))
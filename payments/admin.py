@@ -1,7 +1,7 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
 
-from payments.models import Payment
+from payments.models import Payment, PaymentImport, PaymentIntent
 
 
 @admin.register(Payment)
@@ -16,3 +16,27 @@ class PaymentAdmin(SimpleHistoryAdmin):
     search_fields = ("loan__client", "loan__bank", "loan__user__email")
     list_filter = ("payment_date",)
     readonly_fields = ("created_at",)
+
+
+@admin.register(PaymentImport)
+class PaymentImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "file_name",
+        "status",
+        "line_number",
+        "imported_count",
+        "rejected_count",
+        "updated_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("file_name", "file_key")
+    readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(PaymentIntent)
+class PaymentIntentAdmin(admin.ModelAdmin):
+    list_display = ("id", "loan", "amount", "status", "attempts", "created_at")
+    list_filter = ("status",)
+    search_fields = ("id", "loan__id", "user__email")
+    raw_id_fields = ("loan", "user", "payment")
+    readonly_fields = ("created_at", "updated_at", "claimed_at")
@@ -0,0 +1,121 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from loans.models import Loan
+from payments.usecases import ProcessPaymentUseCase
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+def _count_writes(queries):
+    return sum(
+        1
+        for query in queries
+        if query["sql"].lstrip().upper().startswith(WRITE_PREFIXES)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a amplificação de escrita por pagamento (pagamento, empréstimo, "
+        "auditoria e histórico) com o histórico gravado na transação, adiado "
+        "para o commit e no fluxo em lote. Tudo é desfeito ao final"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--payments",
+            type=int,
+            default=200,
+            help="Pagamentos por cenário",
+        )
+
+    def handle(self, *args, **options):
+        count = options["payments"]
+        if count <= 0:
+            raise CommandError("--payments deve ser maior que zero")
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f"benchmark-{uuid.uuid4().hex}@matera.com",
+                document=uuid.uuid4().hex[:11],
+            )
+            rows = [
+                ("imediato", self._run_single(user, count, defer_history=False)),
+                ("adiado", self._run_single(user, count, defer_history=True)),
+                ("lote", self._run_bulk(user, count)),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'cenário':<10}{'escritas/pag.':>15}{'na transação':>15}"
+            f"{'ms/pag.':>10}{'ms na transação':>18}"
+        )
+        for name, (writes, in_transaction, total_ms, transaction_ms) in rows:
+            self.stdout.write(
+                f"{name:<10}{writes / count:>15.2f}{in_transaction / count:>15.2f}"
+                f"{total_ms / count:>10.3f}{transaction_ms / count:>18.3f}"
+            )
+
+    def _loan(self, user):
+        return Loan.objects.create(
+            user=user,
+            principal_amount=Decimal("1000000.00"),
+            ip_address="127.0.0.1",
+            bank="Benchmark",
+            client="Benchmark",
+        )
+
+    def _measure(self, run):
+        """
+        Executa `run` dentro da transação externa do comando e, em seguida,
+        os callbacks de `on_commit` que ele agendou, como no commit real.
+        Retorna as escritas totais, as escritas feitas na transação e os
+        tempos (ms) total e na transação.
+        """
+        pending = len(connection.run_on_commit)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        committed = time.perf_counter()
+        in_transaction = _count_writes(queries.captured_queries)
+
+        callbacks = connection.run_on_commit[pending:]
+        del connection.run_on_commit[pending:]
+        with CaptureQueriesContext(connection) as queries:
+            for _, callback, _ in callbacks:
+                callback()
+        finished = time.perf_counter()
+
+        return (
+            in_transaction + _count_writes(queries.captured_queries),
+            in_transaction,
+            (finished - started) * 1000,
+            (committed - started) * 1000,
+        )
+
+    def _run_single(self, user, count, defer_history):
+        """`count` pagamentos, um a um, pelo fluxo unitário."""
+        use_case = ProcessPaymentUseCase(defer_history=defer_history)
+        loan = self._loan(user)
+        totals = [0, 0, 0.0, 0.0]
+        for _ in range(count):
+            measured = self._measure(
+                lambda: use_case.handle(loan=loan, user=user, amount=Decimal("10.00"))
+            )
+            totals = [total + value for total, value in zip(totals, measured)]
+        return totals
+
+    def _run_bulk(self, user, count):
+        """Os mesmos pagamentos em um único `handle_bulk`."""
+        loan = self._loan(user)
+        items = [{"loan": loan.pk, "amount": Decimal("10.00")} for _ in range(count)]
+        return self._measure(
+            lambda: ProcessPaymentUseCase().handle_bulk(items, user=user)
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from payments.services import CNABPaymentImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa pagamentos de um arquivo de retorno bancário posicional "
+        "(layout inspirado no CNAB 400), em lotes e com retomada automática"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Caminho do arquivo de retorno")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantidade de pagamentos por lote/transação",
+        )
+        parser.add_argument(
+            "--user",
+            help="E-mail do operador registrado como autor dos pagamentos",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size deve ser maior que zero")
+
+        user = None
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        importer = CNABPaymentImporter(
+            batch_size=options["batch_size"],
+            user=user,
+            on_rejection=self._report_rejection,
+        )
+        try:
+            stats = importer.run(options["path"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if stats["already_completed"]:
+            self.stdout.write(self.style.WARNING("Arquivo já importado."))
+            return
+
+        if stats["resumed_from"] > 1:
+            self.stdout.write(f"Retomado após a linha {stats['resumed_from']}.")
+
+        elapsed = stats["elapsed"]
+        rate = stats["lines"] / elapsed if elapsed > 0 else stats["lines"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{stats['lines']} linha(s) processada(s): "
+                f"{stats['imported']} pagamento(s) importado(s), "
+                f"{stats['rejected']} recusado(s) em {elapsed:.2f}s "
+                f"({rate:.0f} linhas/s)"
+            )
+        )
+
+    def _report_rejection(self, line_number, reason):
+        self.stderr.write(f"Linha {line_number}: {reason}")
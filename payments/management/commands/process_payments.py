@@ -0,0 +1,137 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from payments.services import (claim_intents, process_intent,
+                               release_stale_claims)
+
+
+def _process_in_thread(intent_id, claim_token):
+    """Cada thread usa a própria conexão; ela é fechada ao fim da tarefa."""
+    try:
+        return process_intent(intent_id, claim_token)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa pagamentos assíncronos (PaymentIntent) reservando lotes da "
+        "fila e executando-os em um pool de threads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Quantidade de intenções reservadas por lote",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help=(
+                "Threads de processamento (1 processa na thread principal; "
+                "no SQLite o processamento é sempre na thread principal)"
+            ),
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Espera, em segundos, quando a fila está vazia",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=300,
+            help="Segundos após os quais uma reserva não concluída volta à fila",
+        )
+        parser.add_argument(
+            "--release-interval",
+            type=float,
+            default=30.0,
+            help=(
+                "Intervalo, em segundos, entre as devoluções à fila de reservas "
+                "expiradas (de workers interrompidos)"
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa a fila disponível e encerra",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0 or options["workers"] <= 0:
+            raise CommandError("--batch-size e --workers devem ser maiores que zero")
+
+        workers = options["workers"]
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite serializa as escritas: processando na thread principal."
+                )
+            )
+            workers = 1
+
+        totals = Counter()
+        started = time.monotonic()
+        executor = None
+        if workers > 1:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        stale_after = timedelta(seconds=options["stale_after"])
+        released_at = None
+        try:
+            while True:
+                # Reservas de workers interrompidos voltam à fila enquanto este
+                # worker roda, não apenas quando ele inicia
+                if (
+                    released_at is None
+                    or time.monotonic() - released_at >= options["release_interval"]
+                ):
+                    released = release_stale_claims(stale_after)
+                    released_at = time.monotonic()
+                    if released:
+                        self.stdout.write(
+                            f"{released} reserva(s) expirada(s) devolvida(s) à fila."
+                        )
+
+                claim_token, intent_ids = claim_intents(options["batch_size"])
+                if not intent_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                if executor:
+                    statuses = executor.map(
+                        _process_in_thread, intent_ids, repeat(claim_token)
+                    )
+                else:
+                    statuses = map(process_intent, intent_ids, repeat(claim_token))
+                totals.update(statuses)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        elapsed = time.monotonic() - started
+        processed = sum(totals.values())
+        rate = processed / elapsed if elapsed > 0 else processed
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{processed} intenção(ões) processada(s): "
+                f"{totals['succeeded']} concluída(s), {totals['failed']} falha(s), "
+                f"{totals['pending']} devolvida(s) à fila em {elapsed:.2f}s "
+                f"({rate:.0f}/s)"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.services import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove as respostas guardadas por Idempotency-Key mais antigas que "
+        "IDEMPOTENCY_KEY_TTL_HOURS"
+    )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{deleted} chave(s) expirada(s) removida(s) "
+                f"(TTL: {settings.IDEMPOTENCY_KEY_TTL_HOURS}h)"
+            )
+        )
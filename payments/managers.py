@@ -0,0 +1,45 @@
+from django.apps import apps
+from django.db import models, transaction
+
+# Campos de `Payment` que compõem os totais desnormalizados do empréstimo
+TOTAL_FIELDS = {"loan", "loan_id", "amount", "payment_date"}
+
+
+class PaymentQuerySet(models.QuerySet):
+    """
+    `delete()` e `update()` em lote não passam por `Payment.save`/`delete`;
+    aqui eles reconstroem os totais dos empréstimos afetados na mesma
+    transação (inclui a ação "excluir selecionados" do admin).
+    """
+
+    def delete(self):
+        loan_ids = set(self.values_list("loan_id", flat=True))
+        with transaction.atomic(using=self.db):
+            result = super().delete()
+            self._sync_loans(loan_ids)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        if not TOTAL_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+
+        payments = dict(self.values_list("pk", "loan_id"))
+        with transaction.atomic(using=self.db):
+            updated = super().update(**kwargs)
+            loan_ids = set(payments.values()) | set(
+                self.model.objects.filter(pk__in=payments).values_list(
+                    "loan_id", flat=True
+                )
+            )
+            self._sync_loans(loan_ids)
+        return updated
+
+    update.alters_data = True
+
+    def _sync_loans(self, loan_ids):
+        if loan_ids:
+            Loan = apps.get_model("loans", "Loan")
+            Loan.objects.filter(pk__in=loan_ids).sync_payment_totals()
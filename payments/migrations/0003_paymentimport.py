@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0002_historicalpayment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_key", models.CharField(max_length=64, unique=True)),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Em andamento"),
+                            ("completed", "Concluída"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("line_number", models.PositiveIntegerField(default=0)),
+                ("byte_offset", models.PositiveBigIntegerField(default=0)),
+                ("imported_count", models.PositiveIntegerField(default=0)),
+                ("rejected_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0006_composite_indexes"),
+        ("payments", "0005_paymentintent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["loan", "created_at", "amount"], name="payment_loan_created_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="loan",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="payments",
+                to="loans.loan",
+            ),
+        ),
+    ]
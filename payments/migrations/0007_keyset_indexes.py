@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("loans", "0007_keyset_indexes"),
+        ("payments", "0006_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="payment",
+            name="payment_loan_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["loan", "created_at", "id", "amount"],
+                name="payment_loan_created_idx",
+            ),
+        ),
+    ]
@@ -1,18 +1,26 @@
 import uuid
 from decimal import Decimal
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
-from simple_history.models import HistoricalRecords
 
+from accounts.models import User
+from core.history import BufferedHistoricalRecords
 from loans.models import Loan
 
+from .managers import PaymentQuerySet
+
 
 class Payment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
+    # Indexado por `payment_loan_created_idx`, que tem `loan` como prefixo
     loan = models.ForeignKey(
-        Loan, on_delete=models.PROTECT, db_index=True, related_name="payments"
+        Loan,
+        on_delete=models.PROTECT,
+        db_index=False,
+        related_name="payments",
     )
     payment_date = models.DateTimeField(default=timezone.now)
     amount = models.DecimalField(
@@ -21,10 +29,150 @@ class Payment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+
+    objects = PaymentQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # `id` desempata a paginação por chave (`created_at`, `id`);
+            # `amount` no índice cobre `Sum("amount")` por empréstimo sem
+            # leitura da tabela (INCLUDE só existe no PostgreSQL)
+            models.Index(
+                fields=["loan", "created_at", "id", "amount"],
+                name="payment_loan_created_idx",
+            )
+        ]
 
     def __str__(self):
         return f"Payment {self.id}"
+
+    def save(self, *args, **kwargs):
+        """
+        Mantém os totais desnormalizados do empréstimo. Inserções somam o
+        valor em O(1); edições, mais raras, reconstroem os totais dos
+        empréstimos afetados.
+        """
+        adding = self._state.adding
+        previous_loan_id = None
+        if not adding:
+            previous_loan_id = (
+                Payment.objects.filter(pk=self.pk)
+                .values_list("loan_id", flat=True)
+                .first()
+            )
+
+        super().save(*args, **kwargs)
+
+        if adding:
+            self.loan.apply_payment(self)
+        else:
+            Loan.objects.filter(
+                pk__in={self.loan_id, previous_loan_id}
+            ).sync_payment_totals()
+
+    def delete(self, *args, **kwargs):
+        loan_id = self.loan_id
+        result = super().delete(*args, **kwargs)
+        Loan.objects.filter(pk=loan_id).sync_payment_totals()
+        return result
+
+
+class PaymentImport(models.Model):
+    """
+    Progresso da importação de um arquivo de retorno bancário. Atualizado na
+    mesma transação de cada lote, permite retomar a importação a partir do
+    último lote confirmado.
+    """
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Em andamento"
+        COMPLETED = "completed", "Concluída"
+
+    file_key = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.RUNNING
+    )
+    line_number = models.PositiveIntegerField(default=0)
+    byte_offset = models.PositiveBigIntegerField(default=0)
+    imported_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Resposta de um `POST /api/payments/` enviado com o cabeçalho
+    `Idempotency-Key`, reenviada sem reprocessamento quando a mesma chave é
+    repetida pelo usuário. Registros mais antigos que
+    `IDEMPOTENCY_KEY_TTL_HOURS` são removidos por `purge_idempotency_keys`.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return f"Idempotency-Key {self.key}"
+
+
+class PaymentIntent(models.Model):
+    """
+    Pagamento solicitado com `?async=true`, processado em segundo plano pelo
+    comando `process_payments`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pendente"
+        PROCESSING = "processing", "Processando"
+        SUCCEEDED = "succeeded", "Concluído"
+        FAILED = "failed", "Falhou"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.PROTECT, related_name="payment_intents"
+    )
+    loan = models.ForeignKey(
+        Loan, on_delete=models.PROTECT, related_name="payment_intents"
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    payment = models.ForeignKey(
+        Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="payment_intent_queue_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"PaymentIntent {self.id} ({self.status})"
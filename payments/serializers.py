@@ -1,6 +1,8 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 
-from payments.models import Payment
+from payments.models import Payment, PaymentIntent
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -8,3 +10,62 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ["id", "loan", "payment_date", "amount"]
         read_only_fields = ["id", "payment_date"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get("fields")
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+PAYMENT_FIELD_SOURCES = {
+    "id": ("id",),
+    "loan": ("loan",),
+    "payment_date": ("payment_date",),
+    "amount": ("amount",),
+}
+"""Colunas de `Payment` necessárias para cada campo da resposta."""
+
+
+class BulkPaymentItemSerializer(serializers.Serializer):
+    loan = serializers.UUIDField()
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+
+class BulkPaymentSerializer(serializers.Serializer):
+    """Entrada de `POST /api/payments/bulk/`."""
+
+    MAX_ITEMS = 5000
+
+    payments = serializers.ListField(
+        child=BulkPaymentItemSerializer(), allow_empty=False, max_length=MAX_ITEMS
+    )
+
+
+class BulkPaymentResultSerializer(serializers.Serializer):
+    """Resultado de um item do lote: `created` ou `rejected` com o motivo."""
+
+    loan = serializers.UUIDField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    status = serializers.CharField()
+    payment_id = serializers.UUIDField(allow_null=True)
+    error = serializers.CharField(allow_null=True)
+
+
+class PaymentIntentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PaymentIntent
+        fields = [
+            "id",
+            "loan",
+            "amount",
+            "status",
+            "payment",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,6 @@
+from .cnab_importer import CNABPaymentImporter, parse_detail  # noqa: F401
+from .idempotency import (claim_key, get_idempotency_key,  # noqa: F401
+                          purge_expired_keys, replay_response,
+                          request_fingerprint, store_response)
+from .payment_queue import (claim_intents, enqueue_payment,  # noqa: F401
+                            process_intent, release_stale_claims)
@@ -0,0 +1,209 @@
+"""
+Importação de arquivos de retorno bancário em layout posicional simplificado,
+inspirado no CNAB 400 (posições a partir de 1, inclusivas):
+
+Header (tipo 0)
+    001-001  tipo de registro "0"
+    002-004  código do banco
+    005-012  data de geração (DDMMAAAA)
+    013-018  número sequencial do arquivo
+
+Detalhe (tipo 1)
+    001-001  tipo de registro "1"
+    002-033  identificação do empréstimo (UUID em 32 dígitos hexadecimais)
+    034-041  data do crédito (DDMMAAAA)
+    042-054  valor pago em centavos (13 dígitos)
+    055-079  nosso número (referência do banco)
+
+Trailer (tipo 9)
+    001-001  tipo de registro "9"
+
+O arquivo é lido linha a linha, com memória constante, e os pagamentos são
+processados em lotes por `ProcessPaymentUseCase.handle_bulk`. O progresso é
+gravado em `PaymentImport` na mesma transação de cada lote, de modo que uma
+importação interrompida é retomada a partir do último lote confirmado.
+"""
+
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.timezone import make_aware
+
+from payments.models import PaymentImport
+from payments.usecases import ProcessPaymentUseCase
+
+HEADER = "0"
+DETAIL = "1"
+TRAILER = "9"
+ENCODING = "latin-1"
+
+
+def _date(value):
+    return datetime.strptime(value, "%d%m%Y")
+
+
+def parse_detail(line: str) -> dict:
+    """
+    Converte um registro de detalhe em item de pagamento. Levanta
+    `ValueError` com o motivo se algum campo for inválido.
+    """
+    try:
+        loan = uuid.UUID(hex=line[1:33])
+    except ValueError:
+        raise ValueError("Identificação do empréstimo inválida.") from None
+
+    try:
+        payment_date = make_aware(_date(line[33:41]))
+    except ValueError:
+        raise ValueError("Data do crédito inválida.") from None
+
+    cents = line[41:54]
+    if len(cents) != 13 or not cents.isdigit() or int(cents) == 0:
+        raise ValueError("Valor pago inválido.")
+
+    return {
+        "loan": loan,
+        "amount": Decimal(cents).scaleb(-2),
+        "payment_date": payment_date,
+        "bank_reference": line[54:79].strip(),
+    }
+
+
+def read_lines(stream, offset=0, line_number=0):
+    """
+    Lê `stream` (binário) a partir de `offset`, gerando
+    `(número da linha, offset após a linha, linha decodificada)`.
+    """
+    stream.seek(offset)
+    for raw in iter(stream.readline, b""):
+        offset += len(raw)
+        line_number += 1
+        yield line_number, offset, raw.decode(ENCODING).rstrip("\r\n")
+
+
+class CNABPaymentImporter:
+    """
+    Importa um arquivo de retorno em lotes de `batch_size` pagamentos.
+
+    `user` (opcional) é registrado como autor nos logs e históricos.
+    `on_rejection(line_number, reason)` é chamado para cada registro
+    recusado, sem acumulá-los em memória.
+    """
+
+    def __init__(self, batch_size=500, user=None, on_rejection=None):
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+        self.batch_size = batch_size
+        self.user = user
+        self.on_rejection = on_rejection or (lambda line_number, reason: None)
+        self.usecase = ProcessPaymentUseCase()
+
+    def run(self, path) -> dict:
+        """
+        1. Lê o header e identifica o arquivo pelo hash do header.
+        2. Recupera o ponto de controle; arquivos concluídos são ignorados.
+        3. Percorre os registros a partir do ponto de controle, processando
+            cada lote em uma transação junto com a atualização do progresso.
+        4. Marca a importação como concluída e retorna as estatísticas.
+        """
+        started = time.monotonic()
+
+        with open(path, "rb") as stream:
+            # 1
+            header = stream.readline()
+            if not header.decode(ENCODING).startswith(HEADER):
+                raise ValueError("O arquivo não começa com um header (tipo 0).")
+
+            # 2
+            checkpoint, _ = PaymentImport.objects.get_or_create(
+                file_key=hashlib.sha256(header.rstrip(b"\r\n")).hexdigest(),
+                defaults={
+                    "file_name": str(path),
+                    "line_number": 1,
+                    "byte_offset": len(header),
+                },
+            )
+            stats = {
+                "resumed_from": checkpoint.line_number,
+                "lines": 0,
+                "imported": 0,
+                "rejected": 0,
+                "already_completed": (
+                    checkpoint.status == PaymentImport.Status.COMPLETED
+                ),
+            }
+            if stats["already_completed"]:
+                return self._finish(stats, started)
+
+            # 3
+            batch, parse_errors = [], []
+            position = (checkpoint.line_number, checkpoint.byte_offset)
+            lines = read_lines(stream, checkpoint.byte_offset, checkpoint.line_number)
+            for line_number, offset, line in lines:
+                position = (line_number, offset)
+                stats["lines"] += 1
+                if line.startswith(TRAILER):
+                    break
+                if not line.strip():
+                    continue
+
+                if not line.startswith(DETAIL):
+                    parse_errors.append((line_number, "Tipo de registro inválido."))
+                else:
+                    try:
+                        batch.append((line_number, parse_detail(line)))
+                    except ValueError as exc:
+                        parse_errors.append((line_number, str(exc)))
+
+                if len(batch) >= self.batch_size:
+                    self._flush(checkpoint, batch, parse_errors, position, stats)
+                    batch, parse_errors = [], []
+
+            self._flush(checkpoint, batch, parse_errors, position, stats)
+
+        # 4
+        checkpoint.status = PaymentImport.Status.COMPLETED
+        checkpoint.save(update_fields=["status", "updated_at"])
+        return self._finish(stats, started)
+
+    def _flush(self, checkpoint, batch, parse_errors, position, stats):
+        """Processa um lote e avança o ponto de controle na mesma transação."""
+        rejections = list(parse_errors)
+        imported = 0
+
+        with transaction.atomic():
+            if batch:
+                results = self.usecase.handle_bulk(
+                    [item for _, item in batch], user=self.user, system=True
+                )
+                for (line_number, _), result in zip(batch, results, strict=True):
+                    if result["status"] == "created":
+                        imported += 1
+                    else:
+                        rejections.append((line_number, result["error"]))
+
+            checkpoint.line_number, checkpoint.byte_offset = position
+            checkpoint.imported_count += imported
+            checkpoint.rejected_count += len(rejections)
+            checkpoint.save(
+                update_fields=[
+                    "line_number",
+                    "byte_offset",
+                    "imported_count",
+                    "rejected_count",
+                    "updated_at",
+                ]
+            )
+
+        stats["imported"] += imported
+        stats["rejected"] += len(rejections)
+        for line_number, reason in sorted(rejections):
+            self.on_rejection(line_number, reason)
+
+    def _finish(self, stats, started):
+        stats["elapsed"] = time.monotonic() - started
+        return stats
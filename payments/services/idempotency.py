@@ -0,0 +1,97 @@
+"""
+Deduplicação de `POST /api/payments/` pelo cabeçalho `Idempotency-Key`.
+
+A chave é registrada na mesma transação do pagamento, antes do caso de uso:
+uma requisição concorrente com a mesma chave espera apenas pelo índice
+único (não pelo bloqueio do empréstimo) e, após o commit da primeira,
+recebe a resposta armazenada.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from payments.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key já utilizada com outra requisição."
+    default_code = "idempotency_key_reused"
+
+
+def _cutoff():
+    return now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def get_idempotency_key(request):
+    """Lê e valida o cabeçalho; retorna `None` se ausente."""
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValidationError(
+            {
+                "detail": f"{IDEMPOTENCY_HEADER} deve ter de 1 a {MAX_KEY_LENGTH} caracteres."
+            }
+        )
+    return key
+
+
+def request_fingerprint(data) -> str:
+    """Hash do corpo da requisição, para detectar chaves reaproveitadas."""
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay_response(user, key, fingerprint):
+    """
+    Retorna a resposta armazenada para a chave, ou `None` se não houver
+    registro válido. Registros expirados são descartados.
+    """
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.created_at < _cutoff():
+        record.delete()
+        return None
+    if record.request_hash != fingerprint:
+        raise IdempotencyKeyReused()
+
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Registra a chave (deve rodar dentro da transação do pagamento). Levanta
+    `IntegrityError` se outra requisição já a registrou.
+    """
+    return IdempotencyKey.objects.create(user=user, key=key, request_hash=fingerprint)
+
+
+def store_response(record, response):
+    record.response_status = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=["response_status", "response_body"])
+
+
+def purge_expired_keys():
+    """Remove as chaves mais antigas que o TTL; retorna a quantidade."""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=_cutoff()).delete()
+    return deleted
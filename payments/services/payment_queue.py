@@ -0,0 +1,154 @@
+"""
+Fila de pagamentos assíncronos sobre a tabela `PaymentIntent`.
+
+A API apenas registra a intenção (sem transação longa nem bloqueio do
+empréstimo) e o comando `process_payments` reserva lotes de intenções
+pendentes e os processa com `ProcessPaymentUseCase`.
+
+Reserva de lotes: no PostgreSQL, `SELECT ... FOR UPDATE SKIP LOCKED`
+permite vários workers sem disputa pelas mesmas linhas. Em bancos sem
+suporte (SQLite), os candidatos são reservados com um UPDATE condicional
+(`status = pending`) marcado com um token único da reserva, e somente as
+linhas efetivamente marcadas com o token são processadas.
+
+Cada intenção só é paga pelo worker que detém a reserva: `process_intent`
+renova `claimed_at` ao iniciar e bloqueia a linha (status `processing` e o
+token da reserva) na transação do pagamento. Uma reserva expirada e
+assumida por outro worker não é paga de novo.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.timezone import now
+from rest_framework.exceptions import APIException, PermissionDenied
+
+from payments.models import PaymentIntent
+from payments.usecases import ProcessPaymentUseCase, error_message
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_payment(loan, user, amount, ip_address=None) -> PaymentIntent:
+    """
+    Registra um pagamento para processamento assíncrono. Apenas a
+    titularidade é verificada aqui; as demais regras são aplicadas pelo
+    worker, no momento do processamento.
+    """
+    if loan.user_id != user.pk:
+        raise PermissionDenied("Você não tem permissão para pagar este empréstimo.")
+    return PaymentIntent.objects.create(
+        user=user, loan=loan, amount=amount, ip_address=ip_address
+    )
+
+
+def claim_intents(batch_size) -> tuple:
+    """
+    Reserva até `batch_size` intenções pendentes e retorna o token da
+    reserva e os ids reservados.
+    """
+    token = uuid.uuid4().hex
+    pending = PaymentIntent.objects.filter(
+        status=PaymentIntent.Status.PENDING
+    ).order_by("created_at")
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        candidates = list(pending.values_list("pk", flat=True)[:batch_size])
+
+        PaymentIntent.objects.filter(
+            pk__in=candidates, status=PaymentIntent.Status.PENDING
+        ).update(
+            status=PaymentIntent.Status.PROCESSING,
+            claim_token=token,
+            claimed_at=now(),
+            attempts=F("attempts") + 1,
+        )
+
+    return token, list(
+        PaymentIntent.objects.filter(claim_token=token)
+        .order_by("created_at")
+        .values_list("pk", flat=True)
+    )
+
+
+def release_stale_claims(older_than: timedelta) -> int:
+    """
+    Devolve à fila intenções reservadas há mais de `older_than` (worker
+    interrompido). Retorna a quantidade liberada.
+    """
+    return PaymentIntent.objects.filter(
+        status=PaymentIntent.Status.PROCESSING,
+        claimed_at__lt=now() - older_than,
+    ).update(status=PaymentIntent.Status.PENDING, claim_token="")
+
+
+def process_intent(intent_id, claim_token) -> str:
+    """
+    Processa uma intenção reservada com `claim_token` e retorna o status
+    final.
+
+    1. Renova `claimed_at`: o prazo de expiração conta do início do
+        processamento da intenção, não da reserva do lote.
+    2. Executa o pagamento e marca a intenção como concluída na mesma
+        transação, com a linha da intenção bloqueada. Se a reserva expirou
+        e foi liberada (ou assumida por outro worker), nada é pago.
+    3. Recusas de negócio (saldo excedido, empréstimo quitado...) marcam a
+        intenção como falha, com o motivo.
+    4. Erros inesperados devolvem a intenção à fila até `MAX_ATTEMPTS`
+        tentativas.
+    """
+    claimed = PaymentIntent.objects.filter(
+        pk=intent_id, status=PaymentIntent.Status.PROCESSING, claim_token=claim_token
+    )
+
+    # 1
+    if not claimed.update(claimed_at=now()):
+        return _current_status(intent_id)
+
+    try:
+        # 2
+        with transaction.atomic():
+            intent = (
+                claimed.select_for_update(of=("self",))
+                .select_related("loan", "user")
+                .first()
+            )
+            if intent is None:
+                return _current_status(intent_id)
+
+            intent.payment = ProcessPaymentUseCase().handle(
+                loan=intent.loan,
+                user=intent.user,
+                amount=intent.amount,
+                ip_address=intent.ip_address,
+            )
+            intent.status = PaymentIntent.Status.SUCCEEDED
+            intent.error = ""
+            intent.save(update_fields=["payment", "status", "error", "updated_at"])
+            return intent.status
+    except APIException as exc:
+        # 3
+        status = PaymentIntent.Status.FAILED
+        error = error_message(exc)
+    except Exception as exc:
+        # 4
+        attempts = claimed.values_list("attempts", flat=True).first()
+        status = (
+            PaymentIntent.Status.PENDING
+            if attempts is not None and attempts < MAX_ATTEMPTS
+            else PaymentIntent.Status.FAILED
+        )
+        error = f"{type(exc).__name__}: {exc}"
+
+    if not claimed.update(status=status, error=error, updated_at=now()):
+        return _current_status(intent_id)
+    return status
+
+
+def _current_status(intent_id) -> str:
+    """Status atual de uma intenção cuja reserva já não é deste worker."""
+    return PaymentIntent.objects.values_list("status", flat=True).get(pk=intent_id)
@@ -1,9 +1,15 @@
 import datetime
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.utils.timezone import make_aware
+from django.utils.timezone import make_aware, now
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -11,7 +17,8 @@ from accounts.models import User
 from audits.enums.loan_audit_enum import LoanActionEnum
 from audits.models.loan_audit_model import LoanAuditLog
 from loans.models import Loan
-from payments.models import Payment
+from payments import views
+from payments.models import IdempotencyKey, Payment, PaymentIntent
 
 
 class PaymentViewSetTestCase(TestCase):
@@ -48,10 +55,11 @@ class PaymentViewSetTestCase(TestCase):
         )
 
     def test_create_payment_successfully(self):
-        response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": "300.00"},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.loan.id), "amount": "300.00"},
+            )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Payment.objects.count(), 1)
 
@@ -62,10 +70,11 @@ class PaymentViewSetTestCase(TestCase):
         self.assertEqual(logs.first().performed_by, self.user)
 
     def test_user_cannot_create_payment_for_another_users_loan(self):
-        response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.other_loan.id), "amount": "300.00"},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.other_loan.id), "amount": "300.00"},
+            )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(Payment.objects.count(), 0)
 
@@ -73,24 +82,26 @@ class PaymentViewSetTestCase(TestCase):
         self.assertEqual(logs.count(), 0)
 
     def test_create_loan_and_fully_pay_it(self):
-        loan_response = self.client.post(
-            reverse("loans-list"),
-            {
-                "principal_amount": "1000.00",
-                "monthly_interest_rate": "0.02",
-                "bank": "Banco Teste",
-                "client": "Cliente Teste",
-            },
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            loan_response = self.client.post(
+                reverse("loans-list"),
+                {
+                    "principal_amount": "1000.00",
+                    "monthly_interest_rate": "0.02",
+                    "bank": "Banco Teste",
+                    "client": "Cliente Teste",
+                },
+            )
         self.assertEqual(loan_response.status_code, status.HTTP_201_CREATED)
         loan_id = loan_response.data["id"]
         loan = Loan.objects.get(id=loan_id)
         total_due = loan.total_due.quantize(Decimal("0.01"))
 
-        payment_response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(loan.id), "amount": str(total_due)},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            payment_response = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(loan.id), "amount": str(total_due)},
+            )
         self.assertEqual(payment_response.status_code, status.HTTP_201_CREATED)
         loan.refresh_from_db()
         self.assertTrue(loan.is_fully_paid)
@@ -104,10 +115,11 @@ class PaymentViewSetTestCase(TestCase):
         self.loan.is_fully_paid = True
         self.loan.save()
 
-        response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": "100.00"},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.loan.id), "amount": "100.00"},
+            )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
         logs = LoanAuditLog.objects.filter(loan=self.loan)
@@ -126,10 +138,11 @@ class PaymentViewSetTestCase(TestCase):
         total_due = self.loan.total_due
         Payment.objects.create(loan=self.loan, amount=total_due - Decimal("10.00"))
 
-        response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": "20.00"},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.loan.id), "amount": "20.00"},
+            )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
         logs = LoanAuditLog.objects.filter(
@@ -142,18 +155,19 @@ class PaymentViewSetTestCase(TestCase):
         total_due = self.loan.total_due
         part = (total_due / 3).quantize(Decimal("0.01"))
 
-        for _ in range(2):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(2):
+                response = self.client.post(
+                    reverse("payments-list"),
+                    {"loan": str(self.loan.id), "amount": str(part)},
+                )
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            remaining = (total_due - part * 2).quantize(Decimal("0.01"))
             response = self.client.post(
                 reverse("payments-list"),
-                {"loan": str(self.loan.id), "amount": str(part)},
+                {"loan": str(self.loan.id), "amount": str(remaining)},
             )
-            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-
-        remaining = (total_due - part * 2).quantize(Decimal("0.01"))
-        response = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": str(remaining)},
-        )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
         self.loan.refresh_from_db()
@@ -168,14 +182,15 @@ class PaymentViewSetTestCase(TestCase):
         total_due = self.loan.total_due
         half = (total_due / 2).quantize(Decimal("0.01"))
 
-        response_1 = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": str(half)},
-        )
-        response_2 = self.client.post(
-            reverse("payments-list"),
-            {"loan": str(self.loan.id), "amount": str(half + Decimal("0.01"))},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response_1 = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.loan.id), "amount": str(half)},
+            )
+            response_2 = self.client.post(
+                reverse("payments-list"),
+                {"loan": str(self.loan.id), "amount": str(half + Decimal("0.01"))},
+            )
 
         self.assertEqual(response_1.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response_2.status_code, status.HTTP_400_BAD_REQUEST)
@@ -184,3 +199,181 @@ class PaymentViewSetTestCase(TestCase):
             loan=self.loan, action=LoanActionEnum.PAYMENT
         )
         self.assertEqual(logs.count(), 1)
+
+    def test_list_payments_with_sparse_fields(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("500.00"))
+
+        response = self.client.get(reverse("payments-list"), {"fields": "id,amount"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["results"][0]), ["id", "amount"])
+
+        response = self.client.get(reverse("payments-list"), {"omit": "loan"})
+
+        self.assertEqual(
+            list(response.data["results"][0]), ["id", "payment_date", "amount"]
+        )
+
+    def test_list_payments_paginates_bulk_created_ties_by_page_size(self):
+        Payment.objects.bulk_create(
+            Payment(loan=self.loan, amount=Decimal("1.00")) for _ in range(5)
+        )
+        Payment.objects.filter(loan=self.loan).update(created_at=now())
+        expected = [
+            str(pk)
+            for pk in Payment.objects.filter(loan=self.loan)
+            .order_by("-pk")
+            .values_list("pk", flat=True)
+        ]
+
+        ids = []
+        response = self.client.get(
+            reverse("payments-list"), {"page_size": 2, "fields": "id"}
+        )
+        while True:
+            ids.extend(item["id"] for item in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(ids, expected)
+
+    def test_bulk_payments_return_per_item_results(self):
+        data = {
+            "payments": [
+                {"loan": str(self.loan.id), "amount": "100.00"},
+                {"loan": str(self.other_loan.id), "amount": "100.00"},
+                {"loan": "00000000-0000-0000-0000-000000000000", "amount": "1.00"},
+                {"loan": str(self.loan.id), "amount": "50.00"},
+            ]
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("payments-bulk"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["rejected"], 2)
+        statuses = [item["status"] for item in response.data["results"]]
+        self.assertEqual(statuses, ["created", "rejected", "rejected", "created"])
+        self.assertEqual(
+            response.data["results"][2]["error"], "Empréstimo não encontrado."
+        )
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("150.00"))
+        self.assertEqual(
+            LoanAuditLog.objects.filter(
+                loan=self.loan, action=LoanActionEnum.PAYMENT
+            ).count(),
+            2,
+        )
+
+    def test_bulk_payments_reject_malformed_payload(self):
+        data = {"payments": [{"loan": str(self.loan.id), "amount": "-1.00"}]}
+
+        response = self.client.post(reverse("payments-bulk"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_idempotency_key_replays_stored_response(self):
+        data = {"loan": str(self.loan.id), "amount": "300.00"}
+        headers = {"Idempotency-Key": "retry-1"}
+
+        first = self.client.post(reverse("payments-list"), data, headers=headers)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(reverse("payments-list"), data, headers=headers)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_idempotency_key_reused_with_other_payload_is_rejected(self):
+        headers = {"Idempotency-Key": "retry-2"}
+        self.client.post(
+            reverse("payments-list"),
+            {"loan": str(self.loan.id), "amount": "300.00"},
+            headers=headers,
+        )
+
+        response = self.client.post(
+            reverse("payments-list"),
+            {"loan": str(self.loan.id), "amount": "301.00"},
+            headers=headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_expired_idempotency_key_is_processed_again(self):
+        data = {"loan": str(self.loan.id), "amount": "100.00"}
+        headers = {"Idempotency-Key": "retry-3"}
+        self.client.post(reverse("payments-list"), data, headers=headers)
+        IdempotencyKey.objects.update(created_at=now() - timedelta(days=2))
+
+        response = self.client.post(reverse("payments-list"), data, headers=headers)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Payment.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_concurrent_idempotency_key_returns_winner_response(self):
+        data = {"loan": str(self.loan.id), "amount": "300.00"}
+        headers = {"Idempotency-Key": "retry-4"}
+        first = self.client.post(reverse("payments-list"), data, headers=headers)
+
+        # Simula a requisição concorrente que não viu a chave na leitura inicial
+        original = views.replay_response
+        calls = []
+
+        def miss_first_lookup(*args):
+            calls.append(args)
+            return None if len(calls) == 1 else original(*args)
+
+        with mock.patch("payments.views.replay_response", miss_first_lookup):
+            second = self.client.post(reverse("payments-list"), data, headers=headers)
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_async_payment_returns_202_with_status_url(self):
+        response = self.client.post(
+            reverse("payments-list") + "?async=true",
+            {"loan": str(self.loan.id), "amount": "300.00"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], PaymentIntent.Status.PENDING)
+        self.assertEqual(response["Location"], response.data["status_url"])
+        self.assertFalse(Payment.objects.exists())
+
+        call_command("process_payments", "--once", "--workers", "1", stdout=StringIO())
+
+        intent = self.client.get(response.data["status_url"])
+        self.assertEqual(intent.status_code, status.HTTP_200_OK)
+        self.assertEqual(intent.data["status"], PaymentIntent.Status.SUCCEEDED)
+        self.assertEqual(intent.data["payment"], Payment.objects.get().id)
+
+    def test_async_payment_for_another_users_loan_is_forbidden(self):
+        response = self.client.post(
+            reverse("payments-list") + "?async=true",
+            {"loan": str(self.other_loan.id), "amount": "300.00"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PaymentIntent.objects.exists())
+
+    def test_payment_intent_of_another_user_is_not_found(self):
+        intent = PaymentIntent.objects.create(
+            user=self.other_user, loan=self.other_loan, amount=Decimal("1.00")
+        )
+
+        response = self.client.get(reverse("payment-intents-detail", args=[intent.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
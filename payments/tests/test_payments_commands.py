@@ -0,0 +1,311 @@
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from loans.models import Loan
+from payments.models import (IdempotencyKey, Payment, PaymentImport,
+                             PaymentIntent)
+from payments.services import (claim_intents, process_intent,
+                               release_stale_claims)
+from payments.usecases import ProcessPaymentUseCase
+
+
+def header(sequence=1):
+    return f"034118102026{sequence:06d}".ljust(400)
+
+
+def detail(loan_id, cents, credit_date="17102026", reference="REF"):
+    loan_hex = uuid.UUID(str(loan_id)).hex
+    return f"1{loan_hex}{credit_date}{cents:013d}{reference:<25}".ljust(400)
+
+
+class ImportCNABPaymentsCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="cnab@example.com", password="12345678", document="12345678900"
+        )
+        self.loans = [
+            Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                monthly_interest_rate=Decimal("0.02"),
+                ip_address="127.0.0.1",
+                bank="Banco CNAB",
+                client=f"Cliente {index}",
+            )
+            for index in range(3)
+        ]
+
+    def write_file(self, lines):
+        handle, path = tempfile.mkstemp(suffix=".ret")
+        with os.fdopen(handle, "w", encoding="latin-1", newline="\r\n") as stream:
+            stream.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_imports_records_and_reports_rejections(self):
+        path = self.write_file(
+            [
+                header(),
+                detail(self.loans[0].id, 10050),
+                detail(uuid.uuid4(), 1000),
+                "1" + "x" * 399,
+                detail(self.loans[1].id, 0),
+                detail(self.loans[0].id, 2000, credit_date="16102026"),
+                "9".ljust(400),
+            ]
+        )
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            "import_cnab_payments", path, "--batch-size", "2", stdout=out, stderr=err
+        )
+
+        self.assertIn("6 linha(s) processada(s)", out.getvalue())
+        self.assertIn("2 pagamento(s) importado(s), 3 recusado(s)", out.getvalue())
+        self.assertIn("Linha 3: Empréstimo não encontrado.", err.getvalue())
+        self.assertIn("Linha 4: Identificação do empréstimo inválida.", err.getvalue())
+        self.assertIn("Linha 5: Valor pago inválido.", err.getvalue())
+
+        self.loans[0].refresh_from_db()
+        self.assertEqual(self.loans[0].total_paid_amount, Decimal("120.50"))
+        self.assertEqual(
+            sorted(p.payment_date.day for p in self.loans[0].payments.all()), [16, 17]
+        )
+        checkpoint = PaymentImport.objects.get()
+        self.assertEqual(checkpoint.status, PaymentImport.Status.COMPLETED)
+        self.assertEqual((checkpoint.imported_count, checkpoint.rejected_count), (2, 3))
+
+    def test_completed_file_is_not_imported_twice(self):
+        path = self.write_file([header(), detail(self.loans[0].id, 100), "9"])
+        call_command("import_cnab_payments", path, stdout=StringIO())
+
+        out = StringIO()
+        call_command("import_cnab_payments", path, stdout=out)
+
+        self.assertIn("Arquivo já importado", out.getvalue())
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_interrupted_import_resumes_from_last_committed_batch(self):
+        path = self.write_file(
+            [header()]
+            + [detail(self.loans[index % 3].id, 100) for index in range(7)]
+            + ["9"]
+        )
+        original = ProcessPaymentUseCase.handle_bulk
+        calls = []
+
+        def fail_on_third_batch(usecase, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError("conexão perdida")
+            return original(usecase, *args, **kwargs)
+
+        with mock.patch.object(
+            ProcessPaymentUseCase, "handle_bulk", fail_on_third_batch
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    "import_cnab_payments", path, "--batch-size", "3", stdout=StringIO()
+                )
+
+        self.assertEqual(Payment.objects.count(), 6)
+        self.assertEqual(PaymentImport.objects.get().line_number, 7)
+
+        out = StringIO()
+        call_command("import_cnab_payments", path, "--batch-size", "3", stdout=out)
+
+        self.assertIn("Retomado após a linha 7", out.getvalue())
+        self.assertEqual(Payment.objects.count(), 7)
+        self.assertEqual(PaymentImport.objects.get().imported_count, 7)
+
+    def test_file_without_header_is_rejected(self):
+        path = self.write_file([detail(self.loans[0].id, 100)])
+
+        with self.assertRaises(CommandError):
+            call_command("import_cnab_payments", path, stdout=StringIO())
+
+
+class PurgeIdempotencyKeysCommandTest(TestCase):
+    def test_removes_only_expired_keys(self):
+        user = User.objects.create_user(
+            email="purge@example.com", password="12345678", document="12345678900"
+        )
+        IdempotencyKey.objects.create(user=user, key="old", request_hash="x")
+        IdempotencyKey.objects.create(user=user, key="new", request_hash="x")
+        IdempotencyKey.objects.filter(key="old").update(
+            created_at=now() - timedelta(hours=25)
+        )
+        out = StringIO()
+
+        call_command("purge_idempotency_keys", stdout=out)
+
+        self.assertIn("1 chave(s) expirada(s) removida(s)", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"]
+        )
+
+
+class ProcessPaymentsCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="worker@example.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.02"),
+            ip_address="127.0.0.1",
+            bank="Banco Fila",
+            client="Cliente Fila",
+        )
+
+    def enqueue(self, amount):
+        return PaymentIntent.objects.create(
+            user=self.user, loan=self.loan, amount=Decimal(amount)
+        )
+
+    def test_processes_pending_intents_in_order(self):
+        first = self.enqueue("100.00")
+        second = self.enqueue(str(self.loan.total_due))
+        out = StringIO()
+
+        call_command(
+            "process_payments",
+            "--once",
+            "--workers",
+            "1",
+            "--batch-size",
+            "1",
+            stdout=out,
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, PaymentIntent.Status.SUCCEEDED)
+        self.assertEqual(second.status, PaymentIntent.Status.FAILED)
+        self.assertIn("excede", second.error)
+        self.assertEqual(Payment.objects.get().id, first.payment_id)
+        self.assertIn("2 intenção(ões) processada(s)", out.getvalue())
+
+    def test_claimed_intents_are_not_claimed_again(self):
+        intents = [self.enqueue("1.00") for _ in range(3)]
+
+        first_token, first = claim_intents(2)
+        second_token, second = claim_intents(2)
+
+        self.assertEqual(first, [intents[0].pk, intents[1].pk])
+        self.assertEqual(second, [intents[2].pk])
+        self.assertNotEqual(first_token, second_token)
+        self.assertEqual(claim_intents(2)[1], [])
+        self.assertEqual(
+            set(PaymentIntent.objects.values_list("attempts", flat=True)), {1}
+        )
+
+    def test_stale_claims_return_to_the_queue(self):
+        intent = self.enqueue("1.00")
+        claim_intents(1)
+        PaymentIntent.objects.update(claimed_at=now() - timedelta(minutes=10))
+
+        call_command("process_payments", "--once", "--workers", "1", stdout=StringIO())
+
+        intent.refresh_from_db()
+        self.assertEqual(intent.status, PaymentIntent.Status.SUCCEEDED)
+        self.assertEqual(intent.attempts, 2)
+
+    def test_reclaimed_intent_is_not_paid_by_the_stale_worker(self):
+        intent = self.enqueue("100.00")
+        stale_token, _ = claim_intents(1)
+        PaymentIntent.objects.update(claimed_at=now() - timedelta(minutes=10))
+        release_stale_claims(timedelta(minutes=5))
+        token, _ = claim_intents(1)
+
+        self.assertEqual(
+            process_intent(intent.pk, token), PaymentIntent.Status.SUCCEEDED
+        )
+        # O worker original retoma a intenção depois de perder a reserva
+        self.assertEqual(
+            process_intent(intent.pk, stale_token), PaymentIntent.Status.SUCCEEDED
+        )
+
+        self.assertEqual(Payment.objects.count(), 1)
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.payments_count, 1)
+
+    def test_released_claim_is_not_paid_nor_failed(self):
+        intent = self.enqueue("100.00")
+        token, _ = claim_intents(1)
+        release_stale_claims(timedelta(0))
+
+        with mock.patch.object(
+            ProcessPaymentUseCase, "handle", side_effect=RuntimeError("falha")
+        ) as handle:
+            status = process_intent(intent.pk, token)
+
+        handle.assert_not_called()
+        self.assertEqual(status, PaymentIntent.Status.PENDING)
+        intent.refresh_from_db()
+        self.assertEqual(intent.error, "")
+        self.assertFalse(Payment.objects.exists())
+
+    def test_claim_is_renewed_when_processing_starts(self):
+        intent = self.enqueue("1.00")
+        token, _ = claim_intents(1)
+        PaymentIntent.objects.update(claimed_at=now() - timedelta(minutes=10))
+        started = now()
+
+        with mock.patch.object(
+            ProcessPaymentUseCase, "handle", side_effect=RuntimeError("falha")
+        ):
+            process_intent(intent.pk, token)
+
+        intent.refresh_from_db()
+        self.assertGreaterEqual(intent.claimed_at, started)
+
+    def test_stale_claims_are_released_while_running(self):
+        self.enqueue("1.00")
+        self.enqueue("1.00")
+
+        with mock.patch(
+            "payments.management.commands.process_payments.release_stale_claims",
+            return_value=0,
+        ) as release:
+            call_command(
+                "process_payments",
+                "--once",
+                "--workers",
+                "1",
+                "--batch-size",
+                "1",
+                "--release-interval",
+                "0",
+                stdout=StringIO(),
+            )
+
+        # Dois lotes e a consulta final à fila vazia
+        self.assertEqual(release.call_count, 3)
+
+    def test_unexpected_errors_are_retried_until_max_attempts(self):
+        intent = self.enqueue("1.00")
+
+        with mock.patch.object(
+            ProcessPaymentUseCase, "handle", side_effect=RuntimeError("falha")
+        ):
+            call_command(
+                "process_payments", "--once", "--workers", "1", stdout=StringIO()
+            )
+
+        intent.refresh_from_db()
+        self.assertEqual(intent.status, PaymentIntent.Status.FAILED)
+        self.assertEqual(intent.attempts, 3)
+        self.assertIn("RuntimeError", intent.error)
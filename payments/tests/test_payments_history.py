@@ -0,0 +1,103 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils.timezone import now
+
+from accounts.models import User
+from core.history import deferred_history
+from loans.models import Loan
+from payments.models import Payment
+from payments.usecases import ProcessPaymentUseCase
+
+
+class DeferredHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="history@example.com", password="12345678", document="12345678900"
+        )
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            monthly_interest_rate=Decimal("0.01"),
+            ip_address="127.0.0.1",
+            bank="Banco Histórico",
+            client="Cliente Histórico",
+        )
+
+    def test_payment_history_is_written_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            payment = ProcessPaymentUseCase().handle(
+                loan=self.loan, user=self.user, amount=Decimal("100.00")
+            )
+            self.assertFalse(Payment.history.filter(id=payment.id).exists())
+
+        before_commit = now()
+        for callback in callbacks:
+            callback()
+
+        record = Payment.history.get(id=payment.id)
+        self.assertEqual(record.history_type, "+")
+        self.assertEqual(record.amount, Decimal("100.00"))
+        self.assertLessEqual(record.history_date, before_commit)
+
+    def test_history_failure_after_commit_is_logged_not_raised(self):
+        bulk_create = QuerySet.bulk_create
+
+        def failing_bulk_create(queryset, *args, **kwargs):
+            if queryset.model is Payment.history.model:
+                raise DatabaseError("falha")
+            return bulk_create(queryset, *args, **kwargs)
+
+        with (
+            mock.patch.object(QuerySet, "bulk_create", failing_bulk_create),
+            self.assertLogs("core.history", "ERROR") as logs,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            payment = ProcessPaymentUseCase().handle(
+                loan=self.loan, user=self.user, amount=Decimal("100.00")
+            )
+
+        self.assertTrue(Payment.objects.filter(pk=payment.pk).exists())
+        self.assertFalse(Payment.history.exists())
+        self.assertIn(str(payment.pk), logs.output[0])
+
+    def test_immediate_history_when_not_deferred(self):
+        with self.captureOnCommitCallbacks():
+            payment = ProcessPaymentUseCase(defer_history=False).handle(
+                loan=self.loan, user=self.user, amount=Decimal("100.00")
+            )
+            self.assertTrue(Payment.history.filter(id=payment.id).exists())
+
+    def test_rolled_back_savepoint_discards_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with deferred_history(), transaction.atomic():
+                kept = Payment.objects.create(loan=self.loan, amount=Decimal("10"))
+                try:
+                    with transaction.atomic():
+                        Payment.objects.create(loan=self.loan, amount=Decimal("20"))
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                Payment.objects.create(loan=self.loan, amount=Decimal("30"))
+
+        self.assertEqual(
+            sorted(Payment.history.values_list("amount", flat=True)),
+            [Decimal("10.00"), Decimal("30.00")],
+        )
+        self.assertTrue(Payment.history.filter(id=kept.id).exists())
+
+    def test_benchmark_reports_scenarios_and_rolls_back(self):
+        out = StringIO()
+        payments = Payment.objects.count()
+
+        call_command("benchmark_history_writes", "--payments=3", stdout=out)
+
+        output = out.getvalue()
+        for scenario in ("imediato", "adiado", "lote"):
+            self.assertIn(scenario, output)
+        self.assertEqual(Payment.objects.count(), payments)
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.testing import QueryPlanMixin
+from loans.models import Loan
+from payments.models import Payment
+
+
+class PaymentIndexTest(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="index@example.com", password="12345678", document="12345678900"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("1000.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Índice",
+            client="Cliente Índice",
+        )
+        Payment.objects.create(loan=self.loan, amount=Decimal("10.00"))
+
+    def test_payment_list_uses_loan_created_at_index(self):
+        sql = self.capture_select(
+            "payments_payment", lambda: self.client.get(reverse("payments-list"))
+        )
+
+        self.assertUsesIndex(sql, "payment_loan_created_idx")
+
+    def test_payment_sum_per_loan_uses_covering_index(self):
+        sql = self.capture_select(
+            "payments_payment",
+            lambda: self.loan.payments.aggregate(Sum("amount")),
+            contains="SUM",
+        )
+
+        self.assertUsesIndex(sql, "payment_loan_created_idx")
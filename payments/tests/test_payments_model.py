@@ -1,9 +1,11 @@
 from decimal import Decimal
 
-from django.test import TestCase
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
 
 from accounts.models import User
 from loans.models import Loan
+from payments.admin import PaymentAdmin
 from payments.models import Payment
 
 
@@ -45,3 +47,67 @@ class PaymentModelTest(TestCase):
         payments = list(Payment.objects.all())
         self.assertEqual(payments[0], newer)
         self.assertEqual(payments[1], older)
+
+    def test_create_payment_updates_loan_totals(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("100.00"))
+        Payment.objects.create(loan=self.loan, amount=Decimal("50.00"))
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("150.00"))
+        self.assertEqual(self.loan.payments_count, 2)
+
+    def test_update_and_delete_payment_resync_loan_totals(self):
+        payment = Payment.objects.create(loan=self.loan, amount=Decimal("100.00"))
+
+        payment.amount = Decimal("80.00")
+        payment.save()
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("80.00"))
+        self.assertEqual(self.loan.payments_count, 1)
+
+        payment.delete()
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("0.00"))
+        self.assertEqual(self.loan.payments_count, 0)
+        self.assertIsNone(self.loan.last_payment_at)
+
+    def test_queryset_update_and_delete_resync_loan_totals(self):
+        other_loan = Loan.objects.create(
+            user=self.user,
+            principal_amount=Decimal("500.00"),
+            ip_address="127.0.0.1",
+            bank="Banco Teste",
+            client="Outro Cliente",
+        )
+        Payment.objects.create(loan=self.loan, amount=Decimal("100.00"))
+        Payment.objects.create(loan=self.loan, amount=Decimal("50.00"))
+
+        Payment.objects.filter(amount=Decimal("50.00")).update(loan=other_loan)
+        self.loan.refresh_from_db()
+        other_loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("100.00"))
+        self.assertEqual(self.loan.payments_count, 1)
+        self.assertEqual(other_loan.total_paid_amount, Decimal("50.00"))
+        self.assertEqual(other_loan.payments_count, 1)
+
+        Payment.objects.all().delete()
+        for loan in (self.loan, other_loan):
+            loan.refresh_from_db()
+            self.assertEqual(loan.total_paid_amount, Decimal("0.00"))
+            self.assertEqual(loan.payments_count, 0)
+            self.assertIsNone(loan.last_payment_at)
+
+    def test_admin_delete_selected_resyncs_loan_totals(self):
+        Payment.objects.create(loan=self.loan, amount=Decimal("100.00"))
+        admin_user = User.objects.create_superuser(
+            email="admin@test.com", password="12345678", document="00000000000"
+        )
+        request = RequestFactory().post("/admin/payments/payment/")
+        request.user = admin_user
+
+        PaymentAdmin(Payment, site).delete_queryset(request, Payment.objects.all())
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("0.00"))
+        self.assertEqual(self.loan.payments_count, 0)
+        self.assertIsNone(self.loan.last_payment_at)
@@ -1,12 +1,19 @@
 from decimal import Decimal
+from unittest import mock
 
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from accounts.models import User
+from audits.enums import LoanActionEnum
 from loans.models import Loan
 from payments.models import Payment
-from payments.usecases.process_payment_use_case import ProcessPaymentUseCase
+from payments.usecases import (OPTIMISTIC, PaymentConflict,
+                               ProcessPaymentUseCase,
+                               payment_concurrency_stats)
 
 
 class ProcessPaymentUseCaseTest(TestCase):
@@ -76,3 +83,160 @@ class ProcessPaymentUseCaseTest(TestCase):
                 amount=Decimal("100.00"),
             )
         self.assertIn("não tem permissão", str(ctx.exception))
+
+    def test_bulk_payments_use_running_totals_per_loan(self):
+        other_loan = Loan.objects.create(
+            user=self.other_user,
+            principal_amount=Decimal("500.00"),
+            monthly_interest_rate=Decimal("0.01"),
+            ip_address="127.0.0.1",
+            bank="Banco XYZ",
+            client="Cliente Outro",
+        )
+        total_due = self.loan.total_due
+        items = [
+            {"loan": self.loan.id, "amount": Decimal("100.00")},
+            {"loan": other_loan.id, "amount": Decimal("10.00")},
+            {"loan": self.loan.id, "amount": total_due},
+            {"loan": self.loan.id, "amount": total_due - Decimal("100.00")},
+            {"loan": self.loan.id, "amount": Decimal("1.00")},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            results = self.usecase.handle_bulk(
+                items, user=self.user, ip_address="10.0.0.1"
+            )
+
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "rejected", "rejected", "created", "rejected"],
+        )
+        self.assertIn("permissão", results[1]["error"])
+        self.assertIn("excede", results[2]["error"])
+        self.assertIn("quitado", results[4]["error"])
+
+        self.loan.refresh_from_db()
+        self.assertTrue(self.loan.is_fully_paid)
+        self.assertEqual(self.loan.payments_count, 2)
+        self.assertEqual(self.loan.total_paid_amount, total_due)
+        self.assertEqual(
+            set(Payment.objects.values_list("id", flat=True)),
+            {results[0]["payment_id"], results[3]["payment_id"]},
+        )
+        self.assertEqual(
+            list(self.loan.logs.order_by("action").values_list("action", flat=True)),
+            [LoanActionEnum.CLOSED, LoanActionEnum.PAYMENT, LoanActionEnum.PAYMENT],
+        )
+        self.assertEqual(Payment.history.count(), 2)
+
+        change = self.loan.history.get(history_type="~")
+        self.assertEqual(change.history_diff, {"is_fully_paid": True})
+        self.assertEqual(change.history_user, self.user)
+        self.assertEqual(change.instance.total_paid_amount, total_due)
+
+    def test_bulk_partial_payments_write_no_loan_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usecase.handle_bulk(
+                [{"loan": self.loan.id, "amount": Decimal("10.00")}] * 3,
+                user=self.user,
+            )
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.payments_count, 3)
+        self.assertFalse(self.loan.history.filter(history_type="~").exists())
+
+    def test_bulk_payments_write_in_constant_queries(self):
+        loans = [
+            Loan.objects.create(
+                user=self.user,
+                principal_amount=Decimal("1000.00"),
+                monthly_interest_rate=Decimal("0.01"),
+                ip_address="127.0.0.1",
+                bank="Banco XYZ",
+                client=f"Cliente {index}",
+            )
+            for index in range(2)
+        ]
+
+        def items(count):
+            return [
+                {"loan": loans[index % 2].id, "amount": Decimal("1.00")}
+                for index in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.usecase.handle_bulk(items(2), user=self.user)
+        with CaptureQueriesContext(connection) as large:
+            self.usecase.handle_bulk(items(40), user=self.user)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Payment.objects.count(), 42)
+
+    def concurrent_writes(self, on_attempts):
+        """
+        Substitui `_validate` para simular outra transação alterando o
+        empréstimo logo após as leituras das tentativas em `on_attempts`.
+        """
+        original = ProcessPaymentUseCase._validate
+        calls = []
+
+        def validate(usecase, loan, user, amount):
+            original(usecase, loan=loan, user=user, amount=amount)
+            calls.append(1)
+            # A primeira chamada é a validação inicial de `handle`
+            if len(calls) - 1 in on_attempts:
+                Loan.objects.filter(pk=loan.pk).update(version=F("version") + 1)
+
+        return mock.patch.object(ProcessPaymentUseCase, "_validate", validate)
+
+    def test_optimistic_payment_increments_version(self):
+        usecase = ProcessPaymentUseCase(strategy=OPTIMISTIC)
+
+        usecase.handle(loan=self.loan, user=self.user, amount=Decimal("100.00"))
+
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_paid_amount, Decimal("100.00"))
+        self.assertEqual(self.loan.version, 2)
+
+    def test_optimistic_payment_retries_after_conflict(self):
+        usecase = ProcessPaymentUseCase(strategy=OPTIMISTIC, max_retries=2)
+        stats = payment_concurrency_stats()
+
+        with self.concurrent_writes(on_attempts={1}):
+            usecase.handle(loan=self.loan, user=self.user, amount=Decimal("100.00"))
+
+        after = payment_concurrency_stats()
+        self.assertEqual(after["attempts"], stats["attempts"] + 2)
+        self.assertEqual(after["retries"], stats["retries"] + 1)
+        self.assertEqual(after["conflicts"], stats["conflicts"])
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_optimistic_payment_gives_up_after_max_retries(self):
+        usecase = ProcessPaymentUseCase(strategy=OPTIMISTIC, max_retries=1)
+        stats = payment_concurrency_stats()
+
+        with self.concurrent_writes(on_attempts={1, 2}):
+            with self.assertRaises(PaymentConflict):
+                usecase.handle(loan=self.loan, user=self.user, amount=Decimal("100.00"))
+
+        self.assertEqual(
+            payment_concurrency_stats()["conflicts"], stats["conflicts"] + 1
+        )
+        self.assertFalse(Payment.objects.exists())
+
+    def test_optimistic_retry_validates_against_fresh_totals(self):
+        usecase = ProcessPaymentUseCase(strategy=OPTIMISTIC)
+        amount = self.loan.total_due
+
+        stale = Loan.objects.get(pk=self.loan.pk)
+
+        # Pagamento concorrente quita o empréstimo após a leitura de `stale`
+        Payment.objects.create(loan=self.loan, amount=amount)
+        with self.assertRaises(ValidationError):
+            usecase.handle(loan=stale, user=self.user, amount=amount)
+
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ProcessPaymentUseCase(strategy="magic")
@@ -1,8 +1,9 @@
 from rest_framework.routers import DefaultRouter
 
-from .views import PaymentViewSet
+from .views import PaymentIntentViewSet, PaymentViewSet
 
 router = DefaultRouter()
 router.register(r"payments", PaymentViewSet, basename="payments")
+router.register(r"payment-intents", PaymentIntentViewSet, basename="payment-intents")
 
 urlpatterns = router.urls
@@ -1 +1,4 @@
-from .process_payment_use_case import ProcessPaymentUseCase  # noqa: F401
+from .process_payment_use_case import (OPTIMISTIC, PESSIMISTIC,  # noqa: F401
+                                       PaymentConflict, ProcessPaymentUseCase,
+                                       error_message,
+                                       payment_concurrency_stats)
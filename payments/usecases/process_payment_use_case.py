@@ -1,21 +1,85 @@
+from collections import Counter
 from decimal import Decimal
+from functools import partial
 
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Sum
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db.models import F
+from rest_framework import status
+from rest_framework.exceptions import (APIException, PermissionDenied,
+                                       ValidationError)
+from simple_history.utils import bulk_create_with_history
 
 from accounts.models import User
+from accounts.services import invalidate_account_summary
 from audits.enums import LoanActionEnum
-from audits.services import log_loan_action
+from audits.services import (build_loan_action, bulk_log_loan_actions,
+                             log_loan_action)
+from core.history import bulk_history_changes, deferred_history
 from loans.models import Loan
 from payments.models import Payment
 
+BULK_BATCH_SIZE = 500
+
+PESSIMISTIC = "pessimistic"
+OPTIMISTIC = "optimistic"
+STRATEGIES = (PESSIMISTIC, OPTIMISTIC)
+
+_stats = Counter()
+
+
+def payment_concurrency_stats() -> dict:
+    """
+    Contadores da estratégia otimista: tentativas, novas tentativas após
+    conflito e pagamentos recusados por esgotar as tentativas.
+    """
+    return {
+        "attempts": _stats["attempts"],
+        "retries": _stats["retries"],
+        "conflicts": _stats["conflicts"],
+    }
+
+
+def error_message(exc: APIException) -> str:
+    """Mensagem de uma recusa do caso de uso, para relatórios por item."""
+    detail = exc.detail
+    if isinstance(detail, dict):
+        detail = detail.get("detail", next(iter(detail.values())))
+    return str(detail)
+
+
+class PaymentConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "O empréstimo foi alterado por outro pagamento. Tente novamente."
+    default_code = "payment_conflict"
+
 
 class ProcessPaymentUseCase:
     """
     Caso de uso responsável por processar um pagamento de um empréstimo.
+
+    A concorrência entre pagamentos do mesmo empréstimo é controlada pela
+    estratégia `PAYMENT_CONCURRENCY_STRATEGY`:
+
+    - `pessimistic`: bloqueia o empréstimo com `select_for_update`;
+    - `optimistic`: lê sem bloqueio e confirma com um UPDATE condicional na
+        coluna `version`, tentando novamente em caso de conflito.
+
+    Com `defer_history` (padrão), o histórico do pagamento e do empréstimo é
+    gravado em lote após o commit, fora do bloqueio (ver `core.history`).
     """
 
+    def __init__(self, strategy=None, max_retries=None, defer_history=True):
+        self.strategy = strategy or settings.PAYMENT_CONCURRENCY_STRATEGY
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de concorrência inválida: {self.strategy}")
+        self.max_retries = (
+            settings.PAYMENT_OPTIMISTIC_MAX_RETRIES
+            if max_retries is None
+            else max_retries
+        )
+        self.defer_history = defer_history
+
     def handle(
         self, loan: Loan, user: User, amount: Decimal, ip_address=None
     ) -> Payment:
@@ -23,17 +87,19 @@ class ProcessPaymentUseCase:
         Executa o caso de uso de pagamento.
 
         1. Realiza validações de integridade e autorização.
-        2. Garante atomicidade da operação usando `transaction.atomic()`.
-        3. Cria o pagamento e registra log de auditoria.
-        4. Se o valor total pago atinge ou ultrapassa o valor devido, marca o
-            empréstimo como quitado.
-        5. Retorna a instância de Payment criada.
+        2. Garante atomicidade da operação usando `transaction.atomic()` e
+            obtém o empréstimo conforme a estratégia de concorrência.
+        3. Cria o pagamento e retorna a instância criada
+            (ver `_record_payment`).
         """
         # 1
         self._validate(loan=loan, user=user, amount=amount)
 
+        if self.strategy == OPTIMISTIC:
+            return self._handle_optimistic(loan, user, amount, ip_address)
+
         # 2
-        with transaction.atomic():
+        with deferred_history(self.defer_history), transaction.atomic():
             loan = (
                 Loan.objects.select_for_update()
                 .select_related("user")
@@ -43,43 +109,223 @@ class ProcessPaymentUseCase:
             )
 
             # 3
-            total_paid = loan.payments.aggregate(total=Sum("amount"))[
-                "total"
-            ] or Decimal("0.00")
-            total_due = loan.total_due
+            return self._record_payment(loan, user, amount, ip_address)
+
+    def _handle_optimistic(self, loan, user, amount, ip_address):
+        """
+        Lê o empréstimo sem bloqueio, revalida o pagamento e o confirma com
+        `UPDATE ... SET version = n + 1 WHERE version = n`. Se outro pagamento
+        alterou o empréstimo entre a leitura e a escrita, nenhuma linha é
+        atualizada e o fluxo recomeça, até `max_retries` vezes.
+        """
+        for attempt in range(self.max_retries + 1):
+            _stats["attempts"] += 1
+            if attempt:
+                _stats["retries"] += 1
+
+            loan = Loan.objects.select_related("user").get(id=loan.id)
+            self._validate(loan=loan, user=user, amount=amount)
+
+            with deferred_history(self.defer_history), transaction.atomic():
+                claimed = Loan.objects.filter(pk=loan.pk, version=loan.version).update(
+                    version=F("version") + 1
+                )
+                if claimed:
+                    loan.version += 1
+                    return self._record_payment(loan, user, amount, ip_address)
+
+        _stats["conflicts"] += 1
+        raise PaymentConflict()
+
+    def _record_payment(self, loan, user, amount, ip_address):
+        """
+        Grava o pagamento de um empréstimo já reservado pela estratégia de
+        concorrência (deve rodar dentro da transação).
+
+        1. Cria o pagamento, atualizando os totais desnormalizados do
+            empréstimo, registra log de auditoria e agenda a invalidação do
+            resumo em cache do usuário para após o commit.
+        2. Se o valor total pago atinge ou ultrapassa o valor devido, marca o
+            empréstimo como quitado.
+        """
+        # 1
+        total_paid = loan.total_paid_amount
+        total_due = loan.total_due
+
+        payment = Payment.objects.create(loan=loan, amount=amount)
 
-            payment = Payment.objects.create(loan=loan, amount=amount)
+        log_loan_action(
+            loan=loan,
+            action=LoanActionEnum.PAYMENT,
+            user=user,
+            ip_address=ip_address,
+            metadata={
+                "amount": str(amount),
+                "total_paid_before": str(total_paid),
+                "total_due": str(total_due),
+            },
+        )
+        transaction.on_commit(lambda: invalidate_account_summary(loan.user_id))
+
+        # 2
+        if total_paid + amount >= total_due:
+            loan.is_fully_paid = True
+            loan.save(update_fields=["is_fully_paid"])
 
             log_loan_action(
                 loan=loan,
-                action=LoanActionEnum.PAYMENT,
+                action=LoanActionEnum.CLOSED,
                 user=user,
                 ip_address=ip_address,
                 metadata={
-                    "amount": str(amount),
-                    "total_paid_before": str(total_paid),
-                    "total_due": str(total_due),
+                    "reason": "Empréstimo totalmente quitado",
+                    "total_paid": str(total_paid + amount),
                 },
             )
 
+        return payment
+
+    def handle_bulk(self, items, user: User, ip_address=None, system=False) -> list:
+        """
+        Processa um lote de pagamentos (`items`: dicionários com `loan`,
+        `amount` e, opcionalmente, `payment_date`) e retorna um resultado por
+        item, na ordem recebida.
+
+        Com `system=True` o lote vem de uma integração (ex.: arquivo de
+        retorno bancário): a titularidade do empréstimo não é exigida e
+        `user` (opcional) é registrado apenas como autor.
+
+        1. Agrupa os itens por empréstimo.
+        2. Bloqueia cada empréstimo uma única vez, em ordem de chave primária
+            para evitar deadlocks entre lotes concorrentes.
+        3. Valida cada item com as mesmas regras do fluxo unitário, contra o
+            total pago acumulado em memória; itens recusados não interrompem
+            o lote.
+        4. Grava pagamentos, logs de auditoria e totais dos empréstimos com
+            `bulk_create`/`bulk_update`, o histórico dos pagamentos e o dos
+            empréstimos quitados (diferenças), e agenda a invalidação do
+            resumo em cache dos titulares para após o commit.
+        """
+        results = [
+            {"loan": item["loan"], "amount": item["amount"], "payment": None}
+            for item in items
+        ]
+
+        # 1
+        grouped = {}
+        for index, item in enumerate(items):
+            grouped.setdefault(item["loan"], []).append(index)
+
+        with transaction.atomic():
+            # 2
+            loans = self._lock_loans(sorted(grouped))
+
+            # 3
+            payments, logs, touched, closed = [], [], {}, []
+            for loan_id, indexes in grouped.items():
+                loan = loans.get(loan_id)
+                if loan is None:
+                    for index in indexes:
+                        results[index]["error"] = "Empréstimo não encontrado."
+                    continue
+
+                total_due = loan.total_due
+                for index in indexes:
+                    amount = items[index]["amount"]
+                    try:
+                        self._validate(
+                            loan=loan,
+                            user=loan.user if system else user,
+                            amount=amount,
+                        )
+                    except APIException as exc:
+                        results[index]["error"] = error_message(exc)
+                        continue
+
+                    payment = Payment(loan=loan, amount=amount)
+                    if items[index].get("payment_date"):
+                        payment.payment_date = items[index]["payment_date"]
+                    payments.append(payment)
+                    touched[loan_id] = loan
+                    results[index]["payment"] = payment
+                    logs.append(
+                        build_loan_action(
+                            loan=loan,
+                            action=LoanActionEnum.PAYMENT,
+                            user=user,
+                            ip_address=ip_address,
+                            metadata={
+                                "amount": str(amount),
+                                "total_paid_before": str(loan.total_paid_amount),
+                                "total_due": str(total_due),
+                            },
+                        )
+                    )
+
+                    loan.total_paid_amount += amount
+                    loan.payments_count += 1
+                    loan.version += 1
+                    loan.last_payment_at = max(
+                        filter(None, (loan.last_payment_at, payment.payment_date))
+                    )
+                    if loan.total_paid_amount >= total_due:
+                        loan.is_fully_paid = True
+                        closed.append(loan)
+                        logs.append(
+                            build_loan_action(
+                                loan=loan,
+                                action=LoanActionEnum.CLOSED,
+                                user=user,
+                                ip_address=ip_address,
+                                metadata={
+                                    "reason": "Empréstimo totalmente quitado",
+                                    "total_paid": str(loan.total_paid_amount),
+                                },
+                            )
+                        )
+
             # 4
-            if total_paid + amount >= total_due:
-                loan.is_fully_paid = True
-                loan.save(update_fields=["is_fully_paid"])
-
-                log_loan_action(
-                    loan=loan,
-                    action=LoanActionEnum.CLOSED,
-                    user=user,
-                    ip_address=ip_address,
-                    metadata={
-                        "reason": "Empréstimo totalmente quitado",
-                        "total_paid": str(total_paid + amount),
-                    },
+            if payments:
+                bulk_create_with_history(
+                    payments, Payment, batch_size=BULK_BATCH_SIZE, default_user=user
+                )
+                Loan.objects.bulk_update(
+                    list(touched.values()),
+                    [
+                        "total_paid_amount",
+                        "payments_count",
+                        "last_payment_at",
+                        "is_fully_paid",
+                        "version",
+                    ],
+                    batch_size=BULK_BATCH_SIZE,
                 )
+                # Os totais ficam fora do histórico; só a quitação é registrada
+                bulk_history_changes(closed, default_user=user)
+                bulk_log_loan_actions(logs)
+                for owner_id in {loan.user_id for loan in touched.values()}:
+                    transaction.on_commit(partial(invalidate_account_summary, owner_id))
 
-            # 5
-            return payment
+        for result in results:
+            payment = result.pop("payment")
+            result["payment_id"] = payment.pk if payment else None
+            result["status"] = "created" if payment else "rejected"
+            result.setdefault("error", None)
+        return results
+
+    def _lock_loans(self, loan_ids):
+        """Bloqueia os empréstimos (`select_for_update`) em lotes ordenados."""
+        loans = {}
+        for start in range(0, len(loan_ids), BULK_BATCH_SIZE):
+            chunk = loan_ids[start : start + BULK_BATCH_SIZE]
+            queryset = (
+                Loan.objects.select_for_update()
+                .select_related("user")
+                .filter(id__in=chunk)
+                .order_by("pk")
+            )
+            loans.update((loan.pk, loan) for loan in queryset)
+        return loans
 
     def _validate(self, loan: Loan, user: User, amount: Decimal):
         """
@@ -98,10 +344,5 @@ class ProcessPaymentUseCase:
             raise ValidationError({"detail": "Este empréstimo já está quitado."})
 
         # 3
-        total_paid = loan.payments.aggregate(total=Sum("amount"))["total"] or Decimal(
-            "0.00"
-        )
-        total_due = loan.total_due
-
-        if total_paid + amount > total_due:
+        if loan.total_paid_amount + amount > loan.total_due:
             raise ValidationError({"detail": "O valor excede o saldo devedor."})
@@ -1,29 +1,72 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Payment
-from .serializers import PaymentSerializer
+from accounts.services import invalidate_account_summary
+from core.sparse_fields import SparseFieldsMixin
+
+from .models import Payment, PaymentIntent
+from .serializers import (PAYMENT_FIELD_SOURCES, BulkPaymentResultSerializer,
+                          BulkPaymentSerializer, PaymentIntentSerializer,
+                          PaymentSerializer)
+from .services import (claim_key, enqueue_payment, get_idempotency_key,
+                       replay_response, request_fingerprint, store_response)
 from .usecases import ProcessPaymentUseCase
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
     ordering = ["-created_at"]
 
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["loan", "payment_date", "amount"]
+    sparse_field_sources = PAYMENT_FIELD_SOURCES
 
     def get_queryset(self):
-        return Payment.objects.filter(loan__user=self.request.user).select_related(
-            "loan"
-        )
+        queryset = Payment.objects.filter(loan__user=self.request.user)
+        return self.only_sparse_fields(queryset, "created_at")
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
+        """
+        1. Sem `Idempotency-Key`, processa o pagamento normalmente.
+        2. Com a chave, uma repetição devolve a resposta armazenada sem
+            bloquear o empréstimo nem recalcular o saldo devedor.
+        3. Caso contrário, registra a chave, processa o pagamento e guarda a
+            resposta na mesma transação; se uma requisição concorrente
+            registrou a chave antes, devolve a resposta dela.
+        """
+        # 1
+        key = get_idempotency_key(request)
+        if key is None:
+            return self._create_payment(request)
+
+        # 2
+        fingerprint = request_fingerprint(request.data)
+        replay = replay_response(request.user, key, fingerprint)
+        if replay is not None:
+            return replay
+
+        # 3
+        try:
+            with transaction.atomic():
+                record = claim_key(request.user, key, fingerprint)
+                response = self._create_payment(request)
+                store_response(record, response)
+        except IntegrityError:
+            replay = replay_response(request.user, key, fingerprint)
+            if replay is None:
+                raise
+            return replay
+        return response
+
+    @transaction.atomic
+    def _create_payment(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -31,6 +74,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
         amount = serializer.validated_data["amount"]
         user = request.user
 
+        if request.query_params.get("async") in ("true", "1"):
+            return self._enqueue_payment(request, loan, amount)
+
         payment = ProcessPaymentUseCase().handle(
             loan=loan,
             user=user,
@@ -40,3 +86,76 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         output_serializer = self.get_serializer(payment)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
+
+    def _enqueue_payment(self, request, loan, amount):
+        """
+        Registra o pagamento para o worker `process_payments` e responde 202
+        com a URL de acompanhamento.
+        """
+        intent = enqueue_payment(
+            loan=loan,
+            user=request.user,
+            amount=amount,
+            ip_address=request.META.get("REMOTE_ADDR", "127.0.0.1"),
+        )
+        status_url = request.build_absolute_uri(
+            reverse("payment-intents-detail", args=[intent.pk])
+        )
+        return Response(
+            {"id": intent.pk, "status": intent.status, "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
+    @extend_schema(
+        request=BulkPaymentSerializer,
+        responses=BulkPaymentResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Registra um lote de pagamentos. Itens recusados (empréstimo
+        inexistente, de outro usuário, quitado ou valor acima do saldo) não
+        impedem os demais; o resultado de cada item vem na ordem do envio.
+        """
+        serializer = BulkPaymentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = ProcessPaymentUseCase().handle_bulk(
+            items=serializer.validated_data["payments"],
+            user=request.user,
+            ip_address=request.META.get("REMOTE_ADDR", "127.0.0.1"),
+        )
+
+        created = sum(result["status"] == "created" for result in results)
+        return Response(
+            {
+                "created": created,
+                "rejected": len(results) - created,
+                "results": BulkPaymentResultSerializer(results, many=True).data,
+            }
+        )
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._invalidate_summary()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self._invalidate_summary()
+
+    def _invalidate_summary(self):
+        user_id = self.request.user.pk
+        transaction.on_commit(lambda: invalidate_account_summary(user_id))
+
+
+class PaymentIntentViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Acompanhamento de pagamentos enviados com `?async=true`."""
+
+    serializer_class = PaymentIntentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return PaymentIntent.objects.filter(user=self.request.user)